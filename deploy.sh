@@ -161,6 +161,17 @@ if [[ "$DEPLOY_OPTION" == "1" || "$DEPLOY_OPTION" == "3" || "$DEPLOY_OPTION" ==
             done
         fi
     done
+
+    # Shared Python modules imported by the deployed scripts
+    for module in "monitoring/health-dashboard/docker_api.py" "monitoring/health-dashboard/influxwriter.py" \
+                  "monitoring/health-dashboard/dnsprobe.py"; do
+        if [[ "$DRY_RUN" == "false" ]]; then
+            echo "  Deploying $(basename "$module") (shared module)..."
+            cp "$SCRIPT_DIR/$module" ~/
+        else
+            echo "  [DRY RUN] Would deploy $(basename "$module") to ~/"
+        fi
+    done
 fi
 
 # Deploy systemd services
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Asyncio probe helpers for the Health Dashboard's asyncio mode: shell
+commands as async subprocesses (their whole process group is killed on
+timeout or cancellation) and a minimal HTTP status probe over asyncio
+streams, so neither needs a thread.
+"""
+
+import asyncio
+import os
+import signal
+import ssl
+import time
+from urllib.parse import urlsplit
+
+
+def kill_group(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def run(cmd, timeout=10):
+    """Run a shell command; return (stdout, returncode), 124 on timeout.
+
+    The command runs in its own session; if it times out, or the awaiting
+    task is cancelled, the shell and everything it started are killed.
+    """
+    proc = await asyncio.create_subprocess_shell(
+        cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        start_new_session=True)
+    try:
+        out, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        kill_group(proc)
+        await proc.wait()
+        return "", 124
+    except asyncio.CancelledError:
+        kill_group(proc)
+        raise
+    return out.decode(errors="replace").strip(), proc.returncode
+
+
+async def http_status(url, method="HEAD", timeout=5.0, verify=True):
+    """Send one request and return (status code, elapsed ms); no redirects followed.
+
+    Raises OSError, ValueError or asyncio.TimeoutError on failure.
+    """
+    parts = urlsplit(url)
+    secure = parts.scheme == "https"
+    host = parts.hostname
+    port = parts.port or (443 if secure else 80)
+    ctx = None
+    if secure:
+        ctx = ssl.create_default_context()
+        if not verify:
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+    path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+    async def exchange():
+        reader, writer = await asyncio.open_connection(
+            host, port, ssl=ctx, server_hostname=host if secure else None)
+        try:
+            writer.write(f"{method} {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                         f"User-Agent: health-dashboard\r\nConnection: close\r\n\r\n".encode())
+            await writer.drain()
+            status_line = await reader.readline()
+        finally:
+            writer.close()
+        fields = status_line.split()
+        if len(fields) < 2 or not fields[1].isdigit():
+            raise ValueError(f"bad status line {status_line[:40]!r}")
+        return int(fields[1])
+
+    start = time.monotonic()
+    status = await asyncio.wait_for(exchange(), timeout)
+    return status, (time.monotonic() - start) * 1000
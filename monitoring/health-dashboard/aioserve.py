@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Asyncio mode for the Health Dashboard (app.py --async).
+One event loop runs every check loop and serves HTTP. Every built-in check
+type has a coroutine version (app.ASYNC_CHECK_TYPES) and runs as a task, as
+do `async def` plugins; plain plugins still go to the worker pool and are
+awaited without blocking the loop. Results are published (event log,
+history, metrics) on a separate thread. The /health probes run on the loop
+as well, in a task of their own. /, /api, /health, /metrics and the SSE
+stream are served natively from the cached snapshot, so idle SSE clients
+cost a task and a small buffer each rather than a thread; every other route
+is handed to the Flask app on a small executor. Uses uvloop when it is
+installed.
+"""
+
+import asyncio
+import collections
+import io
+import queue
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote
+
+import app
+
+try:
+    import uvloop
+    HAVE_UVLOOP = True
+except ImportError:
+    HAVE_UVLOOP = False
+
+WSGI_WORKERS = 4          # threads for routes served by the Flask app
+KEEPALIVE_TIMEOUT = 75    # seconds an idle keep-alive connection is held open
+MAX_HEADERS = 100
+MAX_BODY = 1 << 20
+
+# app.store_result() writes the event log to disk, so results are published
+# off the loop, one at a time in the order the checks finished
+_store = ThreadPoolExecutor(max_workers=1, thread_name_prefix="store")
+
+
+# ---------------------------------------------------------------------------
+# Check scheduling
+# ---------------------------------------------------------------------------
+
+def coroutine_type(kind):
+    """The coroutine implementation of a check type, or None to use the pool."""
+    fn = app.ASYNC_CHECK_TYPES.get(kind)
+    if fn is None and ":" in kind:
+        plugin = app.resolve_type(kind)
+        if asyncio.iscoroutinefunction(plugin):
+            fn = plugin
+    return fn
+
+
+async def run_check(name):
+    """app.run_check() for the event loop: same timeout, stamping and timings."""
+    spec = app.CHECKS.get(name)
+    if spec is None:
+        return app.await_check(name, None)
+    start = time.monotonic()
+    try:
+        fn = coroutine_type(spec["type"])
+    except Exception as e:
+        return app.stamp(app.err(f"Check crashed: {e}"), start)
+    if fn is None:
+        entry = app.start_check(name)
+        if entry is not None:
+            remaining = entry["start"] + spec["timeout"] - time.monotonic()
+            await asyncio.wait({asyncio.wrap_future(entry["future"])}, timeout=max(remaining, 0))
+        # Done or past its deadline, so this no longer blocks
+        return app.await_check(name, entry)
+
+    crashed = False
+    try:
+        result = dict(await asyncio.wait_for(fn(**spec["options"]), spec["timeout"]))
+    except asyncio.TimeoutError:
+        result = app.err(f"Check timed out after {spec['timeout']}s")
+    except Exception as e:
+        crashed = True
+        result = app.err(f"Check crashed: {e}")
+    elapsed = time.monotonic() - start
+    app._check_timings.record(name, elapsed, crashed=crashed,
+                              overran=elapsed >= spec["timeout"])
+    return app.stamp(result, start)
+
+
+async def run_all_checks():
+    """Run every check at once; the asyncio counterpart of app.run_all_checks()."""
+    names = list(app.CHECKS)
+    results = dict(zip(names, await asyncio.gather(*(run_check(n) for n in names))))
+    results["checked_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    return results
+
+
+async def check_loop(name):
+    """app.check_loop() as a task; cancelling the task stops it (and kills its commands)."""
+    spec = app.CHECKS.get(name)
+    if spec is None:
+        return
+    await asyncio.sleep(random.uniform(0, spec["jitter"]))
+    while True:
+        spec = app.CHECKS.get(name)
+        if spec is None:
+            return
+        try:
+            result = await run_check(name)
+            await asyncio.get_running_loop().run_in_executor(_store, app.store_result,
+                                                             name, result)
+        except Exception as e:
+            print(f"[sched] {name}: cycle failed: {e!r}", flush=True)
+        await asyncio.sleep(spec["interval"] + random.uniform(0, spec["jitter"]))
+
+
+class LoopHandle:
+    """Stop handle for a check loop task, usable from any thread like app's Events."""
+
+    def __init__(self, future):
+        self.future = future
+
+    def set(self):
+        self.future.cancel()
+
+
+def loop_starter(loop):
+    """A starter for app.background_refresher() that runs check loops on `loop`."""
+    return lambda name: LoopHandle(asyncio.run_coroutine_threadsafe(check_loop(name), loop))
+
+
+# ---------------------------------------------------------------------------
+# /health probes
+# ---------------------------------------------------------------------------
+
+_health_runs = {}   # probe name -> task of its latest run (a hung one isn't restarted)
+
+
+async def health_probe(probe):
+    """One /health probe: its coroutine type, or app's health pool for plain plugins."""
+    fn = coroutine_type(probe["type"])
+    if fn is None:
+        return await asyncio.get_running_loop().run_in_executor(app._health_pool, probe["fn"])
+    return await fn(**probe["options"])
+
+
+async def health_cycle():
+    """app.health_cycle() on the loop: every probe at once, bounded by HEALTH["timeout"]."""
+    spec = app.HEALTH
+    start = time.monotonic()
+    for name in set(_health_runs) - set(spec["checks"]):
+        del _health_runs[name]   # probe dropped by a config reload
+    runs = {}
+    for name, probe in spec["checks"].items():
+        task = _health_runs.get(name)
+        if task is None or task.done():
+            task = _health_runs[name] = asyncio.ensure_future(health_probe(probe))
+        runs[name] = task
+    await asyncio.wait(set(runs.values()), timeout=spec["timeout"])
+    statuses = {}
+    for name, task in runs.items():
+        try:
+            statuses[name] = task.result()["status"] if task.done() else "error"
+        except Exception:
+            statuses[name] = "error"
+        app._check_timings.record(f"health:{name}", time.monotonic() - start,
+                                  overran=not task.done())
+    app.publish_health(spec, statuses)
+
+
+async def health_loop():
+    """app.health_loop() as a task."""
+    while True:
+        started = time.monotonic()
+        try:
+            await health_cycle()
+        except Exception as e:
+            print(f"[health] cycle failed: {e}", flush=True)
+        await asyncio.sleep(max(app.HEALTH["interval"] - (time.monotonic() - started), 0))
+
+
+def health_starter(loop):
+    """A health_starter for app.background_refresher() that runs the probes on `loop`."""
+    return lambda: asyncio.run_coroutine_threadsafe(health_loop(), loop)
+
+
+# ---------------------------------------------------------------------------
+# Server-Sent Events
+# ---------------------------------------------------------------------------
+
+class AsyncSubscriber:
+    """Stands in for a subscriber queue.Queue so app.broadcast() can feed a task.
+
+    put_nowait()/put() are called from check threads (or the loop itself)
+    under app._subscribers_lock; get() is awaited by the stream.
+    """
+
+    def __init__(self, loop, maxsize):
+        self._loop = loop
+        self._maxsize = maxsize
+        self._items = collections.deque()
+        self._ready = asyncio.Event()
+
+    def put_nowait(self, item):
+        if len(self._items) >= self._maxsize:
+            raise queue.Full
+        self.put(item)
+
+    def put(self, item):
+        self._items.append(item)
+        self._loop.call_soon_threadsafe(self._ready.set)
+
+    async def get(self, timeout):
+        """Next event; raises asyncio.TimeoutError after `timeout` idle seconds."""
+        while not self._items:
+            self._ready.clear()
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        return self._items.popleft()
+
+
+async def stream(reader, writer, headers, query):
+    """/api/stream: the same events as the Flask route, on a task instead of a thread.
+
+    A client that hangs up is dropped at once (its read hits EOF) instead
+    of at the next keepalive.
+    """
+    seen = headers.get("last-event-id") or parse_qs(query).get("version", [None])[0]
+    sub = AsyncSubscriber(asyncio.get_running_loop(), app.SSE_QUEUE_MAX)
+    catch_up = app.catch_up_events(seen)
+    with app._subscribers_lock:
+        app._subscribers.add(sub)
+    gone = asyncio.ensure_future(reader.read())
+    try:
+        writer.write(head("200 OK", [("Content-Type", "text/event-stream; charset=utf-8"),
+                                     ("Cache-Control", "no-cache"),
+                                     ("X-Accel-Buffering", "no"),
+                                     ("Connection", "close")]))
+        writer.write("".join(["retry: 5000\n\n"] + catch_up).encode())
+        await writer.drain()
+        while True:
+            getter = asyncio.ensure_future(sub.get(app.SSE_KEEPALIVE))
+            await asyncio.wait({getter, gone}, return_when=asyncio.FIRST_COMPLETED)
+            if gone.done():
+                getter.cancel()
+                return
+            try:
+                event = getter.result()
+            except asyncio.TimeoutError:
+                event = ": keepalive\n\n"
+            if event is None:
+                return
+            writer.write(event.encode())
+            await writer.drain()
+    finally:
+        gone.cancel()
+        with app._subscribers_lock:
+            app._subscribers.discard(sub)
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+def head(status, headers):
+    lines = [f"HTTP/1.1 {status}", "Server: health-dashboard"]
+    lines += [f"{k}: {v}" for k, v in headers]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def status_line(code):
+    return f"{code} {HTTPStatus(code).phrase}"
+
+
+class Unsupported(ValueError):
+    """Request framing this server doesn't implement: answered 501, not 400."""
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    tags = [t.strip().removeprefix("W/").strip('"') for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def cached(kind, build, mimetype, headers):
+    """app.cached_response() without Flask: ETag/304, lazy gzip, one render per version."""
+    entry = app.cached_entry(kind, build)
+    out = [("ETag", f'"{entry["etag"]}"'), ("Cache-Control", "no-cache"),
+           ("Vary", "Accept-Encoding")]
+    if etag_matches(headers.get("if-none-match"), entry["etag"]):
+        return 304, out, b""
+    compressed = app.gzip_body(entry, headers.get("accept-encoding", ""))
+    out.append(("Content-Type", f"{mimetype}; charset=utf-8"))
+    if compressed is not None:
+        return 200, out + [("Content-Encoding", "gzip")], compressed
+    return 200, out, entry["body"]
+
+
+def route_page(headers):
+    return cached("page", app.render_page, "text/html", headers)
+
+
+def route_api(headers):
+    return cached("api", app.render_api, "application/json", headers)
+
+
+def route_health(headers):
+    code, body = app.health_status()
+    return code, [("Content-Type", "application/json")], body
+
+
+def route_metrics(headers):
+    return 200, [("Content-Type", "text/plain; version=0.0.4; charset=utf-8")], \
+        app._metrics_text.encode()
+
+
+ROUTES = {"/": route_page, "/api": route_api, "/health": route_health, "/metrics": route_metrics}
+
+
+def call_wsgi(method, path, query, version, headers, body, server, peer):
+    """Run one request through the Flask app (on an executor thread)."""
+    environ = {
+        "REQUEST_METHOD": method, "SCRIPT_NAME": "",
+        "PATH_INFO": unquote(path, encoding="latin-1"), "QUERY_STRING": query,
+        "SERVER_NAME": str(server[0]), "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": version, "REMOTE_ADDR": str(peer[0]) if peer else "",
+        "CONTENT_TYPE": headers.get("content-type", ""),
+        "CONTENT_LENGTH": str(len(body)) if body else "",
+        "wsgi.version": (1, 0), "wsgi.url_scheme": "http", "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr, "wsgi.multithread": True, "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for key, value in headers.items():
+        if key not in ("content-type", "content-length"):
+            environ["HTTP_" + key.upper().replace("-", "_")] = value
+    started = {}
+
+    def start_response(status, response_headers, exc_info=None):
+        started["status"], started["headers"] = status, response_headers
+
+    result = app.app.wsgi_app(environ, start_response)
+    try:
+        payload = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    out = [(k, v) for k, v in started["headers"] if k.lower() != "content-length"]
+    return started["status"], out, payload
+
+
+async def read_request(reader):
+    """(method, target, version, headers, body), or None when the client has gone."""
+    try:
+        line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+    except asyncio.TimeoutError:
+        return None
+    if not line.strip():
+        return None
+    parts = line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise ValueError("bad request line")
+    headers = {}
+    while True:
+        raw = await reader.readline()
+        if raw in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise ValueError("too many headers")
+        key, _, value = raw.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    # A chunked (or otherwise transfer-coded) body would be misread as empty
+    if headers.get("transfer-encoding"):
+        raise Unsupported("transfer-encoding")
+    length = int(headers.get("content-length") or 0)
+    if length < 0 or length > MAX_BODY:
+        raise ValueError("bad content length")
+    body = await reader.readexactly(length) if length else b""
+    return parts[0].upper(), parts[1], parts[2], headers, body
+
+
+async def handle(reader, writer):
+    """One client connection: HTTP/1.1 with keep-alive, requests answered in order."""
+    loop = asyncio.get_running_loop()
+    server = writer.get_extra_info("sockname") or ("", 0)
+    peer = writer.get_extra_info("peername")
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except ValueError as e:
+                code = 501 if isinstance(e, Unsupported) else 400
+                writer.write(head(status_line(code), [("Content-Length", "0"),
+                                                      ("Connection", "close")]))
+                break
+            if request is None:
+                break
+            method, target, version, headers, body = request
+            path, _, query = target.partition("?")
+            conn = headers.get("connection", "").lower()
+            keep = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+
+            if path == "/api/stream" and method == "GET":
+                await stream(reader, writer, headers, query)
+                break
+            route = ROUTES.get(path) if method in ("GET", "HEAD") else None
+            if route is not None:
+                code, out, payload = route(headers)
+                status = status_line(code)
+            else:
+                status, out, payload = await loop.run_in_executor(
+                    None, call_wsgi, method, path, query, version, headers, body, server, peer)
+            out = out + [("Content-Length", str(len(payload))),
+                         ("Connection", "keep-alive" if keep else "close")]
+            writer.write(head(status, out))
+            if method != "HEAD" and payload:
+                writer.write(payload)
+            await writer.drain()
+            if not keep:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def new_loop():
+    loop = uvloop.new_event_loop() if HAVE_UVLOOP else asyncio.new_event_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=WSGI_WORKERS,
+                                                 thread_name_prefix="wsgi"))
+    return loop
+
+
+async def start_server(host, port):
+    return await asyncio.start_server(handle, host, port, reuse_address=True)
+
+
+def serve(host="0.0.0.0", port=8088):
+    """Run the check loops and the HTTP server on one event loop until killed."""
+    loop = new_loop()
+    asyncio.set_event_loop(loop)
+    app.background_refresher(starter=loop_starter(loop), health_starter=health_starter(loop))
+    loop.run_until_complete(start_server(host, port))
+    print(f"[async] serving on {host}:{port} ({'uvloop' if HAVE_UVLOOP else 'asyncio'}, "
+          f"{len(app.ASYNC_CHECK_TYPES)} coroutine check types)", flush=True)
+    loop.run_forever()
@@ -2,28 +2,56 @@
 """
 SmartHome Health Dashboard
 Functional health checks for all services on the reTerminal.
-Port: 8088  — Auto-refreshes every 30s
+Port: 8088  — Cards update live via Server-Sent Events
 """
 
+import asyncio
 import subprocess
+import signal
+import gzip
+import functools
+import importlib
+import inspect
 import json
+import queue
 import time
 import socket
 import threading
 import re
 import os
+import random
+import sys
+from collections import namedtuple
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime
 import requests
-import psutil
-from flask import Flask, jsonify, render_template_string
+import urllib3
+from flask import Flask, Response, jsonify, request
+
+import aioprobe
+import config
+import dnsprobe
+import docker_api
+import eventlog
+import exitip
+import ftlstats
+import history
+import influxwriter
+import metrics
+import netprobe
+import profiler
+import reachprobe
 
 app = Flask(__name__)
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)   # Orbi UI is self-signed
 
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
+# Site settings below are defaults; checks.json overrides them (see config.py)
 APPLE_TV_IP = "192.168.1.23"
 EXPECTED_DNS_SERVERS = ["185.37.37.37", "185.37.39.39"]   # Unlocator SmartDNS
+DNS_TEST_DOMAINS = ["google.com", "cloudflare.com", "amazon.com"]  # as pihole-watchdog.sh
 EXPECTED_CONTAINERS = [
     "homeassistant", "hassio_supervisor", "hassio_multicast",
     "hassio_audio", "hassio_dns", "hassio_cli", "hassio_observer",
@@ -34,35 +62,166 @@ ORBI_DEVICES = {
     "192.168.1.2": "Orbi Satellite 1",
     "192.168.1.3": "Orbi Satellite 2",
 }
+ORBI_WEB_URL = "https://192.168.1.1"
+INFLUX_URL = ""   # e.g. http://localhost:8086/write?db=smarthome to export results; empty = off
+# Pi-hole's long-term query database (~/pihole-docker next to ~/health-dashboard)
+PIHOLE_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "pihole-docker", "etc-pihole", "pihole-FTL.db")
+SETTING_NAMES = ("APPLE_TV_IP", "EXPECTED_DNS_SERVERS", "DNS_TEST_DOMAINS",
+                 "EXPECTED_CONTAINERS", "ORBI_DEVICES", "ORBI_WEB_URL", "INFLUX_URL",
+                 "PIHOLE_DB")
+SETTING_DEFAULTS = {n.lower(): globals()[n] for n in SETTING_NAMES}
+# Checks read the site settings from SETTINGS, which apply_config replaces
+# whole. A check takes it once per run, so a reload mid-run can't hand it a
+# mix of old and new values.
+Settings = namedtuple("Settings", SETTING_DEFAULTS)
+SETTINGS = Settings(**SETTING_DEFAULTS)
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "checks.json")
+CONFIG_POLL = 2   # seconds between checks.json mtime polls
+DOCKER_EVENTS = True   # follow the Engine /events stream instead of polling container state
+REACH_WINDOW = 30   # probes kept per device for RTT/loss/jitter
+HISTORY_RETENTION = 24 * 3600   # seconds of per-check history kept in memory
 
 # ---------------------------------------------------------------------------
 # Background cache
 # ---------------------------------------------------------------------------
-_results = {}
-_results_lock = threading.Lock()
-_last_run = 0
-CACHE_TTL = 30   # seconds (slow checks like exit-IP are sub-cached internally)
-
-# Exit-IP cache (these are slow external calls)
-_exit_ip_cache = {"tun0": None, "tun0_ts": 0, "tun1": None, "tun1_ts": 0,
-                  "proxy": None, "proxy_ts": 0}
+# _results is an immutable snapshot: writers build a new dict and swap the
+# reference (atomic in CPython), so readers never lock or copy. `version`
+# increases by one with every published result.
+_results = {"version": 0, "checked_at": None}
+_results_lock = threading.Lock()   # serialises writers only
+
+# /api/stream subscribers: one bounded queue per connected browser
+_subscribers = set()
+_subscribers_lock = threading.Lock()
+SSE_KEEPALIVE = 25   # seconds between comment pings on an idle stream
+SSE_QUEUE_MAX = 64   # events buffered per client before it is dropped as too slow
+
+# Per-check ring buffers of status, duration and result["metrics"]
+_history = history.HistoryStore(retention=HISTORY_RETENTION)
+
+# ok/warn/error transitions per check, kept on disk for /api/events
+EVENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "events")
+_events = eventlog.EventLog(EVENTS_DIR)
+
+# Query analytics read incrementally from the pihole_db setting (see ftl_stats())
+_ftl = None
+_ftl_lock = threading.Lock()
+
+# Exit-IP lookups (slow external calls; resolver below caches per route)
+EXIT_IP_URL = "https://ipinfo.io"
 EXIT_IP_TTL = 90   # seconds
 
+# Prometheus counters/histograms; /metrics text is rebuilt once per published result
+CHECK_DURATION_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_check_seconds = metrics.Histogram("healthdash_check_duration_seconds",
+                                   "Wall time of one check run.", CHECK_DURATION_BUCKETS,
+                                   labels=("check",))
+_transitions = metrics.Counter("healthdash_check_transitions_total",
+                               "Check status changes recorded in the event log.",
+                               labels=("check", "status"))
+_subprocesses = metrics.Counter("healthdash_subprocess_total",
+                                "Commands forked by run(), by outcome.", labels=("result",))
+_probes = metrics.Counter("healthdash_probes_total",
+                          "In-process probes (dns, icmp, tcp, docker_api), by outcome.",
+                          labels=("kind", "result"))
+_metrics_text = ""
+_metrics_lock = threading.Lock()
+
+# Rolling p50/p95/max per check and per forked command, plus the on-demand
+# stack sampler behind /api/debug/profile
+PROFILE_WINDOW = 200   # most recent durations kept per key
+_check_timings = profiler.Timings(window=PROFILE_WINDOW)
+_run_timings = profiler.Timings(window=PROFILE_WINDOW)
+_sampler = profiler.Sampler(prefix="check-")
+
+# Optional export of every result to InfluxDB as `health_check` points
+# (batched, spooled to disk while InfluxDB is down); started by apply_config
+INFLUX_SPOOL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "influx.spool")
+_influx = None
+
+# Docker Engine API (persistent unix-socket connections; watcher started in __main__)
+_docker = docker_api.DockerClient()
+_docker_watch = None
+
+# Per-device RTT/loss/jitter over the last REACH_WINDOW probes
+_reach = reachprobe.ReachTracker(window=REACH_WINDOW, count=2, timeout=1.0)
+
 
 # ---------------------------------------------------------------------------
 # Helper utilities
 # ---------------------------------------------------------------------------
 
 def run(cmd, timeout=10):
-    """Run a shell command, return (stdout, returncode)."""
+    """Run a shell command, return (stdout, returncode).
+
+    The command gets its own process group so a timeout (or the owning
+    check being cancelled) kills the whole tree, not just the shell.
+    """
+    prog = os.path.basename(cmd.split()[0]) if cmd.strip() else "?"
+    start = time.monotonic()
+    owner = getattr(_check_context, "run", None)
+    try:
+        proc = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, text=True, start_new_session=True)
+    except Exception as e:
+        _subprocesses.inc(result="error")
+        _run_timings.record(prog, time.monotonic() - start, error=True)
+        return str(e), 1
+    if owner is not None:
+        with _in_flight_lock:
+            owner["procs"].add(proc)
+            if owner["cancelled"]:
+                kill_tree(proc)
     try:
-        r = subprocess.run(cmd, shell=True, capture_output=True,
-                           text=True, timeout=timeout)
-        return r.stdout.strip(), r.returncode
+        out, _ = proc.communicate(timeout=timeout)
     except subprocess.TimeoutExpired:
+        kill_tree(proc)
+        proc.communicate()
+        _subprocesses.inc(result="timeout")
+        _run_timings.record(prog, time.monotonic() - start, timeout=True)
         return "", 124
-    except Exception as e:
+    finally:
+        if owner is not None:
+            with _in_flight_lock:
+                owner["procs"].discard(proc)
+    if owner is not None and owner["cancelled"]:
+        _subprocesses.inc(result="timeout")
+        _run_timings.record(prog, time.monotonic() - start, timeout=True)
+        return "", 124
+    _subprocesses.inc(result="ok" if proc.returncode == 0 else "error")
+    _run_timings.record(prog, time.monotonic() - start, error=proc.returncode != 0)
+    return out.strip(), proc.returncode
+
+
+def kill_tree(proc):
+    """SIGKILL a run() child's process group (the shell and everything it spawned)."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def run_async(cmd, timeout=10):
+    """run() for coroutine checks: same counters and timings, no thread."""
+    prog = os.path.basename(cmd.split()[0]) if cmd.strip() else "?"
+    start = time.monotonic()
+    try:
+        out, rc = await aioprobe.run(cmd, timeout=timeout)
+    except OSError as e:
+        _subprocesses.inc(result="error")
+        _run_timings.record(prog, time.monotonic() - start, error=True)
         return str(e), 1
+    outcome = "timeout" if rc == 124 else ("ok" if rc == 0 else "error")
+    _subprocesses.inc(result=outcome)
+    _run_timings.record(prog, time.monotonic() - start, timeout=rc == 124,
+                        error=outcome == "error")
+    return out, rc
+
+
+async def run_blocking(fn, *args):
+    """Call a blocking function from a coroutine check, on the I/O pool."""
+    return await asyncio.get_running_loop().run_in_executor(_io_pool, fn, *args)
 
 
 def ok(msg="OK"):
@@ -77,76 +236,160 @@ def err(msg):
     return {"status": "error", "msg": msg}
 
 
-def get_exit_ip(interface=None, proxy=None, ttl=EXIT_IP_TTL):
-    """Fetch exit IP from ipinfo.io with per-key caching."""
-    key = proxy if proxy else (interface or "default")
-    now = time.time()
-    cached_ip = _exit_ip_cache.get(key)
-    cached_ts = _exit_ip_cache.get(key + "_ts", 0)
-    if cached_ip and now - cached_ts < ttl:
-        return cached_ip
+def docker_states():
+    """All container states: pushed by the events watcher, else one API call."""
+    states = _docker_watch.states() if _docker_watch else None
+    if states is not None:
+        return states
+    try:
+        states = _docker.container_states(all=True)
+    except docker_api.DockerError:
+        _probes.inc(kind="docker_api", result="fail")
+        raise
+    _probes.inc(kind="docker_api", result="ok")
+    return states
+
+
+async def docker_states_async():
+    """docker_states() for coroutine checks; only an API call goes to the I/O pool."""
+    states = _docker_watch.states() if _docker_watch else None
+    if states is not None:
+        return states
+    return await run_blocking(docker_states)
 
+
+def docker_exec(container, cmd, timeout=10):
+    """Run a command in a container via the Engine API; returns (stdout, rc)."""
     try:
-        cmd = "curl -s --max-time 12 https://ipinfo.io"
-        if interface:
-            cmd += f" --interface {interface}"
-        if proxy:
-            cmd += f" --proxy socks5h://localhost:1080"
-        out, rc = run(cmd, timeout=15)
-        if rc == 0 and out:
-            data = json.loads(out)
-            result = {
-                "ip": data.get("ip", "?"),
-                "country": data.get("country", "?"),
-                "city": data.get("city", "?"),
-                "org": data.get("org", "?"),
-            }
-            _exit_ip_cache[key] = result
-            _exit_ip_cache[key + "_ts"] = now
-            return result
-    except Exception:
-        pass
-    return None
+        out, rc = _docker.exec(container, cmd, timeout=timeout)
+        _probes.inc(kind="docker_api", result="ok")
+        return out.strip(), rc
+    except docker_api.DockerError as e:
+        _probes.inc(kind="docker_api", result="timeout" if e.status == 124 else "fail")
+        return str(e), e.status or 1
+
+
+def count_dns(summary):
+    """Add one probe count per DNS query in a dnsprobe.probe_servers() summary."""
+    for entry in summary.values():
+        for r in entry["results"]:
+            result = "ok" if r["ok"] else ("timeout" if r["error"] == "timeout" else "fail")
+            _probes.inc(kind="dns", result=result)
+
+
+def curl_exit_ip(interface=None, proxy=None):
+    """Exit IP via curl; only used for SOCKS when PySocks isn't installed."""
+    cmd = f"curl -s --max-time 12 {EXIT_IP_URL}"
+    if interface:
+        cmd += f" --interface {interface}"
+    if proxy:
+        cmd += f" --proxy {proxy}"
+    out, rc = run(cmd, timeout=15)
+    if rc != 0 or not out:
+        return None
+    data = json.loads(out)
+    return {
+        "ip": data.get("ip", "?"),
+        "country": data.get("country", "?"),
+        "city": data.get("city", "?"),
+        "org": data.get("org", "?"),
+    }
+
+
+_exit_ip = exitip.ExitIPResolver(url=EXIT_IP_URL, ttl=EXIT_IP_TTL, fallback=curl_exit_ip)
+
+
+def get_exit_ip(interface=None, proxy=None, ttl=EXIT_IP_TTL):
+    """Exit IP for a route: cached, single-flight, last-known-good on failure."""
+    return _exit_ip.lookup(interface=interface, proxy=proxy, ttl=ttl)
+
+
+async def get_exit_ip_async(interface=None, proxy=None, ttl=EXIT_IP_TTL):
+    """get_exit_ip() for coroutine checks: a fresh cached answer straight away,
+    otherwise the lookup runs on the I/O pool."""
+    return (_exit_ip.cached(interface=interface, proxy=proxy, ttl=ttl)
+            or await run_blocking(get_exit_ip, interface, proxy, ttl))
+
+
+def last_known(ip_info):
+    """Describe a stale exit-IP answer for the details panel."""
+    return f"unavailable (last {ip_info['ip']} {ip_info['country']}, {ip_info['age']}s ago)"
+
+
+# ---------------------------------------------------------------------------
+# Check registry
+# ---------------------------------------------------------------------------
+# Check types by name. A config entry picks one with "type" (default: its own
+# name). A "module:function" type is imported on its first run, so plugin
+# checks and whatever they import cost nothing until a config uses them.
+CHECK_TYPES = {}
+
+
+def check_type(name):
+    """Register a check function under a type name."""
+    def register(fn):
+        CHECK_TYPES[name] = fn
+        return fn
+    return register
+
+
+# Coroutine versions of check types, used instead of the thread-pool version
+# when the dashboard runs in asyncio mode (see aioserve.py)
+ASYNC_CHECK_TYPES = {}
+
+
+def async_check_type(name):
+    """Register a coroutine implementation of a check type for asyncio mode."""
+    def register(fn):
+        ASYNC_CHECK_TYPES[name] = fn
+        return fn
+    return register
+
+
+def resolve_type(kind):
+    """Return the function for a check type, importing plugin types on first use."""
+    fn = CHECK_TYPES.get(kind)
+    if fn is None:
+        module, _, attr = kind.partition(":")
+        fn = CHECK_TYPES[kind] = getattr(importlib.import_module(module), attr)
+    return fn
 
 
 # ---------------------------------------------------------------------------
 # Individual checks
 # ---------------------------------------------------------------------------
 
+@check_type("vpn_main")
 def check_vpn_main():
     """Main VPN: tun0, routes pinned to tun0, US exit IP."""
     issues = []
     details = {}
 
-    # tun0 interface
-    out, _ = run("ip -4 addr show tun0 2>/dev/null")
-    ip_match = re.search(r"inet (\S+) peer (\S+)", out)
-    if not ip_match:
+    # tun0 interface and the split routes pinned to it
+    if not tunnel_state("tun0", details, issues):
         return err("tun0 interface is DOWN or has no IP")
-    details["tun0_ip"] = ip_match.group(1)
-    details["tun0_peer"] = ip_match.group(2).rstrip("/32")
+    return vpn_main_result(details, issues, get_exit_ip(interface=None))
 
-    # Routes must be on tun0
-    route_out, _ = run("ip route show | grep -E '0\\.0\\.0\\.0/1|128\\.0\\.0\\.0/1'")
-    routes = [l.strip() for l in route_out.splitlines() if l.strip()]
-    details["routes"] = routes or ["(none)"]
 
-    bad_routes = [r for r in routes if "tun0" not in r]
-    if not routes:
-        issues.append("Split routes (0/1, 128/1) missing — all traffic may leak to ISP")
-    elif bad_routes:
-        issues.append(f"Routes NOT on tun0: {'; '.join(bad_routes)}")
+@async_check_type("vpn_main")
+async def check_vpn_main_async():
+    issues = []
+    details = {}
+    if not tunnel_state("tun0", details, issues):
+        return err("tun0 interface is DOWN or has no IP")
+    return vpn_main_result(details, issues, await get_exit_ip_async(interface=None))
+
 
+def vpn_main_result(details, issues, ip_info):
     # Exit IP (US expected)
-    ip_info = get_exit_ip(interface=None)
-    if ip_info:
+    if ip_info and not ip_info["stale"]:
         details["exit_ip"] = ip_info["ip"]
         details["exit_country"] = ip_info["country"]
         details["exit_city"] = ip_info["city"]
         if ip_info["country"] not in ("US", "CA", "GB", "NL", "SE", "DE"):
             issues.append(f"Exit IP country unexpected: {ip_info['country']} {ip_info['city']}")
     else:
-        details["exit_ip"] = "unavailable"
+        details["exit_ip"] = last_known(ip_info) if ip_info else "unavailable"
         issues.append("Could not fetch exit IP")
 
     if issues:
@@ -154,77 +397,147 @@ def check_vpn_main():
     return {"status": "ok", "msg": f"US exit {ip_info['ip']} via tun0", "details": details}
 
 
+def tunnel_state(interface, details, issues):
+    """Interface address/peer and 0/1 + 128/1 routes into `details`/`issues`; False if down."""
+    addr = next((a for a in netprobe.ipv4_addrs(interface) if a["peer"]), None)
+    if not addr:
+        return False
+    details[f"{interface}_ip"] = addr["local"]
+    details[f"{interface}_peer"] = addr["peer"]
+
+    split = [r for r in netprobe.ipv4_routes("main")
+             if r["dst_len"] == 1 and r["dst"] in ("0.0.0.0", "128.0.0.0")]
+    routes = [netprobe.format_route(r) for r in split]
+    details["routes"] = routes or ["(none)"]
+
+    bad_routes = [netprobe.format_route(r) for r in split if r["dev"] != interface]
+    if not routes:
+        issues.append("Split routes (0/1, 128/1) missing — all traffic may leak to ISP")
+    elif bad_routes:
+        issues.append(f"Routes NOT on {interface}: {'; '.join(bad_routes)}")
+    return True
+
+
+@check_type("vpn_link")
+def check_vpn_link(interface="tun0"):
+    """VPN tunnel up with the split routes on it; netlink only, no exit-IP lookup."""
+    details, issues = {}, []
+    if not tunnel_state(interface, details, issues):
+        return err(f"{interface} interface is DOWN or has no IP")
+    if issues:
+        return {"status": "error", "msg": "; ".join(issues), "details": details}
+    return {"status": "ok", "msg": f"{interface} up, routes pinned", "details": details}
+
+
+@async_check_type("vpn_link")
+async def check_vpn_link_async(interface="tun0"):
+    return check_vpn_link(interface)   # two netlink dumps: nothing to wait on
+
+
+@check_type("vpn_uk")
 def check_vpn_uk():
     """UK VPN: tun1 up, UK exit IP, Apple TV policy routing in place."""
+    settings = SETTINGS
     issues = []
     details = {}
+    if not uk_routing_state(settings, details, issues):
+        return err("tun1 interface is DOWN or has no IP")
+    return vpn_uk_result(settings, details, issues, get_exit_ip(interface="tun1"))
 
-    # tun1 interface
-    out, _ = run("ip -4 addr show tun1 2>/dev/null")
-    ip_match = re.search(r"inet (\S+) peer (\S+)", out)
-    if not ip_match:
+
+@async_check_type("vpn_uk")
+async def check_vpn_uk_async():
+    settings = SETTINGS
+    issues = []
+    details = {}
+    if not uk_routing_state(settings, details, issues):
         return err("tun1 interface is DOWN or has no IP")
-    details["tun1_ip"] = ip_match.group(1)
-    details["tun1_peer"] = ip_match.group(2).rstrip("/32")
+    return vpn_uk_result(settings, details, issues, await get_exit_ip_async(interface="tun1"))
+
+
+def uk_routing_state(settings, details, issues):
+    """tun1 address, the Apple TV rule and the ukvpn default route; False if tun1 is down."""
+    # tun1 interface
+    addr = next((a for a in netprobe.ipv4_addrs("tun1") if a["peer"]), None)
+    if not addr:
+        return False
+    details["tun1_ip"] = addr["local"]
+    details["tun1_peer"] = addr["peer"]
 
     # UK VPN table routing for Apple TV
-    rule_out, rc = run(f"ip rule show | grep '{APPLE_TV_IP}.*ukvpn'")
-    if rc != 0 or not rule_out.strip():
-        issues.append(f"Policy rule missing: {APPLE_TV_IP} → ukvpn table")
+    tables = netprobe.load_rt_tables()
+    ukvpn = tables.get("ukvpn")
+    rules = [netprobe.format_rule(r, tables) for r in netprobe.ipv4_rules()
+             if ukvpn is not None and r["table"] == ukvpn and r["src"] == settings.apple_tv_ip]
+    if not rules:
+        issues.append(f"Policy rule missing: {settings.apple_tv_ip} → ukvpn table")
     else:
-        details["appletv_rule"] = rule_out.strip()
+        details["appletv_rule"] = "\n".join(rules)
 
     # ukvpn table default route
-    route_out, _ = run("ip route show table ukvpn 2>/dev/null")
-    if "default" not in route_out:
+    defaults = [r for r in netprobe.ipv4_routes("ukvpn") if r["dst_len"] == 0]
+    if not defaults:
         issues.append("ukvpn table has no default route")
     else:
-        details["ukvpn_route"] = route_out.strip().splitlines()[0] if route_out else ""
+        details["ukvpn_route"] = netprobe.format_route(defaults[0])
+    return True
+
 
+def vpn_uk_result(settings, details, issues, ip_info):
     # UK exit IP via tun1
-    ip_info = get_exit_ip(interface="tun1")
-    if ip_info:
+    if ip_info and not ip_info["stale"]:
         details["exit_ip"] = ip_info["ip"]
         details["exit_country"] = ip_info["country"]
         details["exit_city"] = ip_info["city"]
         if ip_info["country"] != "GB":
             issues.append(f"Expected UK exit, got: {ip_info['country']} {ip_info['city']}")
     else:
-        details["exit_ip"] = "unavailable"
+        details["exit_ip"] = last_known(ip_info) if ip_info else "unavailable"
         issues.append("Could not fetch UK exit IP via tun1")
 
     if issues:
         return {"status": "error", "msg": "; ".join(issues), "details": details}
     return {"status": "ok",
-            "msg": f"UK exit {ip_info['ip']} via tun1 | {APPLE_TV_IP} → ukvpn",
+            "msg": f"UK exit {ip_info['ip']} via tun1 | {settings.apple_tv_ip} → ukvpn",
             "details": details}
 
 
+@check_type("proxy")
 def check_proxy():
     """SOCKS5 proxy: microsocks on port 1080, exit IP matches tun0."""
-    issues = []
-    details = {}
-
     # Is port 1080 listening?
-    port_out, _ = run("ss -tlnp | grep ':1080'")
-    if not port_out.strip():
+    if 1080 not in netprobe.listening_tcp_ports():
         return err("microsocks not listening on port 1080")
-    details["listening"] = "port 1080 open"
 
-    # Functional: curl through proxy
+    # Functional: curl through proxy, then compare with the tun0 exit IP
     ip_info = get_exit_ip(proxy="socks5h://localhost:1080")
-    if ip_info:
+    tun0_info = get_exit_ip() if ip_info and not ip_info["stale"] else None
+    return proxy_result(ip_info, tun0_info)
+
+
+@async_check_type("proxy")
+async def check_proxy_async():
+    if 1080 not in netprobe.listening_tcp_ports():
+        return err("microsocks not listening on port 1080")
+    ip_info = await get_exit_ip_async(proxy="socks5h://localhost:1080")
+    tun0_info = await get_exit_ip_async() if ip_info and not ip_info["stale"] else None
+    return proxy_result(ip_info, tun0_info)
+
+
+def proxy_result(ip_info, tun0_info):
+    issues = []
+    details = {"listening": "port 1080 open"}
+    if ip_info and not ip_info["stale"]:
         details["proxy_exit_ip"] = ip_info["ip"]
         details["proxy_country"] = ip_info["country"]
 
         # Should match tun0 exit IP
-        tun0_info = get_exit_ip()
-        if tun0_info and tun0_info["ip"] != ip_info["ip"]:
+        if tun0_info and not tun0_info["stale"] and tun0_info["ip"] != ip_info["ip"]:
             issues.append(
                 f"Proxy exit ({ip_info['ip']}) ≠ VPN exit ({tun0_info['ip']}) — routing mismatch"
             )
     else:
-        details["proxy_exit_ip"] = "unavailable"
+        details["proxy_exit_ip"] = last_known(ip_info) if ip_info else "unavailable"
         issues.append("curl through SOCKS5 proxy failed")
 
     if issues:
@@ -234,33 +547,96 @@ def check_proxy():
             "details": details}
 
 
+def ftl_stats(path):
+    """The FtlStats for `path`; a new one (rebuilt from scratch) if the setting changed."""
+    global _ftl
+    with _ftl_lock:
+        if _ftl is None or _ftl.path != path:
+            if _ftl is not None:
+                _ftl.close()
+            _ftl = ftlstats.FtlStats(path)
+        return _ftl
+
+
+@check_type("pihole")
 def check_pihole():
     """Pi-hole: running, DNS resolving, upstream DNS config."""
-    issues = []
-    details = {}
-
+    settings = SETTINGS
     # Container running
-    ps_out, _ = run("docker inspect --format '{{.State.Status}}' pihole 2>/dev/null")
-    if ps_out.strip() != "running":
+    try:
+        state = docker_states().get("pihole", {}).get("state")
+    except docker_api.DockerError:
+        state = None
+    if state != "running":
         return err("pihole container not running")
 
     # DNS resolution test
-    dig_out, rc = run("dig @127.0.0.1 google.com +short +time=3 +tries=1 2>/dev/null | head -1")
-    if rc != 0 or not dig_out.strip():
-        issues.append("DNS resolution via Pi-hole (localhost) failed")
+    summary = dnsprobe.probe_servers(["127.0.0.1"], settings.dns_test_domains, timeout=3)
+    return pihole_result(settings, summary, pihole_setup_vars(), pihole_stats(settings.pihole_db))
+
+
+@async_check_type("pihole")
+async def check_pihole_async():
+    settings = SETTINGS
+    try:
+        state = (await docker_states_async()).get("pihole", {}).get("state")
+    except docker_api.DockerError:
+        state = None
+    if state != "running":
+        return err("pihole container not running")
+    summary, setup_vars, stats = await asyncio.gather(
+        dnsprobe.probe_servers_async(["127.0.0.1"], settings.dns_test_domains, timeout=3),
+        run_blocking(pihole_setup_vars), run_blocking(pihole_stats, settings.pihole_db))
+    return pihole_result(settings, summary, setup_vars, stats)
+
+
+def pihole_setup_vars():
+    """Pi-hole's setupVars.conf, read in the container; empty if that fails."""
+    out, rc = docker_exec("pihole", ["cat", "/etc/pihole/setupVars.conf"])
+    return out if rc == 0 else ""
+
+
+def pihole_stats(path):
+    """(details, metrics) for the query stats, read incrementally from the FTL
+    database; only a note saying why if it can't be read."""
+    details, metrics = {}, {}
+    try:
+        ftl = ftl_stats(path)
+        ftl.refresh()
+        report = ftl.report(top=5)
+        details["queries_today"] = report["queries_today"]
+        details["blocked_today"] = report["blocked_today"]
+        details["domains_blocked"] = ftl.gravity_count() or "?"
+        details["blocked_24h"] = f"{report['blocked_pct']}% of {report['queries']}"
+        details["query_rate"] = f"{report['rate_per_min']}/min"
+        details["top_domains"] = [f"{d['domain']} ({d['count']})" for d in report["top_domains"]]
+        details["top_blocked"] = [f"{d['domain']} ({d['count']})" for d in report["top_blocked"]]
+        details["top_clients"] = [f"{c['client']} ({c['count']})" for c in report["top_clients"]]
+        metrics.update(queries_per_min=report["rate_per_min"], blocked_pct=report["blocked_pct"])
+    except ftlstats.FtlError as e:
+        details["query_stats"] = f"unavailable: {e}"
+    return details, metrics
+
+
+def pihole_result(settings, summary, setup_vars, stats):
+    issues = []
+    details = {}
+    count_dns(summary)
+    probe = summary["127.0.0.1"]
+    metrics = {"dns_us:127.0.0.1": probe["latency_us"]}
+    if not probe["up"]:
+        issues.append(f"DNS resolution via Pi-hole (localhost) failed "
+                      f"({probe['passed']}/{probe['total']} domains resolved)")
         details["dns_resolution"] = "FAILED"
     else:
-        details["dns_resolution"] = f"OK ({dig_out.strip()})"
+        details["dns_resolution"] = f"OK ({probe['answer']}, {probe['latency_us']} µs)"
 
     # Upstream DNS servers configured in Pi-hole
-    dns_conf, _ = run(
-        "docker exec pihole cat /etc/pihole/setupVars.conf 2>/dev/null | grep PIHOLE_DNS"
-    )
-    configured_dns = re.findall(r"PIHOLE_DNS_\d+=(\S+)", dns_conf)
+    configured_dns = re.findall(r"PIHOLE_DNS_\d+=(\S+)", setup_vars)
     details["upstream_dns"] = configured_dns
 
     # Check if Unlocator SmartDNS servers are in use
-    using_unlocator = any(d in EXPECTED_DNS_SERVERS for d in configured_dns)
+    using_unlocator = any(d in settings.expected_dns_servers for d in configured_dns)
     using_google = any(d in ("8.8.8.8", "8.8.4.4", "1.1.1.1") for d in configured_dns)
 
     if using_unlocator:
@@ -272,38 +648,46 @@ def check_pihole():
         )
         details["dns_note"] = "WARNING: Using Google DNS, not Unlocator SmartDNS"
 
-    # Stats
-    stats_out, _ = run("docker exec pihole pihole -c -j 2>/dev/null")
-    try:
-        stats = json.loads(stats_out)
-        details["queries_today"] = stats.get("dns_queries_today", "?")
-        details["blocked_today"] = stats.get("ads_blocked_today", "?")
-        details["domains_blocked"] = stats.get("domains_being_blocked", "?")
-    except Exception:
-        pass
+    details.update(stats[0])
+    metrics.update(stats[1])
 
     if issues:
-        return {"status": "warn", "msg": "; ".join(issues), "details": details}
+        return {"status": "warn", "msg": "; ".join(issues), "details": details,
+                "metrics": metrics}
     return {
         "status": "ok",
         "msg": (f"DNS OK | {details.get('queries_today','?')} queries today, "
                 f"{details.get('blocked_today','?')} blocked"),
         "details": details,
+        "metrics": metrics,
     }
 
 
+@check_type("docker")
 def check_docker():
     """All expected Docker containers running."""
-    out, _ = run("docker ps --format '{{.Names}}|{{.Status}}'")
-    running = {}
-    for line in out.splitlines():
-        parts = line.split("|", 1)
-        if len(parts) == 2:
-            running[parts[0]] = parts[1]
+    try:
+        states = docker_states()
+    except docker_api.DockerError as e:
+        return err(f"Docker Engine API unavailable: {e}")
+    return docker_result(SETTINGS.expected_containers, states)
+
+
+@async_check_type("docker")
+async def check_docker_async():
+    try:
+        states = await docker_states_async()
+    except docker_api.DockerError as e:
+        return err(f"Docker Engine API unavailable: {e}")
+    return docker_result(SETTINGS.expected_containers, states)
+
+
+def docker_result(expected, states):
+    running = {name: s["status"] for name, s in states.items()}
 
     issues = []
     container_statuses = {}
-    for name in EXPECTED_CONTAINERS:
+    for name in expected:
         status = running.get(name)
         if status is None:
             container_statuses[name] = "MISSING"
@@ -314,13 +698,14 @@ def check_docker():
         else:
             container_statuses[name] = status
 
-    extra = [n for n in running if n not in EXPECTED_CONTAINERS]
+    extra = [n for n, s in states.items()
+             if n not in expected and s["state"] == "running"]
     if extra:
         for n in extra:
             container_statuses[n] = running[n] + " (unexpected)"
 
-    total = len(EXPECTED_CONTAINERS)
-    ok_count = sum(1 for n in EXPECTED_CONTAINERS if running.get(n, "").startswith("Up"))
+    total = len(expected)
+    ok_count = sum(1 for n in expected if running.get(n, "").startswith("Up"))
 
     if issues:
         return {"status": "error",
@@ -330,9 +715,20 @@ def check_docker():
             "details": container_statuses}
 
 
+@check_type("systemd")
 def check_systemd():
     """No failed systemd units."""
     out, _ = run("systemctl --failed --no-legend 2>/dev/null")
+    return systemd_result(out)
+
+
+@async_check_type("systemd")
+async def check_systemd_async():
+    out, _ = await run_async("systemctl --failed --no-legend 2>/dev/null")
+    return systemd_result(out)
+
+
+def systemd_result(out):
     failed = [l.strip() for l in out.splitlines() if l.strip()]
     if failed:
         return {"status": "error",
@@ -341,33 +737,53 @@ def check_systemd():
     return {"status": "ok", "msg": "No failed systemd units", "details": {"failed": []}}
 
 
+@check_type("system")
 def check_system():
     """CPU temp, memory, disk usage."""
+    try:
+        temp_c, fallback = cpu_temp(), False
+    except Exception:
+        out, _ = run("cat /sys/class/thermal/thermal_zone0/temp 2>/dev/null")
+        temp_c, fallback = (int(out) / 1000 if out else None), True
+    return system_result(temp_c, fallback)
+
+
+@async_check_type("system")
+async def check_system_async():
+    try:
+        temp_c, fallback = cpu_temp(), False
+    except Exception:
+        out, _ = await run_async("cat /sys/class/thermal/thermal_zone0/temp 2>/dev/null")
+        temp_c, fallback = (int(out) / 1000 if out else None), True
+    return system_result(temp_c, fallback)
+
+
+def cpu_temp():
+    """The first non-zero psutil temperature sensor, or None; raises if psutil can't read them."""
+    import psutil   # only the system check needs it
+    for sensors in (psutil.sensors_temperatures() or {}).values():
+        for s in sensors:
+            if s.current:
+                return s.current
+    return None
+
+
+def system_result(temp_c, fallback=False):
+    """`fallback`: temp_c came from the thermal zone file, which only flags critical."""
     details = {}
     issues = []
+    metrics = {}
+
+    import psutil
 
     # CPU temperature
-    try:
-        temps = psutil.sensors_temperatures()
-        if temps:
-            for chip, sensors in temps.items():
-                for s in sensors:
-                    if s.current:
-                        details["cpu_temp"] = f"{s.current:.1f}°C"
-                        if s.current > 80:
-                            issues.append(f"CPU temp critical: {s.current:.1f}°C")
-                        elif s.current > 70:
-                            issues.append(f"CPU temp high: {s.current:.1f}°C")
-                        break
-                if "cpu_temp" in details:
-                    break
-    except Exception:
-        out, _ = run("cat /sys/class/thermal/thermal_zone0/temp 2>/dev/null")
-        if out:
-            temp_c = int(out) / 1000
-            details["cpu_temp"] = f"{temp_c:.1f}°C"
-            if temp_c > 80:
-                issues.append(f"CPU temp critical: {temp_c:.1f}°C")
+    if temp_c is not None:
+        details["cpu_temp"] = f"{temp_c:.1f}°C"
+        metrics["cpu_temp_c"] = temp_c
+        if temp_c > 80:
+            issues.append(f"CPU temp critical: {temp_c:.1f}°C")
+        elif temp_c > 70 and not fallback:
+            issues.append(f"CPU temp high: {temp_c:.1f}°C")
 
     # Memory
     mem = psutil.virtual_memory()
@@ -388,214 +804,698 @@ def check_system():
     # Load average
     load = os.getloadavg()
     details["load"] = f"{load[0]:.2f} {load[1]:.2f} {load[2]:.2f}"
+    metrics.update(mem_pct=mem.percent, disk_pct=disk.percent, load1=load[0])
 
     if issues:
         status = "error" if any("critical" in i for i in issues) else "warn"
-        return {"status": status, "msg": "; ".join(issues), "details": details}
+        return {"status": status, "msg": "; ".join(issues), "details": details,
+                "metrics": metrics}
     return {"status": "ok", "msg": f"Temp {details.get('cpu_temp','?')} | Mem {mem.percent:.0f}% | Disk {disk.percent:.0f}%",
-            "details": details}
+            "details": details, "metrics": metrics}
 
 
+@check_type("smartdns")
 def check_smartdns():
-    """Unlocator SmartDNS: directly query both servers to verify reachability."""
+    """Unlocator SmartDNS: query both servers at once to verify reachability."""
+    settings = SETTINGS
+    servers = smartdns_servers(settings)
+    return smartdns_result(servers, dnsprobe.probe_servers(
+        list(servers), settings.dns_test_domains, timeout=4))
+
+
+@async_check_type("smartdns")
+async def check_smartdns_async():
+    settings = SETTINGS
+    servers = smartdns_servers(settings)
+    return smartdns_result(servers, await dnsprobe.probe_servers_async(
+        list(servers), settings.dns_test_domains, timeout=4))
+
+
+def smartdns_servers(settings):
+    return {ip: (["primary", "secondary"][i] if i < 2 else f"server {i + 1}")
+            for i, ip in enumerate(settings.expected_dns_servers)}
+
+
+def smartdns_result(servers, probes):
+    count_dns(probes)
     issues = []
     details = {}
-    servers = {
-        "185.37.37.37": "primary",
-        "185.37.39.39": "secondary",
-    }
+    metrics = {}
     for ip, role in servers.items():
-        out, rc = run(f"dig @{ip} google.com +short +time=4 +tries=1 2>/dev/null | head -1")
-        if rc == 0 and out.strip():
-            details[f"{role} ({ip})"] = f"UP — responded with {out.strip()}"
+        p = probes[ip]
+        metrics[f"dns_us:{ip}"] = p["latency_us"]
+        if p["up"]:
+            details[f"{role} ({ip})"] = f"UP — responded with {p['answer']} in {p['latency_us']} µs"
         else:
             issues.append(f"Unlocator {role} ({ip}) not responding")
-            details[f"{role} ({ip})"] = "DOWN / timeout"
+            details[f"{role} ({ip})"] = f"DOWN / timeout ({p['passed']}/{p['total']} resolved)"
 
     if issues:
         return {"status": "error",
                 "msg": "; ".join(issues) + " — geo-unblocking may be broken",
-                "details": details}
+                "details": details, "metrics": metrics}
     return {"status": "ok",
-            "msg": "Both Unlocator SmartDNS servers reachable",
-            "details": details}
+            "msg": ("Both" if len(servers) == 2 else f"All {len(servers)}")
+                   + " Unlocator SmartDNS servers reachable",
+            "details": details, "metrics": metrics}
 
 
+@check_type("orbi")
 def check_orbi():
-    """Ping Orbi router and satellites."""
+    """Probe Orbi router and satellites concurrently."""
+    settings = SETTINGS
+    # Router web UI check runs alongside the device probes
+    web = {}
+
+    def check_web():
+        try:
+            r = requests.head(settings.orbi_web_url, timeout=5, verify=False, allow_redirects=False)
+            web["ok"] = r.status_code in (200, 301, 302)
+        except requests.RequestException:
+            web["ok"] = False
+
+    web_thread = threading.Thread(target=check_web, daemon=True)
+    web_thread.start()
+    stats = _reach.probe(settings.orbi_devices)
+    web_thread.join(timeout=6)
+    return orbi_result(settings.orbi_devices, stats, web.get("ok"))
+
+
+@async_check_type("orbi")
+async def check_orbi_async():
+    settings = SETTINGS
+
+    async def check_web():
+        try:
+            status, _ = await aioprobe.http_status(settings.orbi_web_url, timeout=5, verify=False)
+            return status in (200, 301, 302)
+        except (asyncio.TimeoutError, OSError, ValueError):
+            return False
+
+    web_ok, stats = await asyncio.gather(check_web(),
+                                         _reach.probe_async(settings.orbi_devices))
+    return orbi_result(settings.orbi_devices, stats, web_ok)
+
+
+def orbi_result(devices, stats, web_ok):
     details = {}
     issues = []
-
-    for ip, name in ORBI_DEVICES.items():
-        out, rc = run(f"ping -c 2 -W 1 {ip} 2>/dev/null")
-        if rc == 0:
-            # Extract round-trip time (Linux: min/avg/max/mdev format)
-            m = re.search(r"(?:min/avg/max[^=]*=\s*[\d.]+/)?([\d.]+)/", out)
-            if not m:
-                m = re.search(r"time=([\d.]+)", out)
-            rtt = f"{m.group(1)}ms" if m else "up"
-            details[name] = {"ip": ip, "status": "UP", "rtt": rtt}
+    metrics = {}
+    for ip, name in devices.items():
+        s = stats[ip]
+        _probes.inc(kind=_reach.method, result="ok" if s["up"] else "fail")
+        metrics[f"rtt_ms:{ip}"] = s["rtt_ms"]
+        metrics[f"loss_pct:{ip}"] = s["loss_pct"]
+        if s["up"]:
+            details[name] = {"ip": ip, "status": "UP", "rtt": f"{s['rtt_ms']:.1f}ms",
+                             "loss": f"{s['loss_pct']:.0f}%", "jitter": f"{s['jitter_ms']:.1f}ms",
+                             "method": _reach.method}
         else:
-            details[name] = {"ip": ip, "status": "DOWN"}
-            issues.append(f"{name} ({ip}) not responding to ping")
+            details[name] = {"ip": ip, "status": "DOWN", "loss": f"{s['loss_pct']:.0f}%",
+                             "method": _reach.method}
+            probe = "ping" if _reach.method == "icmp" else "TCP connect"
+            issues.append(f"{name} ({ip}) not responding to {probe}")
 
-    # Try Orbi router web UI availability
-    out, rc = run("curl -s -I -k --max-time 5 https://192.168.1.1 2>/dev/null | head -1")
-    if rc == 0 and ("200" in out or "302" in out or "301" in out):
-        details["orbi_web"] = "Admin UI reachable"
-    else:
-        details["orbi_web"] = "Admin UI unreachable"
+    details["orbi_web"] = "Admin UI reachable" if web_ok else "Admin UI unreachable"
 
     if issues:
-        return {"status": "error", "msg": "; ".join(issues), "details": details}
+        return {"status": "error", "msg": "; ".join(issues), "details": details,
+                "metrics": metrics}
     router_rtt = details.get("Orbi Router", {}).get("rtt", "?")
     return {"status": "ok",
-            "msg": f"Router + {len(ORBI_DEVICES) - 1} satellites all UP | Router RTT {router_rtt}",
-            "details": details}
+            "msg": f"Router + {len(devices) - 1} satellites all UP | Router RTT {router_rtt}",
+            "details": details, "metrics": metrics}
 
 
 # ---------------------------------------------------------------------------
-# Aggregate all checks (with threading for speed)
+# Generic check types (one entry per target group in checks.json)
 # ---------------------------------------------------------------------------
 
-def run_all_checks():
-    """Run all checks concurrently."""
-    check_fns = {
-        "vpn_main": check_vpn_main,
-        "vpn_uk": check_vpn_uk,
-        "proxy": check_proxy,
-        "pihole": check_pihole,
-        "smartdns": check_smartdns,
-        "docker": check_docker,
-        "systemd": check_systemd,
-        "system": check_system,
-        "orbi": check_orbi,
-    }
+_trackers = {}   # host tuple -> ReachTracker, so each reach check keeps its own window
+_http = requests.Session()
+
+
+def _named(targets):
+    """Accept a list of targets or a {target: display name} dict."""
+    return dict(targets) if isinstance(targets, dict) else {t: t for t in targets}
+
+
+@check_type("reach")
+def check_reach(hosts, count=2, probe_timeout=1.0, max_loss_pct=50):
+    """Reachability of each host over ICMP (TCP-connect fallback), with RTT and loss."""
+    hosts = _named(hosts)
+    tracker = reach_tracker(hosts, count, probe_timeout)
+    return reach_result(hosts, tracker, tracker.probe(hosts), max_loss_pct)
+
+
+@async_check_type("reach")
+async def check_reach_async(hosts, count=2, probe_timeout=1.0, max_loss_pct=50):
+    hosts = _named(hosts)
+    tracker = reach_tracker(hosts, count, probe_timeout)
+    return reach_result(hosts, tracker, await tracker.probe_async(hosts), max_loss_pct)
+
+
+def reach_tracker(hosts, count, probe_timeout):
+    key = tuple(sorted(hosts))
+    tracker = _trackers.get(key)
+    if tracker is None:
+        tracker = _trackers.setdefault(key, reachprobe.ReachTracker(
+            window=REACH_WINDOW, count=count, timeout=probe_timeout))
+    return tracker
+
+
+def reach_result(hosts, tracker, stats, max_loss_pct):
+    details, metrics, down, lossy = {}, {}, [], []
+    for ip, name in hosts.items():
+        s = stats[ip]
+        _probes.inc(kind=tracker.method, result="ok" if s["up"] else "fail")
+        metrics[f"rtt_ms:{ip}"] = s["rtt_ms"]
+        metrics[f"loss_pct:{ip}"] = s["loss_pct"]
+        if not s["up"]:
+            down.append(name)
+            details[name] = f"DOWN — {ip}"
+            continue
+        if s["loss_pct"] > max_loss_pct:
+            lossy.append(name)
+        details[name] = f"UP {s['rtt_ms']:.1f}ms · {s['loss_pct']:.0f}% loss — {ip}"
+    if down:
+        return {"status": "error", "msg": f"Not responding: {', '.join(down)}",
+                "details": details, "metrics": metrics}
+    if lossy:
+        return {"status": "warn", "msg": f"Packet loss over {max_loss_pct}%: {', '.join(lossy)}",
+                "details": details, "metrics": metrics}
+    return {"status": "ok", "msg": f"All {len(hosts)} hosts UP", "details": details,
+            "metrics": metrics}
+
+
+@check_type("dns")
+def check_dns(servers, domains=None, query_timeout=3.0):
+    """Resolve the test domains via each server at once; error if any server fails."""
+    servers = _named(servers)
+    return dns_result(servers, dnsprobe.probe_servers(
+        list(servers), domains or SETTINGS.dns_test_domains, timeout=query_timeout))
+
+
+@async_check_type("dns")
+async def check_dns_async(servers, domains=None, query_timeout=3.0):
+    servers = _named(servers)
+    return dns_result(servers, await dnsprobe.probe_servers_async(
+        list(servers), domains or SETTINGS.dns_test_domains, timeout=query_timeout))
+
+
+def dns_result(servers, summary):
+    count_dns(summary)
+    details, metrics, down = {}, {}, []
+    for ip, name in servers.items():
+        p = summary[ip]
+        metrics[f"dns_us:{ip}"] = p["latency_us"]
+        if p["up"]:
+            details[name] = f"UP — {p['answer']} in {p['latency_us']} µs"
+        else:
+            down.append(name)
+            details[name] = f"DOWN ({p['passed']}/{p['total']} resolved)"
+    if down:
+        return {"status": "error", "msg": f"DNS failing: {', '.join(down)}",
+                "details": details, "metrics": metrics}
+    return {"status": "ok", "msg": f"All {len(servers)} DNS servers resolving",
+            "details": details, "metrics": metrics}
+
+
+@check_type("http")
+def check_http(urls, expect=(200, 204, 301, 302), request_timeout=5.0, verify=True):
+    """HEAD each URL concurrently; error on a failure or an unexpected status."""
+    urls = _named(urls)
+    found = {}
+
+    def head(url):
+        start = time.monotonic()
+        try:
+            r = _http.head(url, timeout=request_timeout, verify=verify, allow_redirects=False)
+            found[url] = (r.status_code, (time.monotonic() - start) * 1000)
+        except requests.RequestException as e:
+            found[url] = (type(e).__name__, None)
 
-    results = {}
-    threads = []
-    lock = threading.Lock()
+    threads = [threading.Thread(target=head, args=(u,), daemon=True) for u in urls]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=request_timeout + 1)
+    return http_result(urls, found, expect)
 
-    def run_check(name, fn):
+
+@async_check_type("http")
+async def check_http_async(urls, expect=(200, 204, 301, 302), request_timeout=5.0, verify=True):
+    urls = _named(urls)
+
+    async def head(url):
         try:
-            result = fn()
-        except Exception as e:
-            result = err(f"Check crashed: {e}")
-        with lock:
-            results[name] = result
-
-    for name, fn in check_fns.items():
-        t = threading.Thread(target=run_check, args=(name, fn))
-        t.daemon = True
-        threads.append(t)
-        t.start()
+            return await aioprobe.http_status(url, timeout=request_timeout, verify=verify)
+        except asyncio.TimeoutError:
+            return "Timeout", None
+        except (OSError, ValueError) as e:
+            return type(e).__name__, None
+
+    codes = await asyncio.gather(*(head(u) for u in urls))
+    return http_result(urls, dict(zip(urls, codes)), expect)
+
+
+def http_result(urls, found, expect):
+    details, metrics, failing = {}, {}, []
+    for url, name in urls.items():
+        code, ms = found.get(url, ("timeout", None))
+        metrics[f"http_ms:{url}"] = ms
+        if code in expect:
+            details[name] = f"UP {code} in {ms:.0f}ms"
+        else:
+            failing.append(name)
+            details[name] = f"DOWN ({code})"
+    if failing:
+        return {"status": "error", "msg": f"Unreachable: {', '.join(failing)}",
+                "details": details, "metrics": metrics}
+    return {"status": "ok", "msg": f"All {len(urls)} endpoints UP", "details": details,
+            "metrics": metrics}
 
-    for t in threads:
-        t.join(timeout=30)
 
-    results["checked_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    return results
+# ---------------------------------------------------------------------------
+# Check schedule
+# ---------------------------------------------------------------------------
 
+# Built-in check list, in page order, used when checks.json is missing. Each
+# check runs on its own cadence: interval between runs, timeout for one run,
+# and up to `jitter` extra seconds so checks don't fire in lock-step.
+# Exit-IP lookups inside the VPN/proxy checks stay cached for EXIT_IP_TTL.
+DEFAULT_CHECKS = [
+    {"name": "vpn_main", "interval": 30, "timeout": 30, "jitter": 10},
+    {"name": "vpn_uk",   "interval": 30, "timeout": 30, "jitter": 10},
+    {"name": "proxy",    "interval": 90, "timeout": 30, "jitter": 10},
+    {"name": "pihole",   "interval": 30, "timeout": 20, "jitter": 5},
+    {"name": "smartdns", "interval": 30, "timeout": 10, "jitter": 5},
+    {"name": "docker",   "interval": 10, "timeout": 10, "jitter": 2},
+    {"name": "systemd",  "interval": 30, "timeout": 10, "jitter": 5},
+    {"name": "system",   "interval": 5,  "timeout": 5,  "jitter": 1},
+    {"name": "orbi",     "interval": 30, "timeout": 10, "jitter": 5},
+]
 
-def get_cached_results():
-    """Return cached results, refreshing if stale."""
-    global _last_run
-    now = time.time()
+# /health probes: a small, cheap set on their own loop (see "/health fast path")
+DEFAULT_HEALTH = {"interval": 5, "timeout": 2, "checks": [
+    {"name": "vpn", "type": "vpn_link", "accept": ["ok"]},
+    {"name": "docker", "accept": ["ok", "warn"]},
+]}
+
+CHECKS = {}   # check name -> spec; swapped whole on config reload, never mutated
+HEALTH = {}   # {"interval", "timeout", "checks": {name: {"type", "options", "accept", "fn"}}}
+_config_lock = threading.Lock()
+_loops = {}   # check name -> Event (or any object with .set()) that stops its scheduling loop
+_scheduling = False
+_loop_starter = None   # asyncio mode: starts a coroutine loop instead of a thread
+
+
+def run_type(kind, options):
+    result = resolve_type(kind)(**options)
+    if asyncio.iscoroutine(result):   # coroutine plugin outside asyncio mode
+        result = asyncio.run(result)
+    return result
+
+
+def check_options(where, kind, options):
+    """Raise ConfigError if `options` don't fit the parameters of check type `kind`.
+
+    Plugin types are only checked once they have been imported (first run).
+    """
+    fn = CHECK_TYPES.get(kind)
+    if fn is None:
+        return
+    try:
+        inspect.signature(fn).bind(**options)
+    except TypeError as e:
+        raise config.ConfigError(f"{where}: options don't fit type {kind!r}: {e}")
+
+
+def build_checks(entries):
+    """CHECKS table from validated config entries."""
+    checks = {}
+    for e in entries:
+        kind = e["type"]
+        if kind not in CHECK_TYPES and ":" not in kind:
+            raise config.ConfigError(f"check {e['name']!r}: unknown type {kind!r}")
+        check_options(f"check {e['name']!r}", kind, e["options"])
+        spec = {k: e[k] for k in config.SCHEDULE_KEYS if k in e}
+        spec.update(type=kind, title=e["title"], options=e["options"],
+                    fn=functools.partial(run_type, kind, e["options"]))
+        checks[e["name"]] = spec
+    return checks
+
+
+def build_health(health):
+    """HEALTH table from a validated "health" section (None: DEFAULT_HEALTH)."""
+    health = health or config.parse_health(DEFAULT_HEALTH)
+    probes = {}
+    for e in health["checks"]:
+        kind = e["type"]
+        if kind not in CHECK_TYPES and ":" not in kind:
+            raise config.ConfigError(f"health check {e['name']!r}: unknown type {kind!r}")
+        check_options(f"health check {e['name']!r}", kind, e["options"])
+        probes[e["name"]] = {"type": kind, "options": e["options"], "accept": e["accept"],
+                             "fn": functools.partial(run_type, kind, e["options"])}
+    return {"interval": health["interval"], "timeout": health["timeout"], "checks": probes}
+
+
+def build_defaults():
+    cfg = config.parse({"checks": DEFAULT_CHECKS}, SETTING_DEFAULTS)
+    return cfg["settings"], build_checks(cfg["checks"]), build_health(None)
+
+
+def load_config(path=None):
+    """(settings, CHECKS, HEALTH) from checks.json, or the built-in defaults when it doesn't exist."""
+    path = path or CONFIG_PATH
+    if not os.path.exists(path):
+        return build_defaults()
+    cfg = config.load(path, SETTING_DEFAULTS)
+    return cfg["settings"], build_checks(cfg["checks"]), build_health(cfg["health"])
+
+
+def apply_config(settings, checks, health=None):
+    """Swap in new settings and checks; results and history of kept checks survive."""
+    global CHECKS, HEALTH, SETTINGS, _results
+    HEALTH = health or build_health(None)
+    old, CHECKS = CHECKS, checks
     with _results_lock:
-        if now - _last_run > CACHE_TTL or not _results:
-            # Update in place
-            fresh = run_all_checks()
-            _results.clear()
-            _results.update(fresh)
-            _last_run = now
-        return dict(_results)
+        SETTINGS = Settings(**settings)
+        snap = {k: v for k, v in _results.items() if k in checks or k in ("version", "checked_at")}
+        for name in checks:
+            # Until a check reports, its card shows as pending
+            snap.setdefault(name, warn("Waiting for first check…"))
+        snap["version"] = _results["version"] + 1
+        _results = snap
+    if _scheduling:
+        for name in set(_loops) - set(checks):
+            _loops.pop(name).set()
+        for name in checks:
+            if name not in _loops:
+                start_loop(name)
+    configure_influx()
+    build_metrics()
+    layout = [(n, s["title"], s["type"]) for n, s in checks.items()]
+    if old and layout != [(n, s["title"], s["type"]) for n, s in old.items()]:
+        broadcast_layout(snap["version"])
+
+
+def configure_influx():
+    """Start, stop or repoint the InfluxDB export to match the influx_url setting."""
+    global _influx
+    url = SETTINGS.influx_url
+    current = _influx.url if _influx is not None else ""
+    if url == current:
+        return
+    if _influx is not None:
+        _influx.close()
+    _influx = None
+    if url:
+        _influx = influxwriter.InfluxWriter(url, spool_path=INFLUX_SPOOL,
+                                            name="influx").start()
+
+
+def reload_config(reason="reload"):
+    """Re-read checks.json and apply it; an invalid file is logged and ignored."""
+    with _config_lock:
+        try:
+            settings, checks, health = load_config()
+        except config.ConfigError as e:
+            print(f"[config] {reason}: keeping current checks: {e}", flush=True)
+            return False
+        apply_config(settings, checks, health)
+    print(f"[config] {reason}: {len(checks)} checks from {CONFIG_PATH}", flush=True)
+    return True
+
+
+# Checks run on a fixed pool of worker threads. Each run is tracked until its
+# worker returns; one past its deadline is cancelled (its run() process groups
+# are killed) and counts against the check's in-flight cap until it finishes.
+CHECK_WORKERS = 6        # pool threads shared by all checks
+MAX_IN_FLIGHT = 2        # runs of one check allowed at once (incl. cancelled stragglers)
+# Idle workers must not start with "check-": the profiler samples those names
+_pool = ThreadPoolExecutor(max_workers=CHECK_WORKERS, thread_name_prefix="pool")
+# Coroutine checks (asyncio mode) hand their few blocking library calls to
+# this pool: Docker Engine API requests, exit-IP fetches, the FTL database
+IO_WORKERS = 3
+_io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+_check_context = threading.local()   # .run: the run dict of the check on this worker
+_in_flight = {}   # check name -> [run dict: future, start, procs, cancelled]
+_in_flight_lock = threading.Lock()
+
+
+def _execute(name, entry):
+    """Pool task: run one check with its run dict as the thread's context."""
+    spec = entry["spec"]
+    worker = threading.current_thread()
+    pool_name, worker.name = worker.name, f"check-{name}"
+    _check_context.run = entry
+    begun = time.monotonic()
+    crashed = False
+    try:
+        return spec["fn"]()
+    except Exception as e:
+        crashed = True
+        return err(f"Check crashed: {e}")
+    finally:
+        _check_context.run = None
+        worker.name = pool_name
+        # The real run time, even when it overstays the timeout
+        elapsed = time.monotonic() - begun
+        _check_timings.record(name, elapsed, crashed=crashed,
+                              overran=elapsed > spec["timeout"])
+
+
+def start_check(name):
+    """Submit a run of `name`, or join the one already running.
+
+    Returns the run dict, or None when the check is at its in-flight cap
+    with only cancelled runs that have not yet returned (or was removed).
+    """
+    spec = CHECKS.get(name)
+    if spec is None:
+        return None
+    cap = spec.get("max_in_flight", MAX_IN_FLIGHT)
+    with _in_flight_lock:
+        runs = [r for r in _in_flight.get(name, []) if not r["future"].done()]
+        _in_flight[name] = runs
+        live = next((r for r in runs if not r["cancelled"]), None)
+        if live is None:
+            if len(runs) >= cap:
+                return None
+            live = {"start": time.monotonic(), "spec": spec, "procs": set(),
+                    "cancelled": False}
+            live["future"] = _pool.submit(_execute, name, live)
+            runs.append(live)
+        return live
+
+
+def cancel_check(entry):
+    """Stop a run that missed its deadline: drop it if still queued, else kill its processes."""
+    with _in_flight_lock:
+        entry["cancelled"] = True
+        entry["future"].cancel()
+        for proc in list(entry["procs"]):
+            kill_tree(proc)
+
+
+def await_check(name, entry):
+    """Wait for a run until its deadline; stamp checked_at and duration_ms."""
+    spec = entry["spec"] if entry else CHECKS.get(name, {})
+    if entry is None:
+        cap = spec.get("max_in_flight", MAX_IN_FLIGHT)
+        result = err(f"Check skipped: {cap} timed-out runs still in flight")
+        start = time.monotonic()
+    else:
+        start = entry["start"]
+        try:
+            result = dict(entry["future"].result(
+                timeout=max(start + spec["timeout"] - time.monotonic(), 0)))
+        except FutureTimeout:
+            cancel_check(entry)
+            result = err(f"Check timed out after {spec['timeout']}s")
+        except CancelledError:
+            result = err(f"Check timed out after {spec['timeout']}s (never started, workers busy)")
+    return stamp(result, start)
 
 
-def background_refresher():
-    """Continuously refresh checks in the background."""
-    while True:
+def stamp(result, start):
+    """Add checked_at and duration_ms (since the monotonic `start`) to a result."""
+    result["checked_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    result["duration_ms"] = round((time.monotonic() - start) * 1000, 1)
+    return result
+
+
+def run_check(name):
+    """Run one check with its timeout; stamp checked_at and duration_ms.
+
+    Concurrent callers for the same check share one run. A run that overstays
+    its timeout is cancelled and reported as an error.
+    """
+    return await_check(name, start_check(name))
+
+
+def store_result(name, result):
+    """Publish one check's result as a new snapshot version."""
+    global _results
+    with _results_lock:
+        spec = CHECKS.get(name)
+        if spec is None:
+            return   # removed by a config reload while it ran
+        prev = _results.get(name) or {}
+        snap = dict(_results)
+        snap[name] = result
+        snap["checked_at"] = result["checked_at"]
+        snap["version"] = _results["version"] + 1
+        _results = snap
+    _history.record(name, result, spec["interval"])
+    try:
+        event = _events.observe(name, result.get("status"), result.get("msg"))
+    except OSError as e:
+        event = None
+        print(f"[events] cannot record {name} transition: {e}", flush=True)
+    if event is not None:
+        _transitions.inc(check=name, status=event["new"])
+    if _influx is not None:
+        _influx.add(influxwriter.line(
+            "health_check", {"check": name},
+            {"status_code": history.STATUS_CODES.get(result.get("status"), 2),
+             "duration_ms": float(result.get("duration_ms") or 0)}, time.time_ns()))
+    if result.get("duration_ms") is not None:
+        _check_seconds.observe(result["duration_ms"] / 1000, check=name)
+    build_metrics()
+    _sampler.tick()
+    if (prev.get("status"), prev.get("msg")) != (result.get("status"), result.get("msg")):
+        broadcast(name, result, snap["version"])
+
+
+def run_all_checks():
+    """Run all checks concurrently on the worker pool."""
+    runs = {name: start_check(name) for name in CHECKS}
+    results = {name: await_check(name, entry) for name, entry in runs.items()}
+    results["checked_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return results
+
+
+def get_cached_results():
+    """Return the current result snapshot without blocking.
+
+    Only the per-check schedules refresh results; the returned dict is never
+    mutated after publication, so callers must not modify it either.
+    """
+    return _results
+
+
+def check_loop(name, stop):
+    """Run one check on its own interval until `stop` is set, publishing each result.
+
+    The spec is re-read every cycle so a config reload's new interval or
+    options apply from the next run.
+    """
+    spec = CHECKS.get(name)
+    if spec is None or stop.wait(random.uniform(0, spec["jitter"])):
+        return
+    while not stop.is_set():
+        spec = CHECKS.get(name)
+        if spec is None:
+            return
         try:
-            fresh = run_all_checks()
-            with _results_lock:
-                _results.clear()
-                _results.update(fresh)
-                globals()["_last_run"] = time.time()
-        except Exception:
-            pass
-        time.sleep(CACHE_TTL)
+            store_result(name, run_check(name))
+        except Exception as e:
+            print(f"[sched] {name}: cycle failed: {e!r}", flush=True)
+        stop.wait(spec["interval"] + random.uniform(0, spec["jitter"]))
+
+
+def start_loop(name):
+    if _loop_starter is not None:
+        _loops[name] = _loop_starter(name)
+        return
+    stop = _loops[name] = threading.Event()
+    threading.Thread(target=check_loop, args=(name, stop), daemon=True,
+                     name=f"sched-{name}").start()
+
+
+def background_refresher(starter=None, health_starter=None):
+    """Start one scheduling loop per check so each refreshes independently.
+
+    `starter(name)`, if given, starts a loop some other way (asyncio mode)
+    and returns its stop handle; config reloads use it too. Likewise
+    `health_starter()` replaces the /health thread.
+    """
+    global _scheduling, _loop_starter
+    with _config_lock:
+        _scheduling = True
+        _loop_starter = starter
+        for name in CHECKS:
+            start_loop(name)
+    if health_starter is not None:
+        health_starter()
+    else:
+        threading.Thread(target=health_loop, daemon=True, name="health-loop").start()
+
+
+def build_metrics():
+    """Rebuild the /metrics exposition text from the latest snapshot."""
+    global _metrics_text
+    with _metrics_lock:
+        snap = _results
+        checks = [(n, snap[n]) for n in CHECKS if isinstance(snap.get(n), dict)]
+        system = (snap.get("system") or {}).get("metrics") or {}
+        lines = []
+        lines += metrics.gauge("healthdash_snapshot_version",
+                               "Result snapshot version (bumps on every published result).",
+                               [((), snap["version"])])
+        lines += metrics.gauge("healthdash_check_status",
+                               "Latest check status: 0=ok, 1=warn, 2=error.",
+                               [((n,), history.STATUS_CODES.get(r.get("status"), 2))
+                                for n, r in checks], labels=("check",))
+        lines += metrics.gauge("healthdash_check_metric",
+                               "Numeric values reported by a check (metrics dict).",
+                               [((n, k), v) for n, r in checks
+                                for k, v in sorted((r.get("metrics") or {}).items())
+                                if v is not None], labels=("check", "metric"))
+        lines += _check_seconds.expose()
+        for key, metric, doc in (("cpu_temp_c", "healthdash_system_cpu_temp_celsius", "CPU temperature."),
+                                 ("mem_pct", "healthdash_system_memory_percent", "Memory used, percent."),
+                                 ("disk_pct", "healthdash_system_disk_percent", "Root filesystem used, percent."),
+                                 ("load1", "healthdash_system_load1", "1-minute load average.")):
+            if system.get(key) is not None:
+                lines += metrics.gauge(metric, doc, [((), system[key])])
+        lines += _transitions.expose()
+        lines += _subprocesses.expose()
+        lines += _probes.expose()
+        lines += metrics.counter("healthdash_exit_ip_lookups_total",
+                               "Exit-IP resolver lookups by cache outcome.",
+                               [((k,), v) for k, v in sorted(_exit_ip.stats.items())],
+                               labels=("result",))
+        lines += metrics.gauge("healthdash_sse_clients", "Connected /api/stream clients.",
+                               [((), len(_subscribers))])
+        if _influx is not None:
+            lines += metrics.counter("healthdash_influx_writer_total",
+                                     "InfluxDB export activity (points, batches, spooled, dropped...).",
+                                     [((k,), v) for k, v in sorted(_influx.stats.items())],
+                                     labels=("event",))
+            lines += metrics.gauge("healthdash_influx_spool_bytes",
+                                   "Bytes waiting in the InfluxDB spool file.",
+                                   [((), _influx.spool.pending)])
+        _metrics_text = "\n".join(lines) + "\n"
+
+
+try:
+    apply_config(*load_config())
+except config.ConfigError as e:
+    print(f"[config] startup: using built-in checks: {e}", flush=True)
+    apply_config(*build_defaults())
 
 
 # ---------------------------------------------------------------------------
 # HTML Template
 # ---------------------------------------------------------------------------
 
-HTML = """<!DOCTYPE html>
-<html lang="en">
-<head>
-<meta charset="UTF-8">
-<meta name="viewport" content="width=device-width, initial-scale=1">
-<meta http-equiv="refresh" content="30">
-<title>SmartHome Health</title>
-<style>
-  :root {
-    --bg: #0d1117; --surface: #161b22; --border: #30363d;
-    --ok: #238636; --ok-light: #2ea043; --ok-text: #56d364;
-    --warn: #9e6a03; --warn-light: #bb8009; --warn-text: #e3b341;
-    --err: #da3633; --err-light: #f85149; --err-text: #ff7b72;
-    --text: #c9d1d9; --muted: #8b949e; --heading: #f0f6fc;
-  }
-  * { box-sizing: border-box; margin: 0; padding: 0; }
-  body { background: var(--bg); color: var(--text); font-family: 'Segoe UI', system-ui, sans-serif; font-size: 14px; }
-  header { background: var(--surface); border-bottom: 1px solid var(--border); padding: 16px 24px; display: flex; align-items: center; justify-content: space-between; }
-  header h1 { color: var(--heading); font-size: 20px; font-weight: 600; }
-  .checked-at { color: var(--muted); font-size: 12px; }
-  .grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(420px, 1fr)); gap: 16px; padding: 16px 24px; }
-  .card { background: var(--surface); border: 1px solid var(--border); border-radius: 8px; overflow: hidden; }
-  .card-header { display: flex; align-items: center; gap: 10px; padding: 12px 16px; border-bottom: 1px solid var(--border); }
-  .card-title { font-weight: 600; color: var(--heading); font-size: 15px; }
-  .card-body { padding: 12px 16px; }
-  .status-dot { width: 10px; height: 10px; border-radius: 50%; flex-shrink: 0; }
-  .status-ok   .status-dot { background: var(--ok-text); box-shadow: 0 0 6px var(--ok-text); }
-  .status-warn .status-dot { background: var(--warn-text); box-shadow: 0 0 6px var(--warn-text); }
-  .status-error .status-dot { background: var(--err-text); box-shadow: 0 0 6px var(--err-text); }
-  .status-ok   .card-header { border-left: 3px solid var(--ok-text); }
-  .status-warn .card-header { border-left: 3px solid var(--warn-text); }
-  .status-error .card-header { border-left: 3px solid var(--err-text); }
-  .msg { font-size: 13px; margin-bottom: 10px; }
-  .msg.ok   { color: var(--ok-text); }
-  .msg.warn { color: var(--warn-text); }
-  .msg.err  { color: var(--err-text); }
-  .details { border-top: 1px solid var(--border); padding-top: 10px; margin-top: 4px; }
-  .detail-row { display: flex; justify-content: space-between; align-items: flex-start; gap: 8px; padding: 3px 0; }
-  .detail-key { color: var(--muted); font-size: 12px; white-space: nowrap; }
-  .detail-val { color: var(--text); font-size: 12px; text-align: right; word-break: break-all; max-width: 70%; }
-  .detail-val.ok   { color: var(--ok-text); }
-  .detail-val.warn { color: var(--warn-text); }
-  .detail-val.err  { color: var(--err-text); }
-  .badge { display: inline-block; padding: 1px 6px; border-radius: 4px; font-size: 11px; font-weight: 600; }
-  .badge-ok   { background: var(--ok); color: #fff; }
-  .badge-warn { background: var(--warn); color: #fff; }
-  .badge-err  { background: var(--err); color: #fff; }
-  .container-grid { display: grid; grid-template-columns: 1fr 1fr; gap: 4px; margin-top: 6px; }
-  .container-item { display: flex; align-items: center; gap: 5px; font-size: 12px; }
-  .dot-sm { width: 7px; height: 7px; border-radius: 50%; flex-shrink: 0; }
-  .dot-ok   { background: var(--ok-text); }
-  .dot-warn { background: var(--warn-text); }
-  .dot-err  { background: var(--err-text); }
-  footer { text-align: center; color: var(--muted); font-size: 11px; padding: 16px; }
-  .remediation { background: #161b22; border: 1px solid var(--err); border-radius: 4px; padding: 8px 10px; margin-top: 8px; font-family: monospace; font-size: 11px; color: var(--err-text); white-space: pre-wrap; }
-</style>
-</head>
-<body>
-<header>
-  <h1>🏠 SmartHome Health Dashboard</h1>
-  <span class="checked-at">Updated: {{ data.checked_at }} &nbsp;|&nbsp; Auto-refresh 30s</span>
-</header>
-<div class="grid">
-
-{# ── VPN Main ── #}
-{% set s = data.vpn_main %}
-<div class="card status-{{ s.status }}">
+# One card per check, used by the full page and rendered alone for /api/stream
+CARDS = """{% macro card(name, s, spec) %}{% set kind = spec.type or name %}
+{% if kind == 'vpn_main' %}{# ── VPN Main ── #}
+<div class="card status-{{ s.status }}" id="card-{{ name }}">
   <div class="card-header">
     <div class="status-dot"></div>
     <span class="card-title">🌐 Main VPN (tun0 — US)</span>
@@ -619,9 +1519,8 @@ sudo systemctl restart vpn-proxy</div>
   </div>
 </div>
 
-{# ── UK VPN ── #}
-{% set s = data.vpn_uk %}
-<div class="card status-{{ s.status }}">
+{% elif kind == 'vpn_uk' %}{# ── UK VPN ── #}
+<div class="card status-{{ s.status }}" id="card-{{ name }}">
   <div class="card-header">
     <div class="status-dot"></div>
     <span class="card-title">🇬🇧 UK VPN (tun1 — Apple TV)</span>
@@ -643,9 +1542,8 @@ sudo systemctl restart vpn-proxy</div>
   </div>
 </div>
 
-{# ── SOCKS5 Proxy ── #}
-{% set s = data.proxy %}
-<div class="card status-{{ s.status }}">
+{% elif kind == 'proxy' %}{# ── SOCKS5 Proxy ── #}
+<div class="card status-{{ s.status }}" id="card-{{ name }}">
   <div class="card-header">
     <div class="status-dot"></div>
     <span class="card-title">🔀 SOCKS5 Proxy (claude-vpn)</span>
@@ -669,9 +1567,8 @@ sleep 15 && sudo systemctl restart vpn-proxy</div>
   </div>
 </div>
 
-{# ── Pi-hole ── #}
-{% set s = data.pihole %}
-<div class="card status-{{ s.status }}">
+{% elif kind == 'pihole' %}{# ── Pi-hole ── #}
+<div class="card status-{{ s.status }}" id="card-{{ name }}">
   <div class="card-header">
     <div class="status-dot"></div>
     <span class="card-title">🕳️ Pi-hole DNS</span>
@@ -699,9 +1596,8 @@ sleep 15 && sudo systemctl restart vpn-proxy</div>
   </div>
 </div>
 
-{# ── Unlocator SmartDNS ── #}
-{% set s = data.smartdns %}
-<div class="card status-{{ s.status }}">
+{% elif kind == 'smartdns' %}{# ── Unlocator SmartDNS ── #}
+<div class="card status-{{ s.status }}" id="card-{{ name }}">
   <div class="card-header">
     <div class="status-dot"></div>
     <span class="card-title">🌍 Unlocator SmartDNS</span>
@@ -722,9 +1618,8 @@ sleep 15 && sudo systemctl restart vpn-proxy</div>
   </div>
 </div>
 
-{# ── Docker Containers ── #}
-{% set s = data.docker %}
-<div class="card status-{{ s.status }}">
+{% elif kind == 'docker' %}{# ── Docker Containers ── #}
+<div class="card status-{{ s.status }}" id="card-{{ name }}">
   <div class="card-header">
     <div class="status-dot"></div>
     <span class="card-title">🐳 Docker Containers</span>
@@ -746,9 +1641,8 @@ sleep 15 && sudo systemctl restart vpn-proxy</div>
   </div>
 </div>
 
-{# ── Systemd ── #}
-{% set s = data.systemd %}
-<div class="card status-{{ s.status }}">
+{% elif kind == 'systemd' %}{# ── Systemd ── #}
+<div class="card status-{{ s.status }}" id="card-{{ name }}">
   <div class="card-header">
     <div class="status-dot"></div>
     <span class="card-title">⚙️ Systemd Services</span>
@@ -765,9 +1659,8 @@ sleep 15 && sudo systemctl restart vpn-proxy</div>
   </div>
 </div>
 
-{# ── System Health ── #}
-{% set s = data.system %}
-<div class="card status-{{ s.status }}">
+{% elif kind == 'system' %}{# ── System Health ── #}
+<div class="card status-{{ s.status }}" id="card-{{ name }}">
   <div class="card-header">
     <div class="status-dot"></div>
     <span class="card-title">💻 System Health</span>
@@ -784,9 +1677,8 @@ sleep 15 && sudo systemctl restart vpn-proxy</div>
   </div>
 </div>
 
-{# ── Orbi ── #}
-{% set s = data.orbi %}
-<div class="card status-{{ s.status }}">
+{% elif kind == 'orbi' %}{# ── Orbi ── #}
+<div class="card status-{{ s.status }}" id="card-{{ name }}">
   <div class="card-header">
     <div class="status-dot"></div>
     <span class="card-title">📡 Netgear Orbi Mesh</span>
@@ -800,7 +1692,7 @@ sleep 15 && sudo systemctl restart vpn-proxy</div>
       <div class="detail-row">
         <span class="detail-key">{{ name }}</span>
         <span class="detail-val {% if info.status=='DOWN' %}err{% else %}ok{% endif %}">
-          {{ info.status }}{% if info.rtt is defined %} ({{ info.rtt }}){% endif %} — {{ info.ip }}
+          {{ info.status }}{% if info.rtt is defined %} ({{ info.rtt }}){% endif %}{% if info.loss and info.loss != '0%' %} · {{ info.loss }} loss{% endif %} — {{ info.ip }}
         </span>
       </div>
       {% else %}
@@ -812,39 +1704,433 @@ sleep 15 && sudo systemctl restart vpn-proxy</div>
   </div>
 </div>
 
+{% else %}{# ── Configured check (reach / dns / http / plugin types) ── #}
+<div class="card status-{{ s.status }}" id="card-{{ name }}">
+  <div class="card-header">
+    <div class="status-dot"></div>
+    <span class="card-title">{{ spec.title or name }}</span>
+  </div>
+  <div class="card-body">
+    <div class="msg {{ 'ok' if s.status=='ok' else ('warn' if s.status=='warn' else 'err') }}">{{ s.msg }}</div>
+    {% if s.details %}
+    <div class="details">
+      {% for k,v in s.details.items() %}
+      <div class="detail-row"><span class="detail-key">{{ k }}</span><span class="detail-val {% if (v|string).startswith('DOWN') %}err{% elif (v|string).startswith('UP') %}ok{% endif %}">{{ v if v is string or v is not iterable else v | join(', ') }}</span></div>
+      {% endfor %}
+    </div>
+    {% endif %}
+  </div>
+</div>
+{% endif %}
+{% endmacro %}
+"""
+
+HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>SmartHome Health</title>
+<style>
+  :root {
+    --bg: #0d1117; --surface: #161b22; --border: #30363d;
+    --ok: #238636; --ok-light: #2ea043; --ok-text: #56d364;
+    --warn: #9e6a03; --warn-light: #bb8009; --warn-text: #e3b341;
+    --err: #da3633; --err-light: #f85149; --err-text: #ff7b72;
+    --text: #c9d1d9; --muted: #8b949e; --heading: #f0f6fc;
+  }
+  * { box-sizing: border-box; margin: 0; padding: 0; }
+  body { background: var(--bg); color: var(--text); font-family: 'Segoe UI', system-ui, sans-serif; font-size: 14px; }
+  header { background: var(--surface); border-bottom: 1px solid var(--border); padding: 16px 24px; display: flex; align-items: center; justify-content: space-between; }
+  header h1 { color: var(--heading); font-size: 20px; font-weight: 600; }
+  .checked-at { color: var(--muted); font-size: 12px; }
+  .grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(420px, 1fr)); gap: 16px; padding: 16px 24px; }
+  .card { background: var(--surface); border: 1px solid var(--border); border-radius: 8px; overflow: hidden; }
+  .card-header { display: flex; align-items: center; gap: 10px; padding: 12px 16px; border-bottom: 1px solid var(--border); }
+  .card-title { font-weight: 600; color: var(--heading); font-size: 15px; }
+  .card-body { padding: 12px 16px; }
+  .status-dot { width: 10px; height: 10px; border-radius: 50%; flex-shrink: 0; }
+  .status-ok   .status-dot { background: var(--ok-text); box-shadow: 0 0 6px var(--ok-text); }
+  .status-warn .status-dot { background: var(--warn-text); box-shadow: 0 0 6px var(--warn-text); }
+  .status-error .status-dot { background: var(--err-text); box-shadow: 0 0 6px var(--err-text); }
+  .status-ok   .card-header { border-left: 3px solid var(--ok-text); }
+  .status-warn .card-header { border-left: 3px solid var(--warn-text); }
+  .status-error .card-header { border-left: 3px solid var(--err-text); }
+  .msg { font-size: 13px; margin-bottom: 10px; }
+  .msg.ok   { color: var(--ok-text); }
+  .msg.warn { color: var(--warn-text); }
+  .msg.err  { color: var(--err-text); }
+  .details { border-top: 1px solid var(--border); padding-top: 10px; margin-top: 4px; }
+  .detail-row { display: flex; justify-content: space-between; align-items: flex-start; gap: 8px; padding: 3px 0; }
+  .detail-key { color: var(--muted); font-size: 12px; white-space: nowrap; }
+  .detail-val { color: var(--text); font-size: 12px; text-align: right; word-break: break-all; max-width: 70%; }
+  .detail-val.ok   { color: var(--ok-text); }
+  .detail-val.warn { color: var(--warn-text); }
+  .detail-val.err  { color: var(--err-text); }
+  .badge { display: inline-block; padding: 1px 6px; border-radius: 4px; font-size: 11px; font-weight: 600; }
+  .badge-ok   { background: var(--ok); color: #fff; }
+  .badge-warn { background: var(--warn); color: #fff; }
+  .badge-err  { background: var(--err); color: #fff; }
+  .container-grid { display: grid; grid-template-columns: 1fr 1fr; gap: 4px; margin-top: 6px; }
+  .container-item { display: flex; align-items: center; gap: 5px; font-size: 12px; }
+  .dot-sm { width: 7px; height: 7px; border-radius: 50%; flex-shrink: 0; }
+  .dot-ok   { background: var(--ok-text); }
+  .dot-warn { background: var(--warn-text); }
+  .dot-err  { background: var(--err-text); }
+  footer { text-align: center; color: var(--muted); font-size: 11px; padding: 16px; }
+  .remediation { background: #161b22; border: 1px solid var(--err); border-radius: 4px; padding: 8px 10px; margin-top: 8px; font-family: monospace; font-size: 11px; color: var(--err-text); white-space: pre-wrap; }
+</style>
+</head>
+<body>
+<header>
+  <h1>🏠 SmartHome Health Dashboard</h1>
+  <span class="checked-at">Updated: <span id="checked-at">{{ data.checked_at }}</span> &nbsp;|&nbsp; <span id="live">Live</span></span>
+</header>
+<div class="grid">
+{% for name, spec in checks.items() if name in data %}
+{{ card(name, data[name], spec) }}
+{% endfor %}
 </div><!-- /grid -->
 <footer>reTerminal SmartHome &nbsp;|&nbsp; <a href="/api" style="color:var(--muted)">JSON API</a> &nbsp;|&nbsp; <a href="/health" style="color:var(--muted)">Health endpoint</a></footer>
+<script>
+// Cards are swapped in place from /api/stream, which only sends checks whose
+// status or message changed. Browsers without EventSource fall back to a reload.
+(function () {
+  if (!window.EventSource) { setTimeout(function () { location.reload(); }, 30000); return; }
+  var live = document.getElementById('live');
+  var es = new EventSource('/api/stream?version={{ data.version }}');
+  es.addEventListener('check', function (e) {
+    var d = JSON.parse(e.data);
+    var el = document.getElementById('card-' + d.check);
+    if (!el) { location.reload(); return; }
+    el.outerHTML = d.html;
+    document.getElementById('checked-at').textContent = d.checked_at;
+  });
+  es.addEventListener('layout', function () { location.reload(); });
+  es.onopen = function () { live.textContent = 'Live'; };
+  es.onerror = function () { live.textContent = 'Reconnecting…'; };
+})();
+</script>
 </body>
 </html>
 """
 
 
+# Compiled once at startup; requests only render
+_card_macro = app.jinja_env.from_string(CARDS).module.card
+_page_template = app.jinja_env.from_string(HTML)
+
+
+# ---------------------------------------------------------------------------
+# Response cache (rendered bodies keyed by snapshot version)
+# ---------------------------------------------------------------------------
+
+GZIP_MIN_BYTES = 1024          # don't bother compressing tiny bodies
+_boot_id = f"{int(time.time()):x}"   # keeps ETags unique across restarts
+_render_cache = {}             # kind -> {"version", "etag", "body", "gzip"}
+
+
+def render_page(data):
+    return _page_template.render(data=data, card=_card_macro, checks=CHECKS)
+
+
+def render_api(data):
+    return app.json.dumps(data) + "\n"
+
+
+def cached_entry(kind, build):
+    """The body for the current snapshot version, rendered at most once per version."""
+    data = get_cached_results()
+    entry = _render_cache.get(kind)
+    if entry is None or entry["version"] != data["version"]:
+        entry = {"version": data["version"], "etag": f"{_boot_id}-{data['version']}-{kind}",
+                 "body": build(data).encode(), "gzip": None}
+        _render_cache[kind] = entry
+    return entry
+
+
+def gzip_body(entry, accept_encoding):
+    """The entry's gzip copy (built on first use) if worth sending, else None."""
+    if len(entry["body"]) < GZIP_MIN_BYTES or "gzip" not in accept_encoding:
+        return None
+    if entry["gzip"] is None:
+        entry["gzip"] = gzip.compress(entry["body"], compresslevel=6)
+    return entry["gzip"]
+
+
+def cached_response(kind, build, mimetype):
+    """Serve a body rendered at most once per snapshot version.
+
+    Sends 304 when If-None-Match matches, and a gzip copy (built on first
+    use) to clients that accept it.
+    """
+    entry = cached_entry(kind, build)
+    if request.if_none_match.contains(entry["etag"]):
+        resp = Response(status=304)
+    else:
+        compressed = gzip_body(entry, request.headers.get("Accept-Encoding", ""))
+        if compressed is not None:
+            resp = Response(compressed, mimetype=mimetype)
+            resp.headers["Content-Encoding"] = "gzip"
+        else:
+            resp = Response(entry["body"], mimetype=mimetype)
+    resp.set_etag(entry["etag"])
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["Vary"] = "Accept-Encoding"
+    return resp
+
+
+# ---------------------------------------------------------------------------
+# /health fast path
+# ---------------------------------------------------------------------------
+# /health answers from a verdict rebuilt every HEALTH["interval"] seconds by
+# its own loop and pool, running only the HEALTH probes. A request reads one
+# prebuilt body; it never runs, waits on or queues behind the page checks.
+# In asyncio mode aioserve runs the loop as a task instead (see publish_health).
+
+_health_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="health")
+_health_runs = {}   # probe name -> Future of its latest run (a hung one isn't resubmitted)
+_health = {"code": 503, "at": None,
+           "body": b'{"status": "starting", "checked_at": null}\n'}
+
+
+def health_cycle():
+    """Run every health probe at once (bounded by HEALTH["timeout"]) and publish the verdict."""
+    spec = HEALTH
+    start = time.monotonic()
+    runs = {}
+    for name in set(_health_runs) - set(spec["checks"]):
+        del _health_runs[name]   # probe dropped by a config reload
+    for name, probe in spec["checks"].items():
+        future = _health_runs.get(name)
+        if future is None or future.done():
+            future = _health_runs[name] = _health_pool.submit(probe["fn"])
+        runs[name] = future
+    deadline = start + spec["timeout"]
+    statuses = {}
+    for name, future in runs.items():
+        try:
+            statuses[name] = future.result(timeout=max(deadline - time.monotonic(), 0))["status"]
+        except FutureTimeout:
+            statuses[name] = "error"   # still hung from this or an earlier cycle
+        except Exception:
+            statuses[name] = "error"
+        _check_timings.record(f"health:{name}", time.monotonic() - start,
+                              overran=not future.done())
+    publish_health(spec, statuses)
+
+
+def publish_health(spec, statuses):
+    """Build and swap in the /health verdict from {probe name: status}."""
+    failing = [n for n, st in statuses.items() if st not in spec["checks"][n]["accept"]]
+    payload = {"status": "degraded" if failing else "ok",
+               "checked_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+               "checks": statuses, "failing": failing}
+    global _health
+    _health = {"code": 503 if failing else 200, "at": time.monotonic(),
+               "body": (json.dumps(payload) + "\n").encode()}
+
+
+def health_loop():
+    while True:
+        started = time.monotonic()
+        try:
+            health_cycle()
+        except Exception as e:
+            print(f"[health] cycle failed: {e}", flush=True)
+        time.sleep(max(HEALTH["interval"] - (time.monotonic() - started), 0))
+
+
+def health_status():
+    """(HTTP code, JSON body bytes) for /health; 503 if the verdict has gone stale."""
+    current = _health
+    if current["at"] is not None and \
+            time.monotonic() - current["at"] > 3 * HEALTH["interval"] + HEALTH["timeout"]:
+        return 503, b'{"status": "stale", "checked_at": null}\n'
+    return current["code"], current["body"]
+
+
+# ---------------------------------------------------------------------------
+# Live updates (Server-Sent Events)
+# ---------------------------------------------------------------------------
+
+def render_card(name, result):
+    """Render one check's card exactly as it appears on the full page."""
+    return str(_card_macro(name, result, CHECKS.get(name) or {})).strip()
+
+
+def sse_event(name, result, version):
+    payload = json.dumps({"check": name, "checked_at": result.get("checked_at"),
+                          "status": result.get("status"), "html": render_card(name, result)})
+    return f"id: {version}\nevent: check\ndata: {payload}\n\n"
+
+
+def catch_up_events(seen):
+    """Every card as an event, unless the client already has the current version."""
+    snap = get_cached_results()
+    if seen == str(snap["version"]):
+        return []
+    return [sse_event(name, snap[name], snap["version"]) for name in CHECKS if name in snap]
+
+
+def broadcast_layout(version):
+    """Tell every open page to reload because checks were added, removed or reordered."""
+    with _subscribers_lock:
+        for q in list(_subscribers):
+            try:
+                q.put_nowait(f"id: {version}\nevent: layout\ndata: {{}}\n\n")
+            except queue.Full:
+                _subscribers.discard(q)
+                q.put(None)
+
+
+def broadcast(name, result, version):
+    """Queue a changed check for every stream; drop clients that fall behind."""
+    with _subscribers_lock:
+        if not _subscribers:
+            return
+        event = sse_event(name, result, version)
+        for q in list(_subscribers):
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                _subscribers.discard(q)
+                q.put(None)   # unblock the stream so it can close
+
+
 # ---------------------------------------------------------------------------
 # Routes
 # ---------------------------------------------------------------------------
 
 @app.route("/")
 def dashboard():
-    data = get_cached_results()
-    return render_template_string(HTML, data=data)
+    return cached_response("page", render_page, "text/html")
 
 
 @app.route("/api")
 def api():
-    return jsonify(get_cached_results())
+    return cached_response("api", render_api, "application/json")
+
+
+@app.route("/api/stream")
+def api_stream():
+    """SSE stream of card updates, sent only when a check's status or message changes.
+
+    Clients pass the snapshot version they rendered (?version= on first
+    connect, Last-Event-ID on reconnect); if anything has moved on since,
+    every card is sent once so the page catches up.
+    """
+    q = queue.Queue(maxsize=SSE_QUEUE_MAX)
+    catch_up = catch_up_events(request.headers.get("Last-Event-ID") or request.args.get("version"))
+    with _subscribers_lock:
+        _subscribers.add(q)
+
+    def stream():
+        try:
+            yield "retry: 5000\n\n"
+            for event in catch_up:
+                yield event
+            while True:
+                try:
+                    event = q.get(timeout=SSE_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    return
+                yield event
+        finally:
+            with _subscribers_lock:
+                _subscribers.discard(q)
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route("/api/history")
+def api_history():
+    """Downsampled history for one check: ?check=NAME&since=EPOCH&until=EPOCH&points=N."""
+    name = request.args.get("check")
+    if not name:
+        return jsonify({"error": "check parameter required", "checks": _history.checks()}), 400
+    since = request.args.get("since", type=float)
+    until = request.args.get("until", type=float)
+    points = min(request.args.get("points", 300, type=int), 2000)
+    data = _history.query(name, since=since, until=until, max_points=points)
+    if data is None:
+        return jsonify({"error": f"no history for {name}", "checks": _history.checks()}), 404
+    return jsonify(data)
+
+
+@app.route("/api/events")
+def api_events():
+    """Status transitions, oldest first: ?since=EPOCH&until=EPOCH&check=NAME&limit=N."""
+    limit = min(request.args.get("limit", 500, type=int), 5000)
+    events = _events.query(since=request.args.get("since", type=float),
+                           until=request.args.get("until", type=float),
+                           check=request.args.get("check") or None, limit=limit)
+    return jsonify({"events": events, "count": len(events), "log": _events.stats()})
+
+
+@app.route("/api/pihole")
+def api_pihole():
+    """Pi-hole query analytics from memory: ?top=N&hours=H (within the 24h window).
+
+    Refreshed by the pihole check, so it trails the database by up to one
+    check interval.
+    """
+    ftl = ftl_stats(SETTINGS.pihole_db)
+    if not ftl.stats["refreshes"]:
+        return jsonify({"error": f"no data read from {ftl.path} yet"}), 503
+    top = min(request.args.get("top", 10, type=int), 100)
+    return jsonify(ftl.report(top=top, hours=request.args.get("hours", type=int)))
+
+
+@app.route("/api/debug/profile", methods=["GET", "POST"])
+def api_debug_profile():
+    """Per-check and per-command timings, hung checks and the sampling profiler.
+
+    POST ?cycles=N[&interval_ms=5] samples the check threads for the next N
+    finished checks; POST ?cycles=0 stops early. GET returns everything.
+    """
+    if request.method == "POST":
+        cycles = request.args.get("cycles", 10, type=int)
+        if cycles <= 0:
+            _sampler.stop()
+        else:
+            interval = request.args.get("interval_ms", 5, type=float)
+            if not _sampler.start(cycles, interval=max(interval, 1) / 1000):
+                return jsonify({"error": "profiler already running",
+                                "profiler": _sampler.report(top=0)}), 409
+    now = time.monotonic()
+    with _in_flight_lock:
+        running = {name: [{"age_s": round(now - r["start"], 1), "cancelled": r["cancelled"],
+                           "processes": len(r["procs"])}
+                          for r in runs if not r["future"].done()]
+                   for name, runs in _in_flight.items()}
+    top = request.args.get("top", 25, type=int)
+    return jsonify({
+        "checks": _check_timings.summary(),
+        "subprocesses": _run_timings.summary(),
+        "in_flight": {name: runs for name, runs in running.items() if runs},
+        "profiler": _sampler.report(top=top),
+    })
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """Prometheus exposition, pre-built when results change; never runs a probe."""
+    return Response(_metrics_text, content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.route("/health")
 def health():
-    """Returns 200 if critical services OK, 503 otherwise (for Uptime Kuma)."""
-    data = get_cached_results()
-    critical_ok = (
-        data.get("vpn_main", {}).get("status") == "ok"
-        and data.get("docker", {}).get("status") != "error"
-    )
-    code = 200 if critical_ok else 503
-    return jsonify({"status": "ok" if critical_ok else "degraded",
-                    "checked_at": data.get("checked_at")}), code
+    """Returns 200 if critical services OK, 503 otherwise (for Uptime Kuma).
+
+    Served from the /health fast path's prebuilt verdict.
+    """
+    code, body = health_status()
+    return Response(body, status=code, mimetype="application/json")
 
 
 # ---------------------------------------------------------------------------
@@ -852,11 +2138,23 @@ def health():
 # ---------------------------------------------------------------------------
 
 if __name__ == "__main__":
-    # Seed cache immediately in background
-    t = threading.Thread(target=background_refresher, daemon=True)
-    t.start()
-
-    # Do one immediate fetch so first page load isn't empty
-    threading.Thread(target=lambda: get_cached_results(), daemon=True).start()
-
-    app.run(host="0.0.0.0", port=8088, debug=False, threaded=True)
+    if DOCKER_EVENTS:
+        _docker_watch = docker_api.ContainerWatcher(_docker).start()
+
+    # Reload checks.json on SIGHUP or when the file changes; results and
+    # history of checks that remain are kept
+    signal.signal(signal.SIGHUP, lambda signum, frame: threading.Thread(
+        target=reload_config, args=("SIGHUP",), daemon=True).start())
+    config.ConfigWatcher(CONFIG_PATH, lambda: reload_config("file changed"),
+                         poll=CONFIG_POLL).start()
+
+    if "--async" in sys.argv[1:]:
+        # Checks and the hot routes on one event loop (see aioserve.py);
+        # aioserve does `import app`, which must find this module, not a copy
+        sys.modules["app"] = sys.modules[__name__]
+        import aioserve
+        aioserve.serve(host="0.0.0.0", port=8088)
+    else:
+        # Start per-check schedules (each seeds its own cache entry)
+        background_refresher()
+        app.run(host="0.0.0.0", port=8088, debug=False, threaded=True)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the reTerminal button pipeline (button_pipeline.py)
+with synthetic key events.
+
+    python3 bench/bench_buttons.py [--presses 8] [--gap-ms 150] [--action-ms 3000,5]
+                                   [--script ../../scripts/hardware/button_pipeline.py]
+
+Replays a burst of `--presses` presses on random buttons, `--gap-ms`
+apart, in real time. Each action sleeps for `--action-ms`: 3000 is a
+Chromium cold start, 5 a tab switch. It reports how many actions ran, how
+long until the last button's page was up, and whether that page was the
+last one pressed. It compares this with the old handler, which slept a
+second inline for every press before cold-starting the browser. A second
+replay checks decoding alone: a bounce, a long press and a chord, bound
+through a config file that must leave the other keys at their defaults.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCRIPT_PATHS = (os.path.join(HERE, "..", "..", "..", "scripts", "hardware", "button_pipeline.py"),
+                os.path.expanduser("~/button_pipeline.py"))
+
+DECODING = [   # (seconds, key, value): expected actions in EXPECTED
+    (0.000, "F1", 1), (0.060, "F1", 0),
+    (0.200, "F2", 1), (0.204, "F2", 0), (0.209, "F2", 1), (0.260, "F2", 0),   # contact bounce
+    (0.500, "O", 1), (1.600, "O", 0),                                         # held 1.1 s
+    (2.000, "F1", 1), (2.060, "F3", 1), (2.200, "F1", 0), (2.210, "F3", 0),   # F1+F3 together
+    (3.000, "F3", 1), (3.300, "F3", 0),
+]
+BINDINGS = {"long_press": {"O": "relaunch"}, "chords": {"F1+F3": "relaunch"}}
+EXPECTED = [("F1", "dashboard"), ("F2", "homeassistant"), ("O (long)", "relaunch"),
+            ("F1+F3", "relaunch"), ("F3", "pihole")]
+
+
+def load_pipeline(path):
+    spec = importlib.util.spec_from_file_location("button_pipeline", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def burst(pipeline, presses, gap, action_s, rng):
+    ran = []
+    lock = threading.Lock()
+
+    def perform(name):
+        time.sleep(action_s)
+        with lock:
+            ran.append((name, time.time()))
+
+    dispatcher = pipeline.Dispatcher(perform, log=lambda msg: None)
+    decoder = pipeline.Decoder(pipeline.load_bindings(None))
+    keys = [rng.choice(list(pipeline.KEY_CODES)) for _ in range(presses)]
+    events = []
+    for i, key in enumerate(keys):
+        events += [(i * gap, key, 1), (i * gap + 0.05, key, 0)]
+    start = time.time()
+    pipeline.replay(events, decoder, dispatcher, speed=1.0)
+    dispatcher.wait_idle()
+    dispatcher.stop()
+    last_pressed = decoder.press[pipeline.key_code(keys[-1])]
+    last_at = start + (presses - 1) * gap
+    # The old handler: each press held up the read loop for pkill and a
+    # one-second sleep, then the last browser started from scratch
+    done = 0.0
+    for i in range(presses):
+        done = max(done, i * gap) + 1.0
+    done += action_s
+    return {
+        "actions": len(ran),
+        "collapsed": dispatcher.stats["collapsed"],
+        "last_ms": (ran[-1][1] - last_at) * 1000,
+        "last_ok": ran[-1][0] == last_pressed,
+        "old_last_ms": (done - (presses - 1) * gap) * 1000,
+        "p50_ms": sorted(dispatcher.latencies)[len(dispatcher.latencies) // 2],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--presses", type=int, default=8)
+    parser.add_argument("--gap-ms", type=float, default=150)
+    parser.add_argument("--action-ms", default="3000,5", help="comma-separated action durations")
+    parser.add_argument("--script", default=next((p for p in SCRIPT_PATHS if os.path.exists(p)),
+                                                 SCRIPT_PATHS[0]))
+    args = parser.parse_args()
+    pipeline = load_pipeline(args.script)
+    rng = random.Random(1)
+    ok = True
+
+    print(f"{args.presses} presses {args.gap_ms:.0f} ms apart")
+    for action_ms in (float(ms) for ms in args.action_ms.split(",")):
+        r = burst(pipeline, args.presses, args.gap_ms / 1000, action_ms / 1000, rng)
+        ok &= r["last_ok"]
+        print(f"  action {action_ms:6.0f} ms: {r['actions']} run, {r['collapsed']} collapsed, "
+              f"last page up {r['last_ms']:.0f} ms after its press "
+              f"({'the last pressed' if r['last_ok'] else 'WRONG PAGE'}), "
+              f"p50 {r['p50_ms']:.0f} ms; old handler {r['old_last_ms']:.0f} ms")
+
+    # Config files only list what they change; the other bindings keep their defaults
+    config = os.path.join(tempfile.mkdtemp(), "button_actions.json")
+    with open(config, "w") as f:
+        json.dump(BINDINGS, f)
+    bindings = pipeline.load_bindings(config, actions=pipeline.ACTIONS)
+    merged = bindings["press"] == pipeline.DEFAULT_BINDINGS["press"]
+    with open(config, "w") as f:
+        json.dump({"press": {"F2": "homeassistnat"}}, f)
+    try:
+        pipeline.load_bindings(config, actions=pipeline.ACTIONS)
+        rejected = False
+    except ValueError:
+        rejected = True
+    ok &= merged and rejected
+    print(f"  config: defaults {'kept' if merged else 'LOST'} under a partial file, "
+          f"misspelt action {'rejected' if rejected else 'ACCEPTED'} on load")
+
+    dispatcher = pipeline.Dispatcher(lambda name: None, log=lambda msg: None)
+    decoder = pipeline.Decoder(bindings)
+    got = [(a.trigger, a.name) for a in pipeline.replay(DECODING, decoder, dispatcher)]
+    dispatcher.wait_idle()
+    dispatcher.stop()
+    ok &= got == EXPECTED
+    print(f"  decoding: {'ok' if got == EXPECTED else f'got {got}'} ({decoder.stats})")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the Health Dashboard: full refresh cycles and the
+HTTP endpoints, run against the local fakes in bench/fakes.py (fake
+binaries on PATH, stub DNS servers, a fake Docker socket and a fake
+ipinfo/Orbi HTTP server), so it runs on any Linux box.
+
+    python3 bench/bench_checks.py [--cycles 10] [--latency 0.02]
+                                  [--fail docker,dns,http,systemctl:hang]
+                                  [--clients 8] [--seconds 5] [--live] [--async]
+
+Reports refresh-cycle wall time, CPU time (own + children), forks per
+cycle, and req/s with p50/p99 latency for /, /api and /health under
+concurrent keep-alive clients. --live keeps the per-check schedules running
+while the endpoints are measured. --async runs the cycles, schedules and
+server on an aioserve event loop instead of the worker pool and werkzeug.
+"""
+
+import argparse
+import asyncio
+import http.client
+import os
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import aioserve  # noqa: E402
+import app as dashboard  # noqa: E402
+import fakes  # noqa: E402
+from werkzeug.serving import WSGIRequestHandler, make_server  # noqa: E402
+
+
+def apply_failures(f, spec):
+    """--fail items: docker, http, dns[:servfail|drop], or <binary>[:error|hang]."""
+    bins = {}
+    for item in filter(None, (spec or "").split(",")):
+        name, _, mode = item.partition(":")
+        if name == "docker":
+            f.docker.fail = True
+        elif name == "http":
+            f.http.fail = True
+        elif name == "dns":
+            for stub in f.dns.values():
+                stub.mode = mode or "drop"
+        elif name in fakes.FAKE_BINARIES:
+            bins[name] = mode or "error"
+        else:
+            raise SystemExit(f"unknown --fail item: {item}")
+    if bins:
+        f.bin.configure(latency=f.docker.latency, fail=bins)
+
+
+def forks():
+    return sum(dashboard._subprocesses.value(result=r) for r in ("ok", "error", "timeout"))
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] if ordered else 0.0
+
+
+def bench_cycles(f, cycles, loop=None):
+    """Run run_all_checks() `cycles` times; publish each result like the schedules do.
+
+    With an event loop, the cycles run as aioserve.run_all_checks() on it.
+    """
+    rows = []
+    for _ in range(cycles):
+        t0, cpu0, kids0 = time.perf_counter(), time.process_time(), os.times()
+        forks0, execs0 = forks(), f.bin.calls()
+        if loop is None:
+            results = dashboard.run_all_checks()
+        else:
+            results = asyncio.run_coroutine_threadsafe(aioserve.run_all_checks(), loop).result()
+        wall = time.perf_counter() - t0
+        kids1 = os.times()
+        rows.append({
+            "wall": wall,
+            "cpu": time.process_time() - cpu0,
+            "child_cpu": (kids1.children_user - kids0.children_user
+                          + kids1.children_system - kids0.children_system),
+            "forks": forks() - forks0,
+            "execs": f.bin.calls() - execs0,
+            "statuses": {n: results[n]["status"] for n in dashboard.CHECKS if n in results},
+        })
+        for name in dashboard.CHECKS:
+            if name in results:
+                dashboard.store_result(name, results[name])
+    return rows
+
+
+class KeepAliveHandler(WSGIRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def serve():
+    server = make_server("127.0.0.1", 0, dashboard.app, threaded=True,
+                         request_handler=KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="bench-http").start()
+    return server.server_port, server.shutdown
+
+
+def start_loop():
+    loop = aioserve.new_loop()
+    threading.Thread(target=loop.run_forever, daemon=True, name="bench-loop").start()
+    return loop
+
+
+def serve_async(loop):
+    server = asyncio.run_coroutine_threadsafe(
+        aioserve.start_server("127.0.0.1", 0), loop).result()
+    return server.sockets[0].getsockname()[1], lambda: loop.call_soon_threadsafe(server.close)
+
+
+def bench_endpoint(port, path, clients, seconds):
+    """Hammer one path from `clients` keep-alive connections; return (rps, p50, p99, errors)."""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        mine = []
+        while time.perf_counter() < stop:
+            t = time.perf_counter()
+            try:
+                conn.request("GET", path)
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status not in (200, 503):
+                    errors[0] += 1
+            except (OSError, http.client.HTTPException):
+                errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                continue
+            mine.append(time.perf_counter() - t)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return (len(latencies) / elapsed, percentile(latencies, 50) * 1000,
+            percentile(latencies, 99) * 1000, errors[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds added to every fake response / binary")
+    parser.add_argument("--fail", default="", help="comma-separated failure modes")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--live", action="store_true",
+                        help="run the check schedules while measuring endpoints")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="run checks and the server on an aioserve event loop")
+    args = parser.parse_args()
+
+    f = fakes.install(dashboard, latency=args.latency)
+    apply_failures(f, args.fail)
+
+    loop = start_loop() if args.use_async else None
+    print(f"refresh cycles (x{args.cycles}, latency {args.latency * 1000:.0f} ms, "
+          f"fail={args.fail or 'none'}{', asyncio' if loop else ''})")
+    rows = bench_cycles(f, args.cycles, loop)
+    walls = sorted(r["wall"] for r in rows)
+    n = len(rows)
+    print(f"  wall      p50 {percentile(walls, 50) * 1000:8.1f} ms   "
+          f"max {walls[-1] * 1000:8.1f} ms   (first {rows[0]['wall'] * 1000:.1f} ms)")
+    print(f"  cpu       {sum(r['cpu'] for r in rows) / n * 1000:8.1f} ms/cycle own, "
+          f"{sum(r['child_cpu'] for r in rows) / n * 1000:.1f} ms/cycle children")
+    print(f"  forks     {sum(r['forks'] for r in rows) / n:8.1f} run()/cycle, "
+          f"{sum(r['execs'] for r in rows) / n:.1f} fake-binary execs/cycle")
+    print("  statuses  " + " ".join(f"{k}={v}" for k, v in rows[-1]["statuses"].items()))
+
+    if args.live:
+        dashboard.background_refresher(
+            starter=aioserve.loop_starter(loop) if loop else None,
+            health_starter=aioserve.health_starter(loop) if loop else None)
+    port, shutdown = serve_async(loop) if loop else serve()
+    print(f"\nendpoints ({args.clients} clients x {args.seconds:g}s"
+          f"{', schedules running' if args.live else ''})")
+    print(f"  {'path':10} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for path in ("/", "/api", "/health"):
+        rps, p50, p99, errors = bench_endpoint(port, path, args.clients, args.seconds)
+        print(f"  {path:10} {rps:10.0f} {p50:8.2f} {p99:8.2f} {errors:7d}")
+    shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for ftlstats.py against FakeFtlDb (bench/fakes.py).
+
+    python3 bench/bench_ftl.py [--days 7] [--per-day 150000] [--step 2500]
+                               [--refreshes 20]
+
+Fills a pihole-FTL.db with `--days` of synthetic queries (FTLCONF_MAXDBDAYS
+is 7). After the first refresh, which backfills the last 24h, it appends
+`--step` rows before each further refresh, the way FTL's once-a-minute
+write does. It reports the time per refresh next to a full GROUP BY scan of
+the same window, then doubles the file and measures again. Incremental
+refreshes should cost the same at both sizes.
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import fakes  # noqa: E402
+import ftlstats  # noqa: E402
+
+
+def full_scan(path, since):
+    """What recomputing from scratch costs: top domains and blocked count over the window."""
+    start = time.perf_counter()
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.execute("SELECT domain, COUNT(*) AS n FROM query_storage WHERE timestamp >= ? "
+                 "GROUP BY domain ORDER BY n DESC LIMIT 10", (since,)).fetchall()
+    conn.execute("SELECT COUNT(*), SUM(status IN (1,4,5,6,7,8,9,10,11,15,16)) FROM query_storage "
+                 "WHERE timestamp >= ?", (since,)).fetchone()
+    conn.close()
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(db, args, label):
+    stats = ftlstats.FtlStats(db.path)
+    now = time.time()
+    t0 = time.perf_counter()
+    stats.refresh(now)
+    while stats.stats["last_rows"] == ftlstats.MAX_ROWS:   # large window: catch up
+        stats.refresh(now)
+    backfill = (time.perf_counter() - t0) * 1000
+    times, reports = [], []
+    for _ in range(args.refreshes):
+        db.append(args.step, now, now + 60)
+        now += 60
+        t0 = time.perf_counter()
+        stats.refresh(now)
+        times.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        report = stats.report(top=10, now=now)
+        reports.append((time.perf_counter() - t0) * 1000)
+    scan = full_scan(db.path, now - 86400)
+    print(f"{label}: {db.size_mb:.0f} MB, {report['queries']} queries in window, "
+          f"{report['blocked_pct']}% blocked, {report['rate_per_min']}/min")
+    print(f"  backfill   {backfill:8.1f} ms (first refresh, last 24h)")
+    print(f"  refresh    {statistics.median(times):8.2f} ms median, {max(times):.2f} max "
+          f"({args.step} new rows each)")
+    print(f"  report     {statistics.median(reports):8.2f} ms median (top 10, 24h)")
+    print(f"  full scan  {scan:8.1f} ms (GROUP BY over the same window)")
+    stats.close()
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--per-day", type=int, default=150_000)
+    parser.add_argument("--step", type=int, default=2500, help="rows appended per refresh")
+    parser.add_argument("--refreshes", type=int, default=20)
+    args = parser.parse_args()
+
+    db = fakes.FakeFtlDb()
+    now = time.time()
+    db.append(args.days * args.per_day, now - args.days * 86400, now)
+    # The same rows after as many days of older history: twice the file, same last 24h
+    big = fakes.FakeFtlDb(seed=2)
+    big.append(args.days * args.per_day, now - 2 * args.days * 86400, now - args.days * 86400)
+    conn = sqlite3.connect(big.path)
+    conn.execute("ATTACH ? AS cur", (db.path,))
+    conn.execute("INSERT INTO query_storage (timestamp, type, status, domain, client, forward) "
+                 "SELECT timestamp, type, status, domain, client, forward FROM cur.query_storage "
+                 "ORDER BY id")
+    conn.commit()
+    conn.close()
+
+    small = measure(db, args, f"{args.days} days")
+    big = measure(big, args, f"{2 * args.days} days")
+    print(f"incremental refresh: {big / small:.2f}x at twice the size")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
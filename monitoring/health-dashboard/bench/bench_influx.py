@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for influxwriter.py against FakeInflux (bench/fakes.py).
+
+    python3 bench/bench_influx.py [--points 20000] [--rate 2000] [--outage 3]
+                                  [--batch 500] [--flush 1] [--no-gzip]
+
+Feeds `--points` system_vitals-style lines at `--rate` per second. The
+fake's listener is closed for `--outage` seconds mid-run and then reopened.
+It reports batches, connections, bytes on the wire, spool activity and
+time to drain, and checks that every line arrived exactly once, in order.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import fakes  # noqa: E402
+import influxwriter  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--rate", type=float, default=2000, help="lines added per second")
+    parser.add_argument("--outage", type=float, default=3.0,
+                        help="seconds InfluxDB is down, starting a third of the way in")
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--flush", type=float, default=1.0)
+    parser.add_argument("--no-gzip", dest="gzip", action="store_false")
+    args = parser.parse_args()
+
+    influx = fakes.FakeInflux()
+    spool_dir = tempfile.mkdtemp(prefix="influx-bench-")
+    writer = influxwriter.InfluxWriter(influx.url, batch_size=args.batch,
+                                       flush_interval=args.flush, compress=args.gzip,
+                                       spool_path=os.path.join(spool_dir, "bench.spool"),
+                                       timeout=2, name="bench").start()
+
+    sent = [f"system_vitals,host=bench,type=cpu cpu_usage={i % 100}.5 {1_700_000_000_000_000_000 + i}"
+            for i in range(args.points)]
+    down_at, up_at = len(sent) // 3, None
+    spool_peak = 0
+    t0 = time.perf_counter()
+    for i, line in enumerate(sent):
+        if i == down_at and args.outage > 0:
+            influx.stop()
+            up_at = time.perf_counter() + args.outage
+        if up_at is not None and time.perf_counter() >= up_at:
+            influx.start()
+            up_at = None
+        writer.add(line)
+        spool_peak = max(spool_peak, writer.spool.pending)
+        delay = t0 + (i + 1) / args.rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    if up_at is not None:
+        time.sleep(max(up_at - time.perf_counter(), 0))
+        influx.start()
+    fed = time.perf_counter()
+    while writer.spool.pending or len(influx.lines) < len(sent):
+        writer.flush()
+        if time.perf_counter() - fed > 30:
+            break
+        time.sleep(0.05)
+    drained = time.perf_counter()
+    writer.close()
+
+    st = writer.stats
+    raw = sum(len(s) + 1 for s in sent)
+    print(f"{len(sent)} lines at {args.rate:g}/s, batch {args.batch}, flush {args.flush:g}s, "
+          f"gzip {'on' if args.gzip else 'off'}, outage {args.outage:g}s")
+    print(f"  requests   {influx.requests:6d}  ({st['batches']} batches, {st['errors']} failed)")
+    print(f"  connections{len(influx.connections):6d}")
+    print(f"  bytes      {st['bytes_sent']:8d} on the wire for {raw} of line protocol "
+          f"({100 * st['bytes_sent'] / raw:.0f}%)")
+    print(f"  spool      {st['spooled']} batches spooled, {st['replayed']} replayed, "
+          f"peak {spool_peak} bytes")
+    print(f"  drain      {(drained - fed) * 1000:.0f} ms after the last add")
+    exact = influx.lines == sent
+    print(f"  delivery   {len(influx.lines)}/{len(sent)} lines, "
+          f"{'complete and in order' if exact else 'MISMATCH'}; dropped {st['dropped']}")
+    return 0 if exact else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the kiosk browser (kiosk_browser.py) against
+FakeDevTools (bench/fakes.py).
+
+    python3 bench/bench_kiosk.py [--presses 200] [--latency 0.002] [--startup 4]
+                                 [--script ../../scripts/hardware/kiosk_browser.py]
+
+Plays `--presses` random F1/F2/F3/O presses and reports the time per tab
+switch, with `--latency` added to each DevTools request (the Pi answers
+within a few ms). It then closes one tab and kills the browser to time
+the two recovery paths, and counts browser launches. `--startup` is how
+long a launched browser takes to answer, and what every press used to cost
+on top of the one-second sleep after pkill. Last, restart() (the relaunch
+button action) is run against fake browsers in child processes: one it
+adopted and one it launched. Both must be killed and replaced.
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import fakes  # noqa: E402
+
+SCRIPT_PATHS = (os.path.join(HERE, "..", "..", "..", "scripts", "hardware", "kiosk_browser.py"),
+                os.path.expanduser("~/kiosk_browser.py"))
+
+URLS = {
+    "dashboard": "http://localhost:3002/d/reterminal-system-vitals?kiosk=true&refresh=5s",
+    "homeassistant": "http://localhost:8123/lovelace",
+    "pihole": "http://localhost:8080/admin",
+    "homepage": "http://192.168.1.76:3000",
+}
+
+
+def load_kiosk(path):
+    spec = importlib.util.spec_from_file_location("kiosk_browser", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--presses", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.002, help="seconds per DevTools request")
+    parser.add_argument("--startup", type=float, default=4.0, help="seconds for a launch to answer")
+    parser.add_argument("--script", default=next((p for p in SCRIPT_PATHS if os.path.exists(p)),
+                                                 SCRIPT_PATHS[0]))
+    args = parser.parse_args()
+
+    kiosk = load_kiosk(args.script)
+    devtools = fakes.FakeDevTools(latency=args.latency, startup=args.startup)
+    browser = kiosk.KioskBrowser(URLS, port=devtools.port, profile=tempfile.mkdtemp(),
+                                 log=lambda msg: None)
+    browser._launch = devtools.start   # no real Chromium (and no pkill)
+
+    t0 = time.perf_counter()
+    browser.start()
+    print(f"cold start   {(time.perf_counter() - t0) * 1000:7.0f} ms: "
+          f"{len(devtools.pages)} tabs {sorted(devtools.pages.values())}")
+
+    rng = random.Random(1)
+    times, wrong = [], 0
+    for _ in range(args.presses):
+        name = rng.choice(list(URLS))
+        times.append(browser.show(name))
+        wrong += devtools.active_url != URLS[name]
+    times.sort()
+    print(f"switch       p50 {statistics.median(times):.1f} ms, "
+          f"p99 {times[int(len(times) * 0.99) - 1]:.1f} ms, max {times[-1]:.1f} ms "
+          f"over {len(times)} presses, {wrong} showed the wrong page")
+
+    # Someone closed a tab (or its renderer went away)
+    with devtools.lock:
+        del devtools.pages[browser.tabs["pihole"]]
+    ms = browser.show("pihole")
+    print(f"closed tab   {ms:7.1f} ms to reopen, showing {devtools.active_url}")
+
+    # control-kiosk.sh stop, or the browser crashed
+    devtools.stop()
+    ms = browser.show("homeassistant")
+    print(f"dead browser {ms:7.0f} ms to relaunch, showing {devtools.active_url}, "
+          f"{len(devtools.pages)} tabs")
+
+    print(f"launches     {devtools.launches} for {args.presses + 2} presses "
+          f"(was one per press, each >= {1000 + args.startup * 1000:.0f} ms)")
+    ok = wrong == 0 and devtools.active_url == URLS["homeassistant"] and len(devtools.pages) == 4
+    devtools.stop()
+    return 0 if ok and restart(kiosk, args) else 1
+
+
+def restart(kiosk, args):
+    """The relaunch action: restart() must kill a browser it adopted, and one it launched."""
+    port = fakes.FakeDevTools().port
+    browser = kiosk.KioskBrowser(URLS, port=port, profile=tempfile.mkdtemp(), log=lambda msg: None)
+    children = [fakes.FakeDevTools.spawn(port, args.startup)]
+
+    def launch():
+        children.append(fakes.FakeDevTools.spawn(port, args.startup))
+        browser.proc = children[-1]
+
+    browser._launch = launch   # a child process instead of Chromium (and no pkill of it)
+    ok = True
+    try:
+        while not browser.alive():
+            time.sleep(0.05)
+        browser.start()            # adopts the first child
+        browser.show("pihole")
+        ok = browser.stats["adopted"] == 1
+        for label in ("adopted", "launched"):
+            before = children[-1]
+            t0 = time.perf_counter()
+            try:
+                browser.restart()
+            except kiosk.KioskError as e:
+                print(f"restart      failed on the {label} browser: {e}")
+                return False
+            took = (time.perf_counter() - t0) * 1000
+            try:
+                gone = before.wait(timeout=5) is not None
+            except subprocess.TimeoutExpired:
+                gone = False
+            tabs = browser.status() or {}
+            ok &= gone and browser.current == "pihole" and len(tabs) == 4
+            print(f"restart      {took:7.0f} ms ({label} browser "
+                  f"{'killed' if gone else 'STILL RUNNING'}), {len(tabs)} tabs, "
+                  f"showing {browser.current}")
+    finally:
+        for child in children:
+            child.kill()
+            child.wait()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for pihole_db_maintenance.py against FakeFtlDb
+(bench/fakes.py), with a stand-in FTL writing to the database meanwhile.
+
+    python3 bench/bench_maintenance.py [--rows 3000000] [--days 14] [--keep 7]
+                                       [--convert] [--backup] [--max-lock-ms 50]
+                                       [--script ../../scripts/maintenance/pihole_db_maintenance.py]
+
+Builds a database of `--rows` queries over `--days` and runs the tool as a
+separate process to keep the last `--keep` days. A thread writes a batch of
+rows every 100 ms, as FTL does (far more often, to catch stalls), and
+records how long each write waited for the lock. For comparison it then
+times a full VACUUM of a copy, which is what cleanup_database.sh ran with
+Pi-hole stopped.
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import fakes  # noqa: E402
+
+SCRIPT_PATHS = (os.path.join(HERE, "..", "..", "..", "scripts", "maintenance",
+                             "pihole_db_maintenance.py"),
+                os.path.expanduser("~/pihole_db_maintenance.py"))
+
+
+class FtlWriter(threading.Thread):
+    """Insert a few rows every `interval` seconds and record each write's wall time."""
+
+    def __init__(self, path, interval=0.1, rows=20):
+        super().__init__(daemon=True)
+        self.path = path
+        self.interval = interval
+        self.rows = rows
+        self.waits = []
+        self.errors = 0
+        self.stop = threading.Event()
+
+    def run(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        while not self.stop.wait(self.interval):
+            now = int(time.time())
+            start = time.perf_counter()
+            try:
+                conn.executemany(
+                    "INSERT INTO query_storage (timestamp, type, status, domain, client, forward) "
+                    "VALUES (?, 1, 2, 1, 1, 1)", [(now,)] * self.rows)
+                conn.commit()
+            except sqlite3.OperationalError:
+                self.errors += 1
+                conn.rollback()
+                continue
+            self.waits.append((time.perf_counter() - start) * 1000)
+        conn.close()
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--days", type=float, default=14)
+    parser.add_argument("--keep", type=float, default=7)
+    parser.add_argument("--convert", action="store_true",
+                        help="switch to auto_vacuum=INCREMENTAL first (one full VACUUM)")
+    parser.add_argument("--backup", action="store_true")
+    parser.add_argument("--max-lock-ms", type=float, default=50)
+    parser.add_argument("--script", default=next((p for p in SCRIPT_PATHS if os.path.exists(p)),
+                                                 SCRIPT_PATHS[0]))
+    args = parser.parse_args()
+
+    db = fakes.FakeFtlDb()
+    t0 = time.perf_counter()
+    now = time.time()
+    db.append(args.rows, now - args.days * 86400, now)
+    print(f"{args.rows} rows over {args.days:g} days: {db.size_mb:.0f} MB "
+          f"(built in {time.perf_counter() - t0:.0f}s)")
+    if args.convert:
+        # Convert up front so the run itself shows the steady state
+        conn = sqlite3.connect(db.path)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        conn.close()
+    size_mb = db.size_mb
+    copy = db.path + ".vacuum-copy"
+    shutil.copy(db.path, copy)
+
+    writer = FtlWriter(db.path)
+    writer.start()
+    cmd = [sys.executable, args.script, "--db", db.path, "--days", str(args.keep),
+           "--max-lock-ms", str(args.max_lock_ms), "--no-dns-probe"]
+    if args.backup:
+        cmd += ["--backup", db.path + ".backup"]
+    t0 = time.perf_counter()
+    subprocess.run(cmd, check=True)
+    took = time.perf_counter() - t0
+    writer.stop.set()
+    writer.join()
+
+    print(f"maintenance  {took:.1f}s, {len(writer.waits)} concurrent FTL writes: "
+          f"p50 {pct(writer.waits, 0.5):.1f} ms, p99 {pct(writer.waits, 0.99):.1f} ms, "
+          f"max {max(writer.waits, default=0):.1f} ms, {writer.errors} failed")
+
+    # What cleanup_database.sh did with Pi-hole stopped: one full VACUUM
+    conn = sqlite3.connect(copy)
+    t0 = time.perf_counter()
+    conn.execute("VACUUM")
+    conn.close()
+    print(f"full VACUUM  {time.perf_counter() - t0:.1f}s holding the database exclusively "
+          f"(the old script also stopped Pi-hole and copied {size_mb:.0f} MB first)")
+    os.remove(copy)
+    return 0 if writer.errors == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
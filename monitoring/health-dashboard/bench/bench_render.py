@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Render-path benchmark for the Health Dashboard.
+Compares the old per-request path (render_template_string + jsonify) with
+the version-keyed response cache, for `/` and `/api`, in-process through
+Flask's test client so only server-side cost is measured.
+
+    python3 bench/bench_render.py [--seconds 3]
+
+Run it on the Pi itself for Pi-class numbers.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as dashboard  # noqa: E402
+import eventlog  # noqa: E402
+from flask import jsonify, render_template_string  # noqa: E402
+
+
+def sample_results():
+    """Publish one realistic result per check so every card renders fully."""
+    dashboard._events = eventlog.EventLog(tempfile.mkdtemp(prefix="bench-events-"))
+    containers = {n: "Up 3 days" for n in dashboard.SETTINGS.expected_containers}
+    samples = {
+        "vpn_main": {"status": "ok", "msg": "US exit 203.0.113.7 via tun0",
+                     "details": {"tun0_ip": "10.8.0.2", "tun0_peer": "10.8.0.1",
+                                 "routes": ["0.0.0.0/1 via 10.8.0.1 dev tun0",
+                                            "128.0.0.0/1 via 10.8.0.1 dev tun0"],
+                                 "exit_ip": "203.0.113.7", "exit_country": "US",
+                                 "exit_city": "Dallas"}},
+        "vpn_uk": {"status": "ok", "msg": "UK exit 198.51.100.4 via tun1",
+                   "details": {"tun1_ip": "10.9.0.2", "tun1_peer": "10.9.0.1",
+                               "appletv_rule": "100:\tfrom 192.168.1.23 lookup ukvpn",
+                               "ukvpn_route": "default via 10.9.0.1 dev tun1",
+                               "exit_ip": "198.51.100.4", "exit_country": "GB",
+                               "exit_city": "London"}},
+        "proxy": {"status": "ok", "msg": "Proxy working → 203.0.113.7 (US)",
+                  "details": {"listening": "port 1080 open", "proxy_exit_ip": "203.0.113.7",
+                              "proxy_country": "US"}},
+        "pihole": {"status": "ok", "msg": "DNS OK | 48211 queries today, 9120 blocked",
+                   "details": {"dns_resolution": "OK (142.250.66.46, 812 µs)",
+                               "upstream_dns": ["185.37.37.37", "185.37.39.39"],
+                               "queries_today": 48211, "blocked_today": 9120}},
+        "smartdns": {"status": "ok", "msg": "Both Unlocator SmartDNS servers reachable",
+                     "details": {"primary (185.37.37.37)": "UP — responded with 1.2.3.4 in 21000 µs",
+                                 "secondary (185.37.39.39)": "UP — responded with 1.2.3.4 in 23000 µs"}},
+        "docker": {"status": "ok", "msg": f"All {len(containers)} containers running",
+                   "details": containers},
+        "systemd": {"status": "ok", "msg": "No failed systemd units", "details": {"failed": []}},
+        "system": {"status": "ok", "msg": "Temp 52.1°C | Mem 61% | Disk 40%",
+                   "details": {"cpu_temp": "52.1°C", "memory": "61.0% used",
+                               "disk_root": "40.0% used", "load": "0.80 0.75 0.70"}},
+        "orbi": {"status": "ok", "msg": "Router + 2 satellites all UP | Router RTT 1.2ms",
+                 "details": {name: {"ip": ip, "status": "UP", "rtt": "1.2ms", "loss": "0%"}
+                             for ip, name in dashboard.SETTINGS.orbi_devices.items()}},
+    }
+    for name, result in samples.items():
+        result.update(checked_at="2026-01-01 00:00:00", duration_ms=1.0)
+        dashboard.store_result(name, result)
+
+
+def legacy_routes():
+    """The pre-cache handlers, mounted under /_legacy for comparison."""
+
+    @dashboard.app.route("/_legacy/")
+    def legacy_page():
+        return render_template_string(dashboard.HTML, data=dashboard.get_cached_results(),
+                                      card=dashboard._card_macro, checks=dashboard.CHECKS)
+
+    @dashboard.app.route("/_legacy/api")
+    def legacy_api():
+        return jsonify(dashboard.get_cached_results())
+
+
+def measure(client, path, seconds, headers=None):
+    lat = []
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        t = time.perf_counter()
+        r = client.get(path, headers=headers or {})
+        r.get_data()
+        lat.append(time.perf_counter() - t)
+    lat.sort()
+    return len(lat) / seconds, lat[int(len(lat) * 0.99) - 1] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    sample_results()
+    legacy_routes()
+    client = dashboard.app.test_client()
+    etag = client.get("/").headers["ETag"]
+    api_etag = client.get("/api").headers["ETag"]
+
+    cases = [
+        ("/  before (render_template_string)", "/_legacy/", None),
+        ("/  after  (cached)", "/", None),
+        ("/  after  (cached, gzip)", "/", {"Accept-Encoding": "gzip"}),
+        ("/  after  (304 If-None-Match)", "/", {"If-None-Match": etag}),
+        ("/api before (jsonify)", "/_legacy/api", None),
+        ("/api after  (cached)", "/api", None),
+        ("/api after  (304 If-None-Match)", "/api", {"If-None-Match": api_etag}),
+    ]
+    print(f"{'case':40} {'req/s':>10} {'p99 ms':>8}")
+    for label, path, headers in cases:
+        rps, p99 = measure(client, path, args.seconds, headers)
+        print(f"{label:40} {rps:10.0f} {p99:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the Pi-hole webhook against FakePihole (bench/fakes.py).
+
+    python3 bench/bench_webhook.py [--taps 8] [--rounds 5] [--latency 0.3]
+                                   [--durations 10,30,60] [--api v6|v5] [--serial]
+                                   [--script ../../scripts/system/pihole-webhook.py]
+
+The webhook picks its backend as it does at startup; with no Pi-hole
+config files to read, it has to recognise the `--api` version of the
+fake by asking it. Each round, `--taps` clients hit /?duration=N at the
+same moment, with N cycled from `--durations`. It reports backend calls
+per round, response latency, and whether the Pi-hole timer ended up
+covering the longest duration asked for; then reads /status. Halfway
+through, the fake drops its sessions as an FTL restart does, so a v6
+webhook has to log in again. `--serial` serves requests one at a time,
+as the webhook used to.
+"""
+
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import fakes  # noqa: E402
+
+SCRIPT_PATHS = (os.path.join(HERE, "..", "..", "..", "scripts", "system", "pihole-webhook.py"),
+                os.path.expanduser("~/pihole-webhook/webhook.py"))
+
+
+def load_webhook(path):
+    spec = importlib.util.spec_from_file_location("pihole_webhook", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def get(port, path):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    start = time.perf_counter()
+    conn.request("GET", path)
+    resp = conn.getresponse()
+    body = json.loads(resp.read())
+    conn.close()
+    return resp.status, body, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--taps", type=int, default=8, help="simultaneous requests per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per Pi-hole API call")
+    parser.add_argument("--durations", default="10,30,60")
+    parser.add_argument("--api", choices=("v6", "v5"), default="v6")
+    parser.add_argument("--serial", action="store_true")
+    parser.add_argument("--script", default=next((p for p in SCRIPT_PATHS if os.path.exists(p)),
+                                                 SCRIPT_PATHS[0]))
+    args = parser.parse_args()
+    durations = [int(d) for d in args.durations.split(",")]
+
+    webhook = load_webhook(args.script)
+    pihole = fakes.FakePihole(version=args.api, latency=args.latency)
+    webhook.PIHOLE_TOML = webhook.SETUP_VARS = os.path.join(HERE, "missing")
+    backend, why = webhook.make_backend("api", pihole.url, token=pihole.token,
+                                        password=pihole.password)
+    print(f"backend      {backend.name}: {why}")
+    webhook.PiHoleWebhook.coalescer = webhook.DisableCoalescer(backend)
+    webhook.PiHoleWebhook.log_message = lambda *a: None
+    server_cls = webhook.SerialServer if args.serial else webhook.Server
+    server = server_cls(("127.0.0.1", 0), webhook.PiHoleWebhook)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    latencies, failures, covered = [], 0, 0
+    calls_before = 0
+    print(f"{args.taps} taps x {args.rounds} rounds, API latency {args.latency * 1000:.0f} ms, "
+          f"{'serial' if args.serial else 'concurrent'} server")
+    for rnd in range(args.rounds):
+        pihole.until = webhook.PiHoleWebhook.coalescer.until = 0.0   # last round's timer ran out
+        if rnd == args.rounds // 2:
+            pihole.expire()
+        wanted = [durations[(rnd + i) % len(durations)] for i in range(args.taps)]
+        results = [None] * args.taps
+        gate = threading.Barrier(args.taps)
+
+        def tap(i):
+            gate.wait()
+            results[i] = get(port, f"/?duration={wanted[i]}")
+
+        threads = [threading.Thread(target=tap, args=(i,)) for i in range(args.taps)]
+        started = time.time()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        calls = pihole.calls[calls_before:]
+        calls_before = len(pihole.calls)
+        ok = all(code == 200 for code, _, _ in results)
+        failures += sum(code != 200 for code, _, _ in results)
+        latencies += [ms for _, _, ms in results]
+        cover = pihole.until - started >= max(wanted) - 1
+        covered += cover
+        print(f"  round {rnd + 1}: {len(calls)} API calls {calls}, slowest "
+              f"{max(ms for _, _, ms in results):.0f} ms, longest {max(wanted)}s "
+              f"{'covered' if cover else 'NOT covered'}{'' if ok else ', errors'}")
+
+    latencies.sort()
+    print(f"  latency    p50 {latencies[len(latencies) // 2]:.0f} ms, "
+          f"max {latencies[-1]:.0f} ms over {len(latencies)} requests")
+    print(f"  backend    {len(pihole.calls)} calls for {len(latencies)} requests, "
+          f"{len(pihole.connections)} connections, {pihole.logins} logins")
+    _, status, ms = get(port, "/status")
+    print(f"  /status    {status['blocking']}, {status['remaining']}s left ({ms:.1f} ms): "
+          f"{status['stats']}")
+    return 0 if failures == 0 and covered == args.rounds else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,727 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for everything the dashboard's checks talk to, so the
+benchmarks run on any Linux box with no Pi, router, VPN or Docker:
+
+  FakeBin      fake `ip`, `ss`, `dig`, `docker`, `ping`, `curl`, `systemctl`
+               on PATH (canned output, configurable latency/failure, exec log)
+  StubDNS      UDP DNS server answering A queries (delay, SERVFAIL or silence)
+  FakeDocker   Docker Engine API on a unix socket (containers, exec, events)
+  FakeHTTP     ipinfo.io / Orbi admin UI stand-in over plain HTTP
+  FakeInflux   InfluxDB 1.x /write endpoint (gzip bodies, 5xx/4xx, down/up)
+  FakePihole   Pi-hole v6 /api/dns/blocking (or v5 /admin/api.php) for the webhook
+  FakeFtlDb    pihole-FTL.db (v5 schema) and gravity.db with synthetic queries
+  FakeDevTools Chromium's DevTools /json endpoints, for the kiosk browser
+
+install(app, ...) starts them all and points a freshly imported app module
+at them. Latency and failure modes can be changed while running.
+"""
+
+import gzip
+import json
+import os
+import socket
+import random
+import socketserver
+import sqlite3
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+FAKE_BINARIES = ("ip", "ss", "dig", "docker", "ping", "curl", "systemctl")
+
+# ---------------------------------------------------------------------------
+# Fake binaries
+# ---------------------------------------------------------------------------
+
+# One script, linked under each name; behaviour comes from argv[0] and the
+# FAKEBIN_* environment, which FakeBin.configure() rewrites between runs.
+FAKEBIN_SCRIPT = r'''#!{python}
+import json, os, sys, time
+name = os.path.basename(sys.argv[0])
+cfg_path = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), "config.json")
+try:
+    with open(cfg_path) as f:
+        cfg = json.load(f)
+except (OSError, ValueError):
+    cfg = {{}}
+with open(os.path.join(os.path.dirname(cfg_path), "calls.log"), "a") as log:
+    log.write(name + "\n")
+time.sleep(cfg.get("latency", {{}}).get(name, cfg.get("default_latency", 0)))
+mode = cfg.get("fail", {{}}).get(name)
+if mode == "hang":
+    time.sleep(3600)
+if mode == "error":
+    sys.stderr.write(name + ": simulated failure\n")
+    sys.exit(1)
+out = {{
+    "systemctl": "",
+    "curl": json.dumps({{"ip": "203.0.113.9", "country": "US", "city": "Dallas", "org": "AS0 Bench"}}),
+    "dig": "1.2.3.4",
+    "ping": "2 packets transmitted, 2 received, 0% packet loss\nrtt min/avg/max/mdev = 1.0/1.2/1.4/0.2 ms",
+    "ip": "",
+    "ss": "",
+    "docker": "",
+}}.get(name, "")
+sys.stdout.write(out + ("\n" if out else ""))
+'''
+
+
+class FakeBin:
+    """A temp directory of fake binaries, prepended to PATH by activate()."""
+
+    def __init__(self, names=FAKE_BINARIES):
+        self.dir = tempfile.mkdtemp(prefix="healthdash-fakebin-")
+        script = os.path.join(self.dir, "fakebin")
+        with open(script, "w") as f:
+            f.write(FAKEBIN_SCRIPT.format(python=sys.executable))
+        os.chmod(script, os.stat(script).st_mode | stat.S_IEXEC)
+        for name in names:
+            os.symlink(script, os.path.join(self.dir, name))
+        self.log = os.path.join(self.dir, "calls.log")
+        self.configure()
+
+    def configure(self, latency=0.0, per_binary=None, fail=None):
+        """latency: seconds per exec; fail: {name: "error" | "hang"}."""
+        with open(os.path.join(self.dir, "config.json"), "w") as f:
+            json.dump({"default_latency": latency, "latency": per_binary or {},
+                       "fail": fail or {}}, f)
+
+    def activate(self):
+        os.environ["PATH"] = self.dir + os.pathsep + os.environ.get("PATH", "")
+        return self
+
+    def calls(self):
+        """Number of fake-binary executions so far."""
+        try:
+            with open(self.log) as f:
+                return sum(1 for _ in f)
+        except OSError:
+            return 0
+
+
+# ---------------------------------------------------------------------------
+# Stub DNS server
+# ---------------------------------------------------------------------------
+
+class StubDNS:
+    """UDP DNS server on 127.0.0.1 answering every A query with 1.2.3.4.
+
+    mode: "ok", "servfail", "nxdomain" or "drop" (never answer).
+    """
+
+    def __init__(self, delay=0.0, mode="ok", answer="1.2.3.4"):
+        self.delay, self.mode, self.answer = delay, mode, answer
+        self.queries = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._loop, daemon=True, name=f"stubdns-{self.port}").start()
+
+    def _loop(self):
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(512)
+            except OSError:
+                return
+            self.queries += 1
+            if self.mode == "drop":
+                continue
+            if self.delay:
+                threading.Timer(self.delay, self._reply, (data, addr)).start()
+            else:
+                self._reply(data, addr)
+
+    def _reply(self, data, addr):
+        rcode = {"servfail": 2, "nxdomain": 3}.get(self.mode, 0)
+        question = data[12:]
+        header = data[:2] + struct.pack("!HHHHH", 0x8180 | rcode, 1, 0 if rcode else 1, 0, 0)
+        answer = b"" if rcode else (b"\xc0\x0c" + struct.pack("!HHIH", 1, 1, 60, 4)
+                                     + socket.inet_aton(self.answer))
+        try:
+            self.sock.sendto(header + question + answer, addr)
+        except OSError:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# Fake Docker Engine API
+# ---------------------------------------------------------------------------
+
+SETUP_VARS = "PIHOLE_DNS_1=185.37.37.37\nPIHOLE_DNS_2=185.37.39.39\n"
+PIHOLE_STATS = json.dumps({"dns_queries_today": 48211, "ads_blocked_today": 9120,
+                           "domains_being_blocked": 152003})
+
+
+class _DockerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake = None
+
+    def log_message(self, *args):
+        pass
+
+    def address_string(self):
+        return "docker.sock"
+
+    def _json(self, obj, code=200):
+        body = json.dumps(obj).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        fake = self.fake
+        fake.requests += 1
+        time.sleep(fake.latency)
+        path = self.path.split("?")[0]
+        if fake.fail:
+            return self._json({"message": "simulated daemon error"}, 500)
+        if path.endswith("/containers/json"):
+            return self._json(fake.container_list())
+        if "/exec/" in path and path.endswith("/json"):
+            return self._json({"ExitCode": 0})
+        if path.endswith("/events"):
+            # Hold the stream open with no events, like an idle daemon
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.flush()
+            fake.closed.wait()
+            return
+        self._json({"message": "no such object"}, 404)
+
+    def do_POST(self):
+        fake = self.fake
+        fake.requests += 1
+        time.sleep(fake.latency)
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"null")
+        if fake.fail:
+            return self._json({"message": "simulated daemon error"}, 500)
+        if self.path.endswith("/exec"):
+            exec_id = f"exec{fake.requests}"
+            fake.execs[exec_id] = body["Cmd"]
+            return self._json({"Id": exec_id}, 201)
+        if self.path.endswith("/start"):
+            cmd = fake.execs.pop(self.path.split("/")[-2], [])
+            out = (SETUP_VARS if "setupVars.conf" in " ".join(cmd)
+                   else PIHOLE_STATS if cmd[:1] == ["pihole"] else "").encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.docker.multiplexed-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(struct.pack(">BxxxI", 1, len(out)) + out)
+            self.close_connection = True
+            return
+        self._json({"message": "no such object"}, 404)
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class FakeDocker:
+    """Engine API on a unix socket; every container in `names` is running."""
+
+    def __init__(self, names, latency=0.0):
+        self.names = list(names)
+        self.latency = latency
+        self.fail = False
+        self.requests = 0
+        self.execs = {}
+        self.closed = threading.Event()
+        self.path = os.path.join(tempfile.mkdtemp(prefix="healthdash-docker-"), "docker.sock")
+        handler = type("Handler", (_DockerHandler,), {"fake": self})
+        self.server = _UnixServer(self.path, handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True,
+                         name="fake-docker").start()
+
+    def container_list(self):
+        return [{"Id": f"{i:064x}", "Names": [f"/{n}"], "State": "running",
+                 "Status": "Up 3 days", "Image": f"{n}:latest"}
+                for i, n in enumerate(self.names)]
+
+    def close(self):
+        self.closed.set()
+        self.server.shutdown()
+
+
+# ---------------------------------------------------------------------------
+# Fake HTTP endpoints (ipinfo.io, Orbi admin UI)
+# ---------------------------------------------------------------------------
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake = None
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body=b""):
+        fake = self.fake
+        fake.requests += 1
+        time.sleep(fake.latency)
+        code = 503 if fake.fail else 200
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body) if code == 200 else 0))
+        self.end_headers()
+        return code == 200
+
+    def do_GET(self):
+        body = json.dumps({"ip": "203.0.113.9", "country": "US", "city": "Dallas",
+                           "org": "AS0 Bench"}).encode()
+        if self._reply(body):
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._reply()
+
+
+class FakeHTTP:
+    """Plain-HTTP server answering GET with an ipinfo-style body and HEAD with 200."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.fail = False
+        self.requests = 0
+        handler = type("Handler", (_HTTPHandler,), {"fake": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True,
+                         name="fake-http").start()
+
+
+class _InfluxHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake = None
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.fake.lock:
+            self.fake.sockets.add(self.connection)
+
+    def finish(self):
+        super().finish()
+        with self.fake.lock:
+            self.fake.sockets.discard(self.connection)
+
+    def do_POST(self):
+        fake = self.fake
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        time.sleep(fake.latency)
+        code = {"error": 500, "reject": 400}.get(fake.mode, 204)
+        with fake.lock:
+            fake.requests += 1
+            fake.connections.add(self.client_address)
+            if code == 204:
+                fake.lines.extend(body.decode().splitlines())
+        self.send_response(code)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class FakeInflux:
+    """InfluxDB /write stand-in that records every accepted line in order.
+
+    mode: "ok" (204), "error" (500) or "reject" (400). stop() closes the
+    listener so clients see connection refused; start() reopens the same port.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.mode = "ok"
+        self.lines = []
+        self.requests = 0
+        self.connections = set()   # client (ip, port) pairs seen; one per keep-alive connection
+        self.sockets = set()
+        self.lock = threading.Lock()
+        self.port = 0
+        self.server = None
+        self.start()
+        self.url = f"http://127.0.0.1:{self.port}/write?db=smarthome"
+
+    def start(self):
+        handler = type("Handler", (_InfluxHandler,), {"fake": self})
+        ThreadingHTTPServer.allow_reuse_address = True
+        self.server = ThreadingHTTPServer(("127.0.0.1", self.port), handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True,
+                         name="fake-influx").start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        with self.lock:
+            for sock in self.sockets:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+class _PiholeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_api("GET")
+
+    def do_POST(self):
+        self.handle_api("POST")
+
+    def handle_api(self, method):
+        fake = self.fake
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            data = json.loads(self.rfile.read(length)) if length else {}
+        except ValueError:
+            data = {}
+        time.sleep(fake.latency)
+        with fake.lock:
+            fake.requests += 1
+            fake.connections.add(self.client_address)
+            if fake.version == "v5":
+                code, body = fake.v5(url.path, parse_qs(url.query, keep_blank_values=True))
+            else:
+                code, body = fake.v6(method, url.path, self.headers.get("X-FTL-SID"), data)
+        body = json.dumps(body).encode() if body is not None else b"Not Found"
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakePihole:
+    """Pi-hole API stand-in, v6 (/api/auth, /api/dns/blocking) or v5 (/admin/api.php).
+
+    `calls` lists every disable duration it was sent. v6 sessions are
+    checked; expire() drops them as an FTL restart does, and `logins`
+    counts successful logins.
+    """
+
+    def __init__(self, version="v6", password="bench-password", token="bench-token",
+                 latency=0.0):
+        self.version = version
+        self.password = password
+        self.token = token
+        self.latency = latency
+        self.calls = []
+        self.until = 0.0
+        self.requests = 0
+        self.logins = 0
+        self.sessions = set()
+        self.connections = set()
+        self.lock = threading.Lock()
+        handler = type("Handler", (_PiholeHandler,), {"fake": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True,
+                         name="fake-pihole").start()
+
+    def expire(self):
+        with self.lock:
+            self.sessions.clear()
+
+    def _disable(self, seconds):
+        self.calls.append(seconds)
+        self.until = time.time() + seconds if seconds else float("inf")
+
+    def v5(self, path, query):
+        if path != "/admin/api.php":
+            return 404, None
+        if query.get("auth", [""])[0] != self.token:
+            return 200, []   # what Pi-hole answers to a wrong token
+        if "disable" in query:
+            self._disable(int(query["disable"][0] or 0))
+        elif "enable" in query:
+            self.until = 0.0
+        return 200, {"status": "disabled" if self.until > time.time() else "enabled"}
+
+    def v6(self, method, path, sid, data):
+        unauthorized = {"error": {"key": "unauthorized", "message": "Unauthorized"},
+                        "took": 0.0}
+        if path == "/api/auth":
+            if method != "POST" or data.get("password") != self.password:
+                return 401, {**unauthorized, "session": {"valid": False, "sid": None}}
+            sid = os.urandom(12).hex()
+            self.sessions.add(sid)
+            self.logins += 1
+            return 200, {"session": {"valid": True, "sid": sid, "validity": 1800}, "took": 0.0}
+        if path != "/api/dns/blocking":
+            return 404, None
+        if sid not in self.sessions:
+            return 401, unauthorized
+        if method == "POST":
+            if data.get("blocking") is False:
+                self._disable(int(data.get("timer") or 0))
+            elif data.get("blocking") is True:
+                self.until = 0.0
+        remaining = self.until - time.time()
+        return 200, {"blocking": "disabled" if remaining > 0 else "enabled",
+                     "timer": remaining if remaining > 0 else None, "took": 0.0}
+
+
+# ---------------------------------------------------------------------------
+# Pi-hole databases
+# ---------------------------------------------------------------------------
+
+FTL_SCHEMA = """
+CREATE TABLE query_storage (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp INTEGER NOT NULL,
+    type INTEGER NOT NULL, status INTEGER NOT NULL, domain INTEGER NOT NULL,
+    client INTEGER NOT NULL, forward INTEGER, additional_info INTEGER, reply_type INTEGER,
+    reply_time REAL, dnssec INTEGER);
+CREATE INDEX idx_queries_timestamps ON query_storage (timestamp);
+CREATE TABLE domain_by_id (id INTEGER PRIMARY KEY, domain TEXT NOT NULL);
+CREATE TABLE client_by_id (id INTEGER PRIMARY KEY, ip TEXT NOT NULL, name TEXT);
+CREATE TABLE forward_by_id (id INTEGER PRIMARY KEY, forward TEXT NOT NULL);
+CREATE TABLE counters (id INTEGER PRIMARY KEY NOT NULL, value INTEGER NOT NULL);
+"""
+
+
+class FakeFtlDb:
+    """A pihole-FTL.db with FTL v5's tables, filled with synthetic queries.
+
+    Domains and clients follow a skewed popularity, and about one query in
+    eight is blocked (gravity). append() adds rows the way FTL's periodic
+    database write does; a gravity.db with a gravity_count sits alongside.
+    """
+
+    def __init__(self, directory=None, domains=5000, clients=25, seed=1):
+        self.directory = directory or tempfile.mkdtemp(prefix="bench-ftl-")
+        self.path = os.path.join(self.directory, "pihole-FTL.db")
+        self.rng = random.Random(seed)
+        self.domains = domains
+        self.clients = clients
+        conn = sqlite3.connect(self.path)
+        conn.executescript(FTL_SCHEMA)
+        conn.executemany("INSERT INTO domain_by_id VALUES (?, ?)",
+                         ((i, f"d{i}.example.com") for i in range(1, domains + 1)))
+        conn.executemany("INSERT INTO client_by_id VALUES (?, ?, ?)",
+                         ((i, f"192.168.1.{100 + i}", f"device-{i}" if i % 3 else "")
+                          for i in range(1, clients + 1)))
+        conn.commit()
+        conn.close()
+        gravity = sqlite3.connect(os.path.join(self.directory, "gravity.db"))
+        gravity.executescript("CREATE TABLE info (property TEXT PRIMARY KEY, value TEXT NOT NULL);"
+                              "INSERT INTO info VALUES ('gravity_count', '123456');")
+        gravity.commit()
+        gravity.close()
+
+    def append(self, rows, start, end):
+        """Insert `rows` queries with timestamps spread evenly over [start, end)."""
+        rng, step = self.rng, (end - start) / max(rows, 1)
+        conn = sqlite3.connect(self.path)
+        conn.executemany(
+            "INSERT INTO query_storage (timestamp, type, status, domain, client, forward) "
+            "VALUES (?, 1, ?, ?, ?, 1)",
+            ((int(start + i * step), 1 if rng.random() < 0.125 else rng.choice((2, 3)),
+              min(int(rng.paretovariate(1.2)), self.domains), rng.randint(1, self.clients))
+             for i in range(rows)))
+        conn.commit()
+        conn.close()
+
+    @property
+    def size_mb(self):
+        return os.path.getsize(self.path) / 2**20
+
+
+# ---------------------------------------------------------------------------
+# Kiosk browser
+# ---------------------------------------------------------------------------
+
+class _DevToolsHandler(BaseHTTPRequestHandler):
+    fake = None
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, code, body):
+        body = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        fake = self.fake
+        time.sleep(fake.latency)
+        url = urlsplit(self.path)
+        with fake.lock:
+            fake.requests.append((self.command, url.path))
+            if url.path == "/json/version":
+                return self._reply(200, {"Browser": "FakeChrome/1.0"})
+            if url.path in ("/json", "/json/list"):
+                return self._reply(200, [{"id": i, "type": "page", "url": u}
+                                         for i, u in fake.pages.items()])
+            if url.path == "/json/new":
+                if self.command != "PUT":
+                    return self._reply(405, b"Using unsafe HTTP verb GET to invoke /json/new")
+                fake.next_id += 1
+                target = f"T{fake.next_id}"
+                fake.pages[target] = unquote(url.query) or "about:blank"
+                return self._reply(200, {"id": target, "type": "page", "url": fake.pages[target]})
+            action, _, target = url.path[len("/json/"):].partition("/")
+            if action in ("activate", "close") and target in fake.pages:
+                if action == "activate":
+                    fake.active = target
+                else:
+                    del fake.pages[target]
+                return self._reply(200, b"Target " + action.encode() + b"d")
+            return self._reply(404, b"No such target id: " + target.encode())
+
+    do_PUT = do_GET
+
+
+class FakeDevTools:
+    """A browser's remote debugging endpoint: tabs are a dict of id -> URL.
+
+    start() plays a browser launch (the endpoint answers after `startup`
+    seconds, with one blank page); stop() plays it crashing or being killed.
+    spawn() runs one in a child process whose command line carries
+    --remote-debugging-port, so it can be found and killed like Chromium.
+    """
+
+    def __init__(self, latency=0.0, startup=0.0, port=None):
+        self.latency = latency
+        self.startup = startup
+        self.lock = threading.Lock()
+        self.requests = []
+        self.launches = 0
+        self.server = None
+        if port is None:
+            sock = socket.socket()
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+            sock.close()
+        self.port = port
+
+    def start(self):
+        self.launches += 1
+        self.pages, self.active, self.next_id = {"T0": "about:blank"}, "T0", 0
+
+        def serve():
+            time.sleep(self.startup)
+            handler = type("Handler", (_DevToolsHandler,), {"fake": self})
+            self.server = ThreadingHTTPServer(("127.0.0.1", self.port), handler)
+            self.server.daemon_threads = True
+            self.server.serve_forever()
+
+        threading.Thread(target=serve, daemon=True, name="fake-devtools").start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    @property
+    def active_url(self):
+        return self.pages.get(self.active)
+
+    @staticmethod
+    def spawn(port, startup=0.0):
+        code = ("import sys, time; sys.path.insert(0, sys.argv[1]); import fakes; "
+                "fakes.FakeDevTools(startup=float(sys.argv[3]), port=int(sys.argv[2])).start(); "
+                "time.sleep(3600)")
+        return subprocess.Popen([sys.executable, "-c", code, os.path.dirname(os.path.abspath(__file__)),
+                                 str(port), str(startup), f"--remote-debugging-port={port}"])
+
+
+# ---------------------------------------------------------------------------
+# Wiring
+# ---------------------------------------------------------------------------
+
+class Fakes:
+    """Handles to every running fake, returned by install()."""
+
+    def __init__(self, **parts):
+        self.__dict__.update(parts)
+
+    def set_latency(self, seconds):
+        """Apply the same added latency to every fake."""
+        self.bin.configure(latency=seconds)
+        self.docker.latency = seconds
+        self.http.latency = seconds
+        for stub in self.dns.values():
+            stub.delay = seconds
+
+
+def install(app, latency=0.0):
+    """Start every fake and redirect the imported app module to them.
+
+    The Orbi devices become loopback addresses (answered by the kernel over
+    ICMP, or by a refused TCP connect), each DNS server the checks query gets
+    its own StubDNS, and the exit-IP and Orbi web URLs point at FakeHTTP.
+    Transition events go to a temporary directory, and the Pi-hole check
+    reads a FakeFtlDb holding the last day of queries.
+    """
+    import dnsprobe
+    import docker_api
+    import eventlog
+
+    fakes = Fakes(
+        bin=FakeBin().activate(),
+        docker=FakeDocker(app.SETTINGS.expected_containers, latency=latency),
+        http=FakeHTTP(latency=latency),
+        dns={ip: StubDNS(delay=latency)
+             for ip in ["127.0.0.1", *app.SETTINGS.expected_dns_servers]},
+        ftl=FakeFtlDb(),
+    )
+    fakes.ftl.append(20_000, time.time() - 86400, time.time())
+    fakes.bin.configure(latency=latency)
+
+    app._docker = docker_api.DockerClient(socket_path=fakes.docker.path)
+    app._events = eventlog.EventLog(tempfile.mkdtemp(prefix="bench-events-"))
+    app._exit_ip.url = fakes.http.url
+    app.EXIT_IP_URL = fakes.http.url
+    app.SETTINGS = app.SETTINGS._replace(
+        orbi_web_url=fakes.http.url, pihole_db=fakes.ftl.path,
+        orbi_devices={f"127.0.0.{i + 1}": name
+                      for i, name in enumerate(app.SETTINGS.orbi_devices.values())})
+
+    real_probe_servers = dnsprobe.probe_servers
+    real_probe_servers_async = dnsprobe.probe_servers_async
+
+    def remap(servers):
+        return {("127.0.0.1", fakes.dns[s].port): s for s in servers}
+
+    def unmap(targets, found):
+        return {targets[("127.0.0.1", int(label.rsplit(":", 1)[1]))]: v
+                for label, v in found.items()}
+
+    def probe_servers(servers, domains, timeout=3.0):
+        targets = remap(servers)
+        return unmap(targets, real_probe_servers(list(targets), domains, timeout=timeout))
+
+    async def probe_servers_async(servers, domains, timeout=3.0):
+        targets = remap(servers)
+        return unmap(targets, await real_probe_servers_async(list(targets), domains,
+                                                             timeout=timeout))
+
+    dnsprobe.probe_servers = probe_servers
+    dnsprobe.probe_servers_async = probe_servers_async
+    return fakes
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Check configuration for the Health Dashboard.
+Reads checks.json (site settings plus the ordered list of checks to run),
+validates it, and optionally watches it for changes so the dashboard can
+reload without a restart. Only the standard library is used, so a broken
+or missing config never stops the dashboard from starting with defaults.
+"""
+
+import json
+import os
+import threading
+
+SCHEDULE_KEYS = ("interval", "timeout", "jitter", "max_in_flight")
+ENTRY_KEYS = ("name", "type", "title") + SCHEDULE_KEYS
+DEFAULT_SCHEDULE = {"interval": 30, "timeout": 10, "jitter": 5}
+STATUSES = ("ok", "warn", "error")
+DEFAULT_HEALTH_SCHEDULE = {"interval": 5, "timeout": 2}
+
+
+class ConfigError(Exception):
+    """The config file is unreadable or fails validation."""
+
+
+def load(path, settings_defaults):
+    """Read a config file and parse() it."""
+    try:
+        with open(path) as f:
+            raw = json.load(f)
+    except OSError as e:
+        raise ConfigError(f"cannot read {path}: {e.strerror}") from e
+    except ValueError as e:
+        raise ConfigError(f"{path}: invalid JSON: {e}") from e
+    if not isinstance(raw, dict):
+        raise ConfigError(f"{path}: top level must be an object")
+    return parse(raw, settings_defaults)
+
+
+def parse(raw, settings_defaults):
+    """Validate a config dict.
+
+    Returns {"settings": {...}, "checks": [entry, ...], "health": {...} or None}
+    where each check entry has name, type, title, the schedule keys and
+    "options" (every other key, passed to the check type as keyword
+    arguments). Settings not in `settings_defaults` are rejected so typos
+    don't silently do nothing, and so is an empty list or dict for a
+    setting whose default has entries. See parse_health() for the
+    "health" section.
+    """
+    settings = dict(settings_defaults)
+    for key, value in (raw.get("settings") or {}).items():
+        if key not in settings_defaults:
+            raise ConfigError(f"unknown setting {key!r}")
+        if not isinstance(value, type(settings_defaults[key])):
+            raise ConfigError(f"setting {key!r} must be a {type(settings_defaults[key]).__name__}")
+        if isinstance(value, (list, dict)) and not value and settings_defaults[key]:
+            # The checks using it would have nothing to probe; remove them instead
+            raise ConfigError(f"setting {key!r} must not be empty")
+        settings[key] = value
+
+    checks, seen = [], set()
+    for i, item in enumerate(raw.get("checks") or []):
+        if isinstance(item, str):
+            item = {"name": item}
+        if not isinstance(item, dict) or not isinstance(item.get("name"), str):
+            raise ConfigError(f"checks[{i}]: needs a string 'name'")
+        name = item["name"]
+        if name in seen or name in ("version", "checked_at"):
+            raise ConfigError(f"checks[{i}]: duplicate or reserved name {name!r}")
+        seen.add(name)
+        entry = {"name": name, "type": item.get("type", name), "title": item.get("title"),
+                 **DEFAULT_SCHEDULE}
+        for key in SCHEDULE_KEYS:
+            if key in item:
+                value = item[key]
+                if not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+                    raise ConfigError(f"check {name!r}: {key} must be a non-negative number")
+                entry[key] = value
+        if entry["interval"] <= 0 or entry["timeout"] <= 0:
+            raise ConfigError(f"check {name!r}: interval and timeout must be positive")
+        entry["options"] = {k: v for k, v in item.items() if k not in ENTRY_KEYS}
+        checks.append(entry)
+    health = parse_health(raw["health"]) if raw.get("health") is not None else None
+    return {"settings": settings, "checks": checks, "health": health}
+
+
+def parse_health(raw):
+    """Validate the "health" section: the probes behind /health.
+
+    Returns {"interval", "timeout", "checks": [{name, type, accept, options}]}.
+    Each probe passes when its status is in `accept` (default ["ok"]).
+    """
+    if not isinstance(raw, dict) or not isinstance(raw.get("checks"), list) or not raw["checks"]:
+        raise ConfigError("health: needs a non-empty 'checks' list")
+    health = dict(DEFAULT_HEALTH_SCHEDULE)
+    for key in DEFAULT_HEALTH_SCHEDULE:
+        if key in raw:
+            value = raw[key]
+            if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+                raise ConfigError(f"health: {key} must be a positive number")
+            health[key] = value
+    checks, seen = [], set()
+    for i, item in enumerate(raw["checks"]):
+        if isinstance(item, str):
+            item = {"name": item}
+        if not isinstance(item, dict) or not isinstance(item.get("name"), str):
+            raise ConfigError(f"health.checks[{i}]: needs a string 'name'")
+        name = item["name"]
+        if name in seen:
+            raise ConfigError(f"health.checks[{i}]: duplicate name {name!r}")
+        seen.add(name)
+        accept = item.get("accept", ["ok"])
+        if (not isinstance(accept, list) or not accept
+                or any(a not in STATUSES for a in accept)):
+            raise ConfigError(f"health check {name!r}: accept must list some of {STATUSES}")
+        checks.append({"name": name, "type": item.get("type", name), "accept": accept,
+                       "options": {k: v for k, v in item.items()
+                                   if k not in ("name", "type", "accept")}})
+    health["checks"] = checks
+    return health
+
+
+class ConfigWatcher:
+    """Call `on_change()` when the file's mtime or size changes (polled)."""
+
+    def __init__(self, path, on_change, poll=2.0):
+        self.path = path
+        self.on_change = on_change
+        self.poll = poll
+        self._stamp = self._stat()
+        self._stop = threading.Event()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True, name="config-watch").start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.poll):
+            stamp = self._stat()
+            if stamp != self._stamp and stamp is not None:
+                self._stamp = stamp
+                self.on_change()
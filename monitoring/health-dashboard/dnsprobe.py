@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Native DNS probe engine for the Health Dashboard.
+Sends every (server, domain) query at once over UDP, waits on them together
+with a per-query deadline, and records response latency in microseconds.
+Replaces one `dig` process per query.
+"""
+
+import asyncio
+import os
+import selectors
+import socket
+import struct
+import time
+
+DNS_PORT = 53
+QTYPE_A = 1
+QTYPE_CNAME = 5
+QCLASS_IN = 1
+RCODES = {0: "NOERROR", 1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN", 4: "NOTIMP", 5: "REFUSED"}
+
+HEADER = struct.Struct("!HHHHHH")
+RR_FIXED = struct.Struct("!HHIH")
+
+
+# ---------------------------------------------------------------------------
+# Wire format
+# ---------------------------------------------------------------------------
+
+def build_query(qid, domain, qtype=QTYPE_A):
+    """Standard recursive query for one name (what `dig` sends)."""
+    qname = b"".join(bytes([len(label)]) + label.encode("idna")
+                     for label in domain.rstrip(".").split(".") if label) + b"\0"
+    return HEADER.pack(qid, 0x0100, 1, 0, 0, 0) + qname + struct.pack("!HH", qtype, QCLASS_IN)
+
+
+def _skip_name(data, off):
+    while True:
+        length = data[off]
+        if length == 0:
+            return off + 1
+        if length & 0xC0 == 0xC0:
+            return off + 2
+        off += 1 + length
+
+
+def _read_name(data, off, depth=0):
+    labels = []
+    while depth < 16:
+        length = data[off]
+        if length == 0:
+            break
+        if length & 0xC0 == 0xC0:
+            ptr = struct.unpack_from("!H", data, off)[0] & 0x3FFF
+            labels.append(_read_name(data, ptr, depth + 1))
+            break
+        labels.append(data[off + 1:off + 1 + length].decode("ascii", "replace"))
+        off += 1 + length
+    return ".".join(l for l in labels if l)
+
+
+def parse_response(data):
+    """Return (qid, rcode, answers) where answers are A addresses or CNAME targets."""
+    qid, flags, qdcount, ancount, _, _ = HEADER.unpack_from(data)
+    off = HEADER.size
+    for _ in range(qdcount):
+        off = _skip_name(data, off) + 4
+    answers = []
+    for _ in range(ancount):
+        off = _skip_name(data, off)
+        rtype, _, _, rdlen = RR_FIXED.unpack_from(data, off)
+        off += RR_FIXED.size
+        if rtype == QTYPE_A and rdlen == 4:
+            answers.append(socket.inet_ntoa(data[off:off + 4]))
+        elif rtype == QTYPE_CNAME:
+            answers.append(_read_name(data, off) + ".")
+        off += rdlen
+    return qid, flags & 0x000F, answers
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+def _target(server):
+    """Accept "ip" or ("ip", port)."""
+    if isinstance(server, (tuple, list)):
+        return server[0], int(server[1])
+    return server, DNS_PORT
+
+
+def _label(addr):
+    return addr[0] if addr[1] == DNS_PORT else f"{addr[0]}:{addr[1]}"
+
+
+def _result(label, domain):
+    return {"server": label, "domain": domain, "ok": False, "rcode": None,
+            "answers": [], "latency_us": None, "error": None}
+
+
+def query_all(queries, timeout=3.0):
+    """Run many DNS queries concurrently.
+
+    `queries` is an iterable of (server, domain) or (server, domain, timeout);
+    `server` is an IP or (ip, port). Each query has its own deadline measured
+    from when it was sent. Returns one dict per query, in input order:
+    {"server", "domain", "ok", "rcode", "answers", "latency_us", "error"},
+    with "server" as "ip", or "ip:port" when not on port 53.
+    """
+    sel = selectors.DefaultSelector()
+    results = []
+    pending = {}
+    try:
+        for q in queries:
+            server, domain = q[0], q[1]
+            deadline_s = q[2] if len(q) > 2 else timeout
+            addr = _target(server)
+            res = _result(_label(addr), domain)
+            results.append(res)
+            qid = struct.unpack("!H", os.urandom(2))[0]
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                sock.setblocking(False)
+                sock.connect(addr)
+                sent = time.perf_counter()
+                sock.send(build_query(qid, domain))
+            except OSError as e:
+                res["error"] = str(e)
+                sock.close()
+                continue
+            sel.register(sock, selectors.EVENT_READ, res)
+            pending[sock] = (qid, sent, sent + deadline_s)
+
+        while pending:
+            now = time.perf_counter()
+            for sock, (_, _, deadline) in list(pending.items()):
+                if now >= deadline:
+                    sel.get_key(sock).data["error"] = "timeout"
+                    sel.unregister(sock)
+                    sock.close()
+                    del pending[sock]
+            if not pending:
+                break
+            wait = min(d for _, _, d in pending.values()) - now
+            for key, _ in sel.select(max(wait, 0)):
+                sock, res = key.fileobj, key.data
+                qid, sent, _ = pending[sock]
+                try:
+                    data = sock.recv(4096)
+                    rid, rcode, answers = parse_response(data)
+                except (OSError, struct.error, IndexError) as e:
+                    # ICMP port-unreachable surfaces here as ECONNREFUSED
+                    res["error"] = str(e)
+                else:
+                    if rid != qid:
+                        continue   # stray datagram, keep waiting
+                    res["latency_us"] = int((time.perf_counter() - sent) * 1_000_000)
+                    res["rcode"] = RCODES.get(rcode, str(rcode))
+                    res["answers"] = answers
+                    res["ok"] = rcode == 0 and bool(answers)
+                sel.unregister(sock)
+                sock.close()
+                del pending[sock]
+    finally:
+        for sock in pending:
+            sock.close()
+        sel.close()
+    return results
+
+
+def probe_servers(servers, domains, timeout=3.0):
+    """Query every domain on every server at once and summarise per server.
+
+    A server is UP when a majority of its domains resolve (the same 2-of-3
+    rule `pihole-watchdog.sh` applies to TEST_DOMAINS). Returns
+    {server: {"up", "answer", "latency_us", "passed", "total", "results"}},
+    where latency_us is the median of the successful queries.
+    """
+    return summarize(query_all([(s, d) for s in servers for d in domains], timeout=timeout))
+
+
+def summarize(results):
+    """Group query_all() results per server (see probe_servers())."""
+    summary = {}
+    for res in results:
+        entry = summary.setdefault(res["server"], {"results": []})
+        entry["results"].append(res)
+    for entry in summary.values():
+        good = [r for r in entry["results"] if r["ok"]]
+        lat = sorted(r["latency_us"] for r in good)
+        entry["passed"] = len(good)
+        entry["total"] = len(entry["results"])
+        entry["up"] = len(good) * 2 > entry["total"]
+        entry["answer"] = (next((a for a in good[0]["answers"] if not a.endswith(".")),
+                                good[0]["answers"][0]) if good else None)
+        entry["latency_us"] = lat[len(lat) // 2] if lat else None
+    return summary
+
+
+# ---------------------------------------------------------------------------
+# Asyncio variants (same results, for the dashboard's asyncio mode)
+# ---------------------------------------------------------------------------
+
+class _QueryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, qid, future):
+        self.qid = qid
+        self.future = future
+
+    def datagram_received(self, data, addr):
+        if self.future.done():
+            return
+        try:
+            rid, rcode, answers = parse_response(data)
+        except (struct.error, IndexError) as e:
+            self.future.set_exception(e)
+            return
+        if rid == self.qid:   # otherwise a stray datagram; keep waiting
+            self.future.set_result((rcode, answers, time.perf_counter()))
+
+    def error_received(self, exc):
+        # ICMP port-unreachable arrives here as ConnectionRefusedError
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+async def query_async(server, domain, timeout=3.0):
+    """One query on the running event loop; returns a query_all()-style dict."""
+    loop = asyncio.get_running_loop()
+    addr = _target(server)
+    res = _result(_label(addr), domain)
+    qid = struct.unpack("!H", os.urandom(2))[0]
+    future = loop.create_future()
+    try:
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _QueryProtocol(qid, future), remote_addr=addr)
+    except OSError as e:
+        res["error"] = str(e)
+        return res
+    try:
+        sent = time.perf_counter()
+        transport.sendto(build_query(qid, domain))
+        rcode, answers, received = await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        res["error"] = "timeout"
+    except (OSError, struct.error, IndexError) as e:
+        res["error"] = str(e)
+    else:
+        res["latency_us"] = int((received - sent) * 1_000_000)
+        res["rcode"] = RCODES.get(rcode, str(rcode))
+        res["answers"] = answers
+        res["ok"] = rcode == 0 and bool(answers)
+    finally:
+        transport.close()
+    return res
+
+
+async def probe_servers_async(servers, domains, timeout=3.0):
+    """probe_servers() on the running event loop."""
+    results = await asyncio.gather(*(query_async(s, d, timeout)
+                                     for s in servers for d in domains))
+    return summarize(results)
+
+
+if __name__ == "__main__":
+    import sys
+    servers = sys.argv[1:] or ["185.37.37.37", "185.37.39.39"]
+    for ip, s in probe_servers(servers, ["google.com", "cloudflare.com", "amazon.com"]).items():
+        print(ip, "UP" if s["up"] else "DOWN", s["answer"], s["latency_us"], "us")
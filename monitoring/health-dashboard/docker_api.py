@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Docker Engine API client over the unix socket.
+Keeps a small pool of keep-alive connections to /var/run/docker.sock so
+container listing, inspect and exec cost one HTTP round trip instead of a
+`docker` CLI process each. ContainerWatcher optionally follows the /events
+stream so container state is pushed rather than polled.
+
+Shared by the health dashboard, multi_button_handler.py and the Pi-hole
+webhook; copy this file next to whichever script imports it.
+"""
+
+import http.client
+import json
+import queue
+import socket
+import struct
+import threading
+import time
+from urllib.parse import quote, urlencode
+
+DOCKER_SOCKET = "/var/run/docker.sock"
+API_VERSION = "v1.41"     # Docker 20.10+, what Raspberry Pi OS ships
+
+
+class DockerError(Exception):
+    """Non-2xx response from the Engine API (or socket unavailable)."""
+
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection that dials a unix socket instead of TCP."""
+
+    def __init__(self, path, timeout=10):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class DockerClient:
+    """Thread-safe Engine API client with a pool of persistent connections."""
+
+    def __init__(self, socket_path=DOCKER_SOCKET, pool_size=4, timeout=10):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    # -- connection pool ---------------------------------------------------
+
+    def _conn(self, timeout=None):
+        try:
+            conn = self._pool.get_nowait()
+            conn.timeout = timeout or self.timeout
+            if conn.sock:
+                conn.sock.settimeout(conn.timeout)
+            return conn
+        except queue.Empty:
+            return UnixHTTPConnection(self.socket_path, timeout=timeout or self.timeout)
+
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def request(self, method, path, body=None, params=None, timeout=None):
+        """Issue one API call and return the decoded JSON (or None for empty bodies)."""
+        url = f"/{API_VERSION}{path}"
+        if params:
+            url += "?" + urlencode(params)
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        # A pooled connection may have been closed by the daemon; retry once fresh
+        for attempt in (0, 1):
+            conn = self._conn(timeout)
+            try:
+                conn.request(method, url, body=payload, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError,
+                    ConnectionResetError, http.client.CannotSendRequest) as e:
+                conn.close()
+                if attempt:
+                    raise DockerError(0, str(e)) from e
+                continue
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise DockerError(0, str(e)) from e
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            if resp.status >= 300:
+                try:
+                    msg = json.loads(data).get("message", data.decode())
+                except ValueError:
+                    msg = data.decode(errors="replace")
+                raise DockerError(resp.status, msg)
+            return json.loads(data) if data else None
+
+    # -- containers --------------------------------------------------------
+
+    def containers(self, all=False):
+        """GET /containers/json — every container's name, state and status in one call."""
+        return self.request("GET", "/containers/json", params={"all": "1" if all else "0"})
+
+    def inspect(self, name):
+        return self.request("GET", f"/containers/{quote(name)}/json")
+
+    def container_states(self, all=True):
+        """{name: {"state": "running", "status": "Up 3 hours", "image": ...}}."""
+        states = {}
+        for c in self.containers(all=all):
+            for n in c.get("Names", []):
+                states[n.lstrip("/")] = {"state": c.get("State"), "status": c.get("Status"),
+                                         "image": c.get("Image"), "id": c.get("Id")}
+        return states
+
+    # -- exec --------------------------------------------------------------
+
+    def exec(self, name, cmd, timeout=10):
+        """Run `cmd` in a container via the exec API; return (stdout, exit_code).
+
+        The attach stream is hijacked by the daemon, so it runs on its own
+        connection rather than a pooled one.
+        """
+        created = self.request("POST", f"/containers/{quote(name)}/exec", body={
+            "AttachStdout": True, "AttachStderr": True, "Tty": False, "Cmd": list(cmd),
+        })
+        exec_id = created["Id"]
+        conn = UnixHTTPConnection(self.socket_path, timeout=timeout)
+        try:
+            conn.request("POST", f"/{API_VERSION}/exec/{exec_id}/start",
+                         body=json.dumps({"Detach": False, "Tty": False}),
+                         headers={"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            if resp.status >= 300:
+                raise DockerError(resp.status, resp.read().decode(errors="replace"))
+            stdout = demux(resp.read())[0]
+        except socket.timeout as e:
+            raise DockerError(124, f"exec timed out after {timeout}s") from e
+        except (OSError, http.client.HTTPException) as e:
+            raise DockerError(0, str(e)) from e
+        finally:
+            conn.close()
+        info = self.request("GET", f"/exec/{exec_id}/json")
+        return stdout.decode(errors="replace"), info.get("ExitCode")
+
+    # -- events ------------------------------------------------------------
+
+    def events(self, filters=None, timeout=None):
+        """Open GET /events and return an EventStream of decoded events.
+
+        The request is sent and the response headers read before this
+        returns, so every event from that point on is delivered.
+        """
+        params = {"filters": json.dumps(filters)} if filters else None
+        url = f"/{API_VERSION}/events" + ("?" + urlencode(params) if params else "")
+        conn = UnixHTTPConnection(self.socket_path, timeout=timeout)
+        try:
+            conn.request("GET", url)
+            resp = conn.getresponse()
+            if resp.status >= 300:
+                raise DockerError(resp.status, resp.read().decode(errors="replace"))
+        except BaseException:
+            conn.close()
+            raise
+        return EventStream(conn, resp)
+
+
+class EventStream:
+    """An open /events response; iterate for decoded events, close() when done."""
+
+    def __init__(self, conn, resp):
+        self._conn = conn
+        self._resp = resp
+
+    def __iter__(self):
+        try:
+            while True:
+                line = self._resp.readline()
+                if not line:
+                    return
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            self.close()
+
+    def close(self):
+        self._conn.close()
+
+
+def demux(data):
+    """Split a non-TTY attach stream into (stdout, stderr) bytes."""
+    out, errb = bytearray(), bytearray()
+    off = 0
+    while off + 8 <= len(data):
+        stream, size = data[off], struct.unpack_from(">I", data, off + 4)[0]
+        chunk = data[off + 8:off + 8 + size]
+        (errb if stream == 2 else out).extend(chunk)
+        off += 8 + size
+    return bytes(out), bytes(errb)
+
+
+class ContainerWatcher:
+    """Keep container states current by following the /events stream.
+
+    Subscribes to /events first and then takes one full listing, so nothing
+    that happens in between is missed, and re-lists whenever a container
+    event arrives. The "Up 3 hours" status text is rendered by the daemon at
+    listing time and no event changes it, so the listing is also retaken
+    every `refresh_interval` seconds. `states()` returns None until the
+    first listing succeeds or while the stream is down, so callers can fall
+    back to polling.
+    """
+
+    def __init__(self, client, reconnect_delay=5, refresh_interval=60):
+        self.client = client
+        self.reconnect_delay = reconnect_delay
+        self.refresh_interval = refresh_interval
+        self.updated_at = 0
+        self._states = None
+        self._live = False
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()   # one listing at a time, newest wins
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True, name="docker-events").start()
+        threading.Thread(target=self._tick, daemon=True, name="docker-relist").start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def states(self):
+        with self._lock:
+            return dict(self._states) if self._states is not None else None
+
+    def _refresh(self):
+        with self._refresh_lock:
+            states = self.client.container_states(all=True)
+            with self._lock:
+                # The periodic re-list must not revive states while the stream is down
+                if self._live:
+                    self._states = states
+                    self.updated_at = time.time()
+
+    def _tick(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self._refresh()
+            except (DockerError, OSError, ValueError, http.client.HTTPException):
+                pass
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                stream = self.client.events(filters={"type": ["container"]})
+                try:
+                    with self._lock:
+                        self._live = True
+                    self._refresh()
+                    for _ in stream:
+                        if self._stop.is_set():
+                            return
+                        self._refresh()
+                finally:
+                    stream.close()
+            except (DockerError, OSError, ValueError, http.client.HTTPException):
+                pass
+            with self._lock:
+                self._live = False
+                self._states = None
+            self._stop.wait(self.reconnect_delay)
+
+
+if __name__ == "__main__":
+    client = DockerClient()
+    for name, s in sorted(client.container_states().items()):
+        print(f"{name:24} {s['state']:10} {s['status']}")
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Check-state transition log for the Health Dashboard.
+Only changes of a check's status (ok/warn/error) are recorded, one short
+JSON line per event, in append-only segment files that rotate by size; the
+oldest segments are deleted past a count. A small index (time span and a
+sparse timestamp -> offset table per segment) lets range queries skip
+whole segments and seek near the start time instead of scanning. The last
+status of every check is kept in the index too, so a restart does not log
+spurious transitions.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+
+SEGMENT_BYTES = 256 * 1024   # rotate to a new segment past this size
+MAX_SEGMENTS = 16            # segments kept (oldest deleted on rotation)
+INDEX_EVERY = 32             # one offset mark per this many events
+
+
+class EventLog:
+    """Append-only transition log in `directory`.
+
+    observe() is called with every result and returns the event it wrote,
+    if the status changed. query() returns events in time order.
+    """
+
+    def __init__(self, directory, segment_bytes=SEGMENT_BYTES, max_segments=MAX_SEGMENTS):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self._index_path = os.path.join(directory, "index.json")
+        self._lock = threading.Lock()
+        self._load()
+
+    # -- index ----------------------------------------------------------------
+
+    def _segment_files(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []   # created with the first event
+        return sorted(n for n in names if n.startswith("events-") and n.endswith(".log"))
+
+    def _load(self):
+        """Read the index, or rebuild it from the segments if it is missing or stale."""
+        try:
+            with open(self._index_path) as f:
+                index = json.load(f)
+            segments, last = index["segments"], index["last"]
+            names = [s["name"] for s in segments]
+            if names != self._segment_files():
+                raise ValueError("segments changed")
+            active = segments[-1] if segments else None
+            if active and os.path.getsize(self._path(active["name"])) != active["bytes"]:
+                raise ValueError("active segment out of step")
+        except (OSError, ValueError, KeyError, TypeError):
+            segments, last = self._rebuild()
+        self._segments = segments
+        self._last = last
+
+    def _rebuild(self):
+        segments, last = [], {}
+        for name in self._segment_files():
+            path = self._path(name)
+            seg = {"name": name, "first": None, "last": None, "count": 0, "bytes": 0, "marks": []}
+            with open(path, "rb") as f:
+                offset = 0
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break   # torn write at the tail
+                    try:
+                        ev = json.loads(raw)
+                    except ValueError:
+                        break
+                    self._note(seg, ev, offset)
+                    last[ev["c"]] = ev["n"]
+                    offset += len(raw)
+            if offset != os.path.getsize(path):
+                os.truncate(path, offset)
+            seg["bytes"] = offset
+            segments.append(seg)
+        if segments:
+            self._save(segments, last)
+        return segments, last
+
+    def _note(self, seg, ev, offset):
+        if seg["count"] % INDEX_EVERY == 0:
+            seg["marks"].append([ev["t"], offset])
+        if seg["first"] is None:
+            seg["first"] = ev["t"]
+        seg["last"] = ev["t"]
+        seg["count"] += 1
+
+    def _save(self, segments=None, last=None):
+        tmp = self._index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"segments": self._segments if segments is None else segments,
+                       "last": self._last if last is None else last}, f, separators=(",", ":"))
+        os.replace(tmp, self._index_path)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    # -- writing --------------------------------------------------------------
+
+    def observe(self, check, status, msg=None, ts=None):
+        """Record a transition if `status` differs from the check's last one.
+
+        Returns the event dict written, or None. The first status ever seen
+        for a check is recorded with old status None.
+        """
+        with self._lock:
+            old = self._last.get(check)
+            if old == status:
+                return None
+            ev = {"t": round(ts or time.time(), 3), "c": check, "o": old, "n": status,
+                  "m": (msg or "")[:300]}
+            self._append(ev)
+            self._last[check] = status
+            self._save()
+            return self._public(ev)
+
+    def _append(self, ev):
+        raw = (json.dumps(ev, separators=(",", ":"), ensure_ascii=False) + "\n").encode()
+        seg = self._segments[-1] if self._segments else None
+        if seg is None or seg["bytes"] + len(raw) > self.segment_bytes:
+            seg = self._rotate()
+        with open(self._path(seg["name"]), "ab") as f:
+            f.write(raw)
+        self._note(seg, ev, seg["bytes"])
+        seg["bytes"] += len(raw)
+
+    def _rotate(self):
+        os.makedirs(self.directory, exist_ok=True)
+        number = int(self._segments[-1]["name"][7:-4]) + 1 if self._segments else 1
+        seg = {"name": f"events-{number:06d}.log", "first": None, "last": None,
+               "count": 0, "bytes": 0, "marks": []}
+        self._segments.append(seg)
+        while len(self._segments) > self.max_segments:
+            old = self._segments.pop(0)
+            try:
+                os.remove(self._path(old["name"]))
+            except FileNotFoundError:
+                pass
+        return seg
+
+    # -- reading --------------------------------------------------------------
+
+    @staticmethod
+    def _public(ev):
+        return {"ts": ev["t"], "time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ev["t"])),
+                "check": ev["c"], "old": ev["o"], "new": ev["n"], "msg": ev["m"]}
+
+    def query(self, since=None, until=None, check=None, limit=500):
+        """Events with since <= ts <= until (optionally one check), oldest first.
+
+        When more than `limit` match, the most recent `limit` are returned.
+        """
+        since = since if since is not None else 0
+        until = until if until is not None else float("inf")
+        with self._lock:
+            segments = [dict(s, marks=list(s["marks"])) for s in self._segments
+                        if s["count"] and s["last"] >= since and s["first"] <= until]
+        out = []
+        for seg in segments:
+            # Start at the last mark before `since`; later events are in time order
+            i = bisect.bisect_left([m[0] for m in seg["marks"]], since) - 1
+            offset = seg["marks"][max(i, 0)][1]
+            try:
+                f = open(self._path(seg["name"]), "rb")
+            except FileNotFoundError:
+                continue   # rotated away since the snapshot above
+            with f:
+                f.seek(offset)
+                remaining = seg["bytes"] - offset
+                for raw in f:
+                    remaining -= len(raw)
+                    if remaining < 0:
+                        break   # appended after the snapshot above
+                    ev = json.loads(raw)
+                    if ev["t"] > until:
+                        break
+                    if ev["t"] >= since and (check is None or ev["c"] == check):
+                        out.append(ev)
+        if limit:
+            out = out[-limit:]
+        return [self._public(ev) for ev in out]
+
+    def last_status(self):
+        with self._lock:
+            return dict(self._last)
+
+    def stats(self):
+        with self._lock:
+            return {"segments": len(self._segments),
+                    "events": sum(s["count"] for s in self._segments),
+                    "bytes": sum(s["bytes"] for s in self._segments)}
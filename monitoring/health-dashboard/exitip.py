@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Exit-IP resolver for the Health Dashboard.
+Looks up the public IP seen via the default route, a given interface
+(e.g. tun1) or a SOCKS5 proxy, over one keep-alive requests.Session per
+route. Concurrent lookups for the same route share a single request, and
+the last good answer is kept (with its age) when a lookup fails.
+"""
+
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+try:
+    import socks  # noqa: F401  (PySocks, enables socks5h:// in requests)
+    HAVE_SOCKS = True
+except ImportError:
+    HAVE_SOCKS = False
+
+DEFAULT_URL = "https://ipinfo.io"
+SO_BINDTODEVICE = getattr(socket, "SO_BINDTODEVICE", 25)
+
+
+class InterfaceAdapter(HTTPAdapter):
+    """HTTPAdapter whose sockets are bound to one network interface (root only)."""
+
+    def __init__(self, interface, **kwargs):
+        self.interface = interface
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, SO_BINDTODEVICE, self.interface.encode()),
+        ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+class ExitIPResolver:
+    """Cached, single-flight exit-IP lookups, one pooled session per route."""
+
+    def __init__(self, url=DEFAULT_URL, ttl=90, timeout=12, fallback=None):
+        self.url = url
+        self.ttl = ttl
+        self.timeout = timeout
+        # fallback(interface, proxy) -> dict, used for SOCKS when PySocks is missing
+        self.fallback = fallback
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "failures": 0}
+        self._cache = {}       # key -> {"data": {...}, "ts": epoch}
+        self._inflight = {}    # key -> threading.Event
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _session(self, key, interface, proxy):
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.headers["Accept"] = "application/json"
+                if interface:
+                    adapter = InterfaceAdapter(interface, pool_maxsize=1)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                if proxy:
+                    session.proxies = {"http": proxy, "https": proxy}
+                    session.trust_env = False
+                self._sessions[key] = session
+            return session
+
+    def _fetch(self, key, interface, proxy):
+        if proxy and not HAVE_SOCKS and self.fallback:
+            return self.fallback(interface, proxy)
+        r = self._session(key, interface, proxy).get(self.url, timeout=self.timeout)
+        r.raise_for_status()
+        data = r.json()
+        return {
+            "ip": data.get("ip", "?"),
+            "country": data.get("country", "?"),
+            "city": data.get("city", "?"),
+            "org": data.get("org", "?"),
+        }
+
+    def cached(self, interface=None, proxy=None, ttl=None):
+        """lookup()'s answer if it is fresh in the cache, else None; never blocks."""
+        key = proxy if proxy else (interface or "default")
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and time.time() - entry["ts"] < ttl:
+                self.stats["hits"] += 1
+                return self._answer(entry, ttl)
+        return None
+
+    def lookup(self, interface=None, proxy=None, ttl=None):
+        """Return {"ip", "country", "city", "org", "age", "stale"} or None.
+
+        A fresh cached answer is returned straight away. Otherwise one caller
+        fetches and any others for the same route wait for its answer. If
+        the fetch fails, the last good answer comes back with stale=True and
+        its age in seconds; None means no answer has ever been seen.
+        """
+        key = proxy if proxy else (interface or "default")
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and time.time() - entry["ts"] < ttl:
+                self.stats["hits"] += 1
+                return self._answer(entry, ttl)
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = threading.Event()
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if leader:
+            try:
+                data = self._fetch(key, interface, proxy)
+            except Exception:
+                data = None
+            with self._lock:
+                if data:
+                    self._cache[key] = {"data": data, "ts": time.time()}
+                else:
+                    self.stats["failures"] += 1
+                del self._inflight[key]
+            flight.set()
+        else:
+            flight.wait(self.timeout + 5)
+
+        with self._lock:
+            entry = self._cache.get(key)
+            return self._answer(entry, ttl) if entry else None
+
+    @staticmethod
+    def _answer(entry, ttl):
+        age = time.time() - entry["ts"]
+        result = dict(entry["data"])
+        result["age"] = int(age)
+        result["stale"] = age >= ttl
+        return result
+
+
+if __name__ == "__main__":
+    import sys
+    resolver = ExitIPResolver(url=sys.argv[1] if len(sys.argv) > 1 else DEFAULT_URL)
+    print(resolver.lookup())
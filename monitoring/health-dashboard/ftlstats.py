@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Query analytics for the Health Dashboard from Pi-hole's long-term database
+(pihole-FTL.db), opened read-only. Each refresh reads only the rows added
+since the last one, resuming from the highest query id seen. The rows are
+folded into hourly buckets of per-domain and per-client counts over a
+rolling window. The buckets are local clock hours, so "today" starts at
+local midnight whatever the UTC offset. Top-N domains and clients, the
+blocked ratio and the query rate all come from those buckets, so a refresh
+costs the same however large the file has grown.
+"""
+
+import collections
+import os
+import sqlite3
+import threading
+import time
+
+# FTL query status codes that mean the query was blocked: gravity, regex and
+# deny lists (and their CNAME variants), upstream-blocked replies, database
+# busy and special domains. v6 adds 18 (upstream blocked via EDE 15).
+BLOCKED = frozenset({1, 4, 5, 6, 7, 8, 9, 10, 11, 15, 16, 18})
+WINDOW_HOURS = 24        # rolling window kept in memory
+BATCH_ROWS = 20_000      # rows per SELECT
+MAX_ROWS = 200_000       # rows per refresh; a large backlog is caught up over several
+RATE_MINUTES = 10        # query rate is averaged over this many complete minutes
+NAME_CHUNK = 500         # ids per domain_by_id / client_by_id lookup
+
+
+class FtlError(Exception):
+    """The database is missing, unreadable or not an FTL database."""
+
+
+def hour_start(ts):
+    """Epoch start of the local clock hour holding `ts` (handles :30 and :45 offsets)."""
+    return ts - (ts + time.localtime(ts).tm_gmtoff) % 3600
+
+
+class FtlStats:
+    """Rolling query aggregates over the FTL database at `path`.
+
+    refresh() reads new rows; report() answers from memory only. If the file
+    is replaced (restored from backup, recreated) or its ids go backwards,
+    the aggregates are rebuilt from the window's first row.
+    """
+
+    def __init__(self, path, window_hours=WINDOW_HOURS, max_rows=MAX_ROWS):
+        self.path = path
+        self.window_hours = window_hours
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._conn = None
+        self._inode = None
+        self._reset()
+
+    def _reset(self):
+        self.last_id = 0
+        self.newest = None          # timestamp of the newest row read
+        self._hours = {}            # hour start (epoch) -> bucket
+        self._minutes = collections.Counter()   # minute start -> queries
+        self._names = {"domain": {}, "client": {}}
+        self.stats = {"rows": 0, "refreshes": 0, "last_rows": 0, "last_ms": 0.0, "resets": 0}
+
+    # -- database -------------------------------------------------------------
+
+    def _connect(self):
+        try:
+            inode = os.stat(self.path).st_ino
+        except OSError as e:
+            self._close()
+            raise FtlError(f"{self.path}: {e.strerror}")
+        if self._conn is not None and inode == self._inode:
+            return self._conn
+        self._close()
+        if self._inode is not None:
+            self._reset()
+            self.stats["resets"] += 1
+        try:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=2,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA query_only = 1")
+            tables = {r[0] for r in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+        except sqlite3.Error as e:
+            raise FtlError(f"{self.path}: {e}")
+        # FTL >= 5.7 stores ids into domain_by_id/client_by_id; older ones store text
+        if "query_storage" in tables:
+            self._table, self._by_id = "query_storage", True
+        elif "queries" in tables:
+            self._table, self._by_id = "queries", False
+        else:
+            conn.close()
+            raise FtlError(f"{self.path}: no queries table")
+        self._conn, self._inode = conn, inode
+        return conn
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    # -- reading --------------------------------------------------------------
+
+    def refresh(self, now=None):
+        """Read rows added since the last refresh. Returns the number read."""
+        now = now or time.time()
+        with self._lock:
+            conn = self._connect()
+            start = time.perf_counter()
+            cutoff = hour_start(int(now)) - (self.window_hours - 1) * 3600
+            table = self._table
+            try:
+                newest_id = conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()[0] or 0
+                if newest_id < self.last_id:
+                    self._reset()   # rows renumbered: file was swapped under the same inode
+                    self.stats["resets"] += 1
+                if self.last_id == 0:
+                    # First read: start at the window, via the timestamp index
+                    first = conn.execute(f"SELECT MIN(id) FROM {table} WHERE timestamp >= ?",
+                                         (cutoff,)).fetchone()[0]
+                    self.last_id = (first - 1) if first is not None else newest_id
+                read = 0
+                while read < self.max_rows:
+                    rows = conn.execute(
+                        f"SELECT id, timestamp, status, domain, client FROM {table} "
+                        f"WHERE id > ? ORDER BY id LIMIT ?",
+                        (self.last_id, min(BATCH_ROWS, self.max_rows - read))).fetchall()
+                    if not rows:
+                        break
+                    self._fold(rows)
+                    read += len(rows)
+                    self.last_id = rows[-1][0]
+                    if len(rows) < BATCH_ROWS:
+                        break
+            except sqlite3.Error as e:
+                self._close()
+                raise FtlError(f"{self.path}: {e}")
+            self._prune(cutoff, now)
+            self.stats["rows"] += read
+            self.stats["refreshes"] += 1
+            self.stats["last_rows"] = read
+            self.stats["last_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            return read
+
+    def _fold(self, rows):
+        hours, minutes = self._hours, self._minutes
+        offsets = {}   # UTC quarter hour -> local offset; zone changes fall on these
+        for _, ts, status, domain, client in rows:
+            ts = int(ts)
+            offset = offsets.get(ts // 900)
+            if offset is None:
+                offset = offsets[ts // 900] = time.localtime(ts).tm_gmtoff
+            hour = ts - (ts + offset) % 3600
+            bucket = hours.get(hour)
+            if bucket is None:
+                bucket = hours[hour] = {
+                    "queries": 0, "blocked": 0, "domains": collections.Counter(),
+                    "blocked_domains": collections.Counter(), "clients": collections.Counter()}
+            bucket["queries"] += 1
+            bucket["domains"][domain] += 1
+            bucket["clients"][client] += 1
+            if status in BLOCKED:
+                bucket["blocked"] += 1
+                bucket["blocked_domains"][domain] += 1
+            minutes[ts - ts % 60] += 1
+        self.newest = max(self.newest or 0, int(rows[-1][1]))
+
+    def _prune(self, cutoff, now):
+        for hour in [h for h in self._hours if h < cutoff]:
+            del self._hours[hour]
+        oldest_minute = now - (RATE_MINUTES + 2) * 60
+        for minute in [m for m in self._minutes if m < oldest_minute]:
+            del self._minutes[minute]
+
+    def _lookup(self, kind, ids):
+        """Display names for domain/client ids (cached; rows only ever reference existing ids)."""
+        if not self._by_id:
+            return {i: i for i in ids}
+        cache = self._names[kind]
+        missing = [i for i in ids if i not in cache]
+        if missing and self._conn is not None:
+            column = "domain" if kind == "domain" else "COALESCE(NULLIF(name, ''), ip)"
+            for i in range(0, len(missing), NAME_CHUNK):
+                chunk = missing[i:i + NAME_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                try:
+                    cache.update(self._conn.execute(
+                        f"SELECT id, {column} FROM {kind}_by_id WHERE id IN ({marks})", chunk))
+                except sqlite3.Error:
+                    break
+        return {i: cache.get(i, f"#{i}") for i in ids}
+
+    # -- reporting ------------------------------------------------------------
+
+    def report(self, top=10, hours=None, now=None):
+        """Aggregates over the last `hours` (default: the whole window), from memory."""
+        now = now or time.time()
+        hours = min(hours or self.window_hours, self.window_hours)
+        since = hour_start(int(now)) - (hours - 1) * 3600
+        midnight = time.mktime(time.localtime(now)[:3] + (0, 0, 0, 0, 0, -1))
+        with self._lock:
+            picked = [(h, b) for h, b in sorted(self._hours.items()) if h >= since]
+            domains, blocked_domains, clients = (collections.Counter() for _ in range(3))
+            for _, b in picked:
+                domains.update(b["domains"])
+                blocked_domains.update(b["blocked_domains"])
+                clients.update(b["clients"])
+            queries = sum(b["queries"] for _, b in picked)
+            blocked = sum(b["blocked"] for _, b in picked)
+            today = [b for h, b in self._hours.items() if h >= midnight]
+            # Complete minutes only: FTL writes to the database about once a minute
+            end = int(now) - int(now) % 60
+            recent = sum(n for m, n in self._minutes.items() if end - RATE_MINUTES * 60 <= m < end)
+
+            def named(counter, kind):
+                most = counter.most_common(top)
+                names = self._lookup(kind, [k for k, _ in most])
+                return [{kind: names[k], "count": n} for k, n in most]
+
+            return {
+                "hours": hours,
+                "queries": queries,
+                "blocked": blocked,
+                "blocked_pct": round(100 * blocked / queries, 1) if queries else 0.0,
+                "queries_today": sum(b["queries"] for b in today),
+                "blocked_today": sum(b["blocked"] for b in today),
+                "rate_per_min": round(recent / RATE_MINUTES, 1),
+                "top_domains": named(domains, "domain"),
+                "top_blocked": named(blocked_domains, "domain"),
+                "top_clients": named(clients, "client"),
+                "hourly": [{"hour": h, "queries": b["queries"], "blocked": b["blocked"]}
+                           for h, b in picked],
+                "last_id": self.last_id,
+                "lag_s": round(now - self.newest) if self.newest else None,
+                "refresh": dict(self.stats),
+            }
+
+    def gravity_count(self):
+        """Domains on the blocklists, from gravity.db next to the FTL database (None if unknown)."""
+        path = os.path.join(os.path.dirname(self.path), "gravity.db")
+        try:
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=2)
+        except sqlite3.Error:
+            return None
+        try:
+            row = conn.execute("SELECT value FROM info WHERE property = 'gravity_count'").fetchone()
+            return int(row[0]) if row else None
+        except (sqlite3.Error, ValueError):
+            return None
+        finally:
+            conn.close()
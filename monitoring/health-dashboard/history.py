@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+In-memory history of check results for the Health Dashboard.
+One fixed-size ring per check, backed by typed arrays (timestamp, status,
+duration and each numeric metric), so 24h of history for every check fits
+in about a megabyte. Range queries binary-search the ring and aggregate in
+place, so they never copy the whole buffer.
+"""
+
+import math
+import threading
+import time
+from array import array
+
+STATUS_CODES = {"ok": 0, "warn": 1, "error": 2}
+STATUS_NAMES = {v: k for k, v in STATUS_CODES.items()}
+NAN = float("nan")
+
+
+class RingSeries:
+    """Fixed-capacity, time-ordered ring of samples for one check."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ts = array("d", [0.0]) * capacity
+        self.status = array("b", [0]) * capacity
+        self.duration = array("f", [NAN]) * capacity
+        self.fields = {}          # metric name -> array("f")
+        self.start = 0            # physical index of the oldest sample
+        self.count = 0
+
+    def append(self, ts, status, duration_ms, metrics):
+        i = (self.start + self.count) % self.capacity
+        if self.count == self.capacity:
+            self.start = (self.start + 1) % self.capacity
+        else:
+            self.count += 1
+        self.ts[i] = ts
+        self.status[i] = status
+        self.duration[i] = NAN if duration_ms is None else duration_ms
+        for name, col in self.fields.items():
+            col[i] = NAN
+        for name, value in metrics.items():
+            col = self.fields.get(name)
+            if col is None:
+                col = self.fields[name] = array("f", [NAN]) * self.capacity
+            col[i] = NAN if value is None else value
+
+    def _phys(self, logical):
+        return (self.start + logical) % self.capacity
+
+    def _bisect(self, t):
+        """First logical index with ts >= t."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.ts[self._phys(mid)] < t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def query(self, since, until, max_points):
+        """Columnar samples in [since, until], downsampled to <= max_points buckets.
+
+        Each bucket keeps the worst status, the mean duration and the mean
+        of each metric (ignoring gaps), stamped with its last sample time.
+        """
+        first, last = self._bisect(since), self._bisect(until + 1e-6)
+        n = last - first
+        names = sorted(self.fields)
+        out = {"t": [], "status": [], "duration_ms": [], "fields": {k: [] for k in names}}
+        if n <= 0:
+            return out, 0
+        span = max(until - since, 1e-6)
+        width = span / max_points if n > max_points else 0
+
+        bucket = None
+        acc = None
+
+        def flush():
+            out["t"].append(round(acc["t"], 3))
+            out["status"].append(STATUS_NAMES.get(acc["status"], "error"))
+            out["duration_ms"].append(_mean(acc["dur"]))
+            for k in names:
+                out["fields"][k].append(_mean(acc["f"][k]))
+
+        for logical in range(first, last):
+            i = self._phys(logical)
+            t = self.ts[i]
+            b = int((t - since) / width) if width else logical
+            if b != bucket:
+                if acc:
+                    flush()
+                bucket = b
+                acc = {"t": t, "status": 0, "dur": [0.0, 0], "f": {k: [0.0, 0] for k in names}}
+            acc["t"] = t
+            acc["status"] = max(acc["status"], self.status[i])
+            _add(acc["dur"], self.duration[i])
+            for k in names:
+                _add(acc["f"][k], self.fields[k][i])
+        flush()
+        return out, n
+
+    def resized(self, capacity):
+        """A copy with room for `capacity` samples, keeping the newest that fit."""
+        keep = min(self.count, capacity)
+        new = RingSeries(capacity)
+        new.count = keep
+
+        def moved(col, fill):
+            ordered = col[self.start:] + col[:self.start]   # oldest first
+            return (ordered[self.count - keep:self.count]
+                    + array(col.typecode, [fill]) * (capacity - keep))
+
+        new.ts = moved(self.ts, 0.0)
+        new.status = moved(self.status, 0)
+        new.duration = moved(self.duration, NAN)
+        new.fields = {name: moved(col, NAN) for name, col in self.fields.items()}
+        return new
+
+    def nbytes(self):
+        cols = [self.ts, self.status, self.duration, *self.fields.values()]
+        return sum(c.itemsize * len(c) for c in cols)
+
+
+def _add(acc, value):
+    if not math.isnan(value):
+        acc[0] += value
+        acc[1] += 1
+
+
+def _mean(acc):
+    return round(acc[0] / acc[1], 3) if acc[1] else None
+
+
+class HistoryStore:
+    """Per-check RingSeries sized to hold `retention` seconds at each check's interval.
+
+    A ring grows when a check is recorded with a shorter interval than it
+    was sized for (a config reload), so retention never silently shrinks.
+    """
+
+    def __init__(self, retention=24 * 3600):
+        self.retention = retention
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, result, interval, ts=None):
+        """Append one check result; numeric values come from result["metrics"]."""
+        metrics = {k: v for k, v in (result.get("metrics") or {}).items()
+                   if isinstance(v, (int, float)) or v is None}
+        capacity = int(self.retention / max(interval, 1)) + 1
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = self._series[name] = RingSeries(capacity)
+            elif capacity > series.capacity:
+                series = self._series[name] = series.resized(capacity)
+            series.append(ts or time.time(), STATUS_CODES.get(result.get("status"), 2),
+                          result.get("duration_ms"), metrics)
+
+    def checks(self):
+        with self._lock:
+            return sorted(self._series)
+
+    def query(self, name, since=None, until=None, max_points=300):
+        """Return the downsampled history for one check, or None if unknown."""
+        now = time.time()
+        until = now if until is None else until
+        since = now - self.retention if since is None else since
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return None
+            cols, raw = series.query(since, until, max(1, max_points))
+        return {"check": name, "since": since, "until": until, "raw_count": raw,
+                "points": len(cols["t"]), **cols}
+
+    def nbytes(self):
+        with self._lock:
+            return sum(s.nbytes() for s in self._series.values())
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Batched InfluxDB line-protocol writer shared by the Health Dashboard and
+rpi_vitals_monitor.py. Points are buffered in memory and flushed by size
+or age as one POST /write over a keep-alive connection, gzip-compressed
+by default. While InfluxDB is unreachable, batches go to an append-only
+spool file (size-capped) and are replayed in order once it is back, so a
+container restart loses nothing. Standard library only.
+"""
+
+import gzip
+import http.client
+import math
+import os
+import struct
+import threading
+import zlib
+from urllib.parse import urlsplit
+
+DEFAULT_URL = "http://localhost:8086/write?db=smarthome"
+RECORD = struct.Struct(">II")   # spool record header: payload length, crc32
+
+
+class WriteRejected(Exception):
+    """InfluxDB refused the batch itself (4xx); resending it cannot succeed."""
+
+
+# ---------------------------------------------------------------------------
+# Spool (append-only file of batches, replayed in order)
+# ---------------------------------------------------------------------------
+
+class Spool:
+    """Length-prefixed, checksummed batches in `path`; replay position in `path`.pos.
+
+    A torn record at the tail (crash mid-append) is cut off on open. Once
+    every record has been replayed the file is truncated back to empty.
+    """
+
+    def __init__(self, path, max_bytes=64 * 2**20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._pos_path = path + ".pos"
+        self.pos = self._read_pos()
+        self.size = self._recover()
+        if self.pos > self.size:
+            self.pos = 0
+
+    def _read_pos(self):
+        try:
+            with open(self._pos_path) as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _save_pos(self):
+        tmp = self._pos_path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(str(self.pos))
+        os.replace(tmp, self._pos_path)
+
+    def _recover(self):
+        """Validate every record; truncate at the first bad one. Returns the good size."""
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return 0
+        good = 0
+        with f:
+            while True:
+                header = f.read(RECORD.size)
+                if len(header) < RECORD.size:
+                    break
+                length, crc = RECORD.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                good = f.tell()
+        if good != os.path.getsize(self.path):
+            os.truncate(self.path, good)
+        return good
+
+    @property
+    def pending(self):
+        return self.size - self.pos
+
+    def append(self, payload):
+        """Add one batch; False (nothing written) if it would exceed max_bytes."""
+        if self.size + RECORD.size + len(payload) > self.max_bytes:
+            return False
+        with open(self.path, "ab") as f:
+            f.write(RECORD.pack(len(payload), zlib.crc32(payload)) + payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self.size += RECORD.size + len(payload)
+        return True
+
+    def peek(self):
+        """The oldest unsent batch, or None."""
+        if not self.pending:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(self.pos)
+            length, _ = RECORD.unpack(f.read(RECORD.size))
+            return f.read(length)
+
+    def advance(self, payload):
+        """Mark the batch returned by peek() as sent."""
+        self.pos += RECORD.size + len(payload)
+        if self.pos >= self.size:
+            os.truncate(self.path, 0)
+            self.pos = self.size = 0
+        self._save_pos()
+
+
+# ---------------------------------------------------------------------------
+# Writer
+# ---------------------------------------------------------------------------
+
+class InfluxWriter:
+    """Buffer line-protocol points and write them in batches.
+
+    add() never blocks on the network. A background thread (start()) flushes
+    every `flush_interval` seconds, or as soon as `batch_size` lines are
+    waiting; flush() does the same synchronously. Connection errors and 5xx
+    responses spool the batch (if a spool path is set); a 4xx means the data
+    itself is bad, so the batch is dropped and counted.
+    """
+
+    def __init__(self, url=DEFAULT_URL, batch_size=500, flush_interval=10.0, compress=True,
+                 spool_path=None, spool_max_bytes=64 * 2**20, max_buffer=50_000,
+                 timeout=5.0, name="influx"):
+        self.url = url
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.secure = parts.scheme == "https"
+        self.path = (parts.path or "/write") + (f"?{parts.query}" if parts.query else "")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compress = compress
+        self.max_buffer = max_buffer
+        self.timeout = timeout
+        self.name = name
+        self.spool = Spool(spool_path, spool_max_bytes) if spool_path else None
+        self.stats = {"points": 0, "batches": 0, "bytes_sent": 0, "spooled": 0, "replayed": 0,
+                      "dropped": 0, "rejected": 0, "errors": 0}
+        self.last_error = None
+        self._buffer = []
+        self._lock = threading.Lock()          # guards _buffer
+        self._flush_lock = threading.Lock()    # one flush (and connection user) at a time
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = None
+        self._failing = False
+
+    # -- producers ----------------------------------------------------------
+
+    def add(self, lines):
+        """Queue one line or an iterable of lines (without trailing newlines).
+
+        None (a line() with nothing to write) and empty lines are skipped.
+        """
+        if lines is None or isinstance(lines, str):
+            lines = [lines]
+        with self._lock:
+            self._buffer.extend(l for l in lines if l)
+            overflow = len(self._buffer) - self.max_buffer
+            if overflow > 0:   # flusher wedged; shed the oldest rather than grow forever
+                del self._buffer[:overflow]
+                self.stats["dropped"] += overflow
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    # -- flushing -----------------------------------------------------------
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"{self.name}-writer")
+        self._thread.start()
+        return self
+
+    def close(self, timeout=10.0):
+        """Stop the flusher after one last flush; whatever can't be sent stays spooled."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        else:
+            self.flush()
+        self._disconnect()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """Send buffered points, oldest spooled batches first. Returns True if nothing is left."""
+        with self._flush_lock:
+            with self._lock:
+                lines, self._buffer = self._buffer, []
+            batches = [lines[i:i + self.batch_size] for i in range(0, len(lines), self.batch_size)]
+            payloads = [("\n".join(b) + "\n").encode() for b in batches]
+            for payload, batch in zip(payloads, batches):
+                self.stats["points"] += len(batch)
+
+            # Keep order: nothing new goes out directly while older data is spooled
+            if self.spool is not None and self.spool.pending:
+                for payload in payloads:
+                    self._to_spool(payload)
+                payloads = []
+                if not self._replay():
+                    return False
+            for i, payload in enumerate(payloads):
+                if not self._deliver(payload):
+                    for rest in payloads[i:]:
+                        self._to_spool(rest)
+                    return False
+            return True
+
+    def _replay(self):
+        while True:
+            payload = self.spool.peek()
+            if payload is None:
+                return True
+            if not self._deliver(payload):
+                return False
+            self.spool.advance(payload)
+            self.stats["replayed"] += 1
+
+    def _deliver(self, payload):
+        """POST one batch. True if it is done with (sent, or rejected as bad data)."""
+        try:
+            self._post(payload)
+        except WriteRejected as e:
+            self.stats["rejected"] += 1
+            self._log(f"batch rejected, dropped: {e}")
+            return True
+        except (OSError, http.client.HTTPException) as e:
+            self.stats["errors"] += 1
+            self.last_error = str(e)
+            if not self._failing:
+                self._log(f"write failed ({e}); spooling until it recovers")
+            self._failing = True
+            return False
+        if self._failing:
+            self._log("writes recovered")
+            self._failing = False
+        self.stats["batches"] += 1
+        return True
+
+    def _to_spool(self, payload):
+        if self.spool is not None and self.spool.append(payload):
+            self.stats["spooled"] += 1
+        else:
+            self.stats["dropped"] += payload.count(b"\n")
+
+    # -- HTTP ---------------------------------------------------------------
+
+    def _post(self, payload):
+        body = gzip.compress(payload, compresslevel=5) if self.compress else payload
+        headers = {"Content-Type": "text/plain; charset=utf-8"}
+        if self.compress:
+            headers["Content-Encoding"] = "gzip"
+        for attempt in (1, 2):   # the server may have closed a kept-alive connection
+            if self._conn is None:
+                cls = http.client.HTTPSConnection if self.secure else http.client.HTTPConnection
+                self._conn = cls(self.host, self.port, timeout=self.timeout)
+            try:
+                self._conn.request("POST", self.path, body=body, headers=headers)
+                resp = self._conn.getresponse()
+                detail = resp.read()
+            except (OSError, http.client.HTTPException):
+                self._disconnect()
+                if attempt == 2:
+                    raise
+                continue
+            break
+        if resp.will_close:
+            self._disconnect()
+        self.stats["bytes_sent"] += len(body)
+        if resp.status == 204 or resp.status == 200:
+            return
+        message = f"HTTP {resp.status}: {detail[:200].decode(errors='replace').strip()}"
+        if 400 <= resp.status < 500:
+            raise WriteRejected(message)
+        raise http.client.HTTPException(message)
+
+    def _disconnect(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _log(self, msg):
+        print(f"[{self.name}] {msg}", flush=True)
+
+
+# ---------------------------------------------------------------------------
+# Line protocol
+# ---------------------------------------------------------------------------
+
+def _escape(s, chars):
+    s = str(s).replace("\\", "\\\\")
+    for c in chars:
+        s = s.replace(c, "\\" + c)
+    return s
+
+
+def _field(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return f"{value}i"
+    if isinstance(value, float):
+        return repr(value)
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def line(measurement, tags, fields, timestamp_ns=None):
+    """One point in line protocol, or None if it would have no fields.
+
+    None-valued fields are left out, and so are NaN and infinite floats:
+    InfluxDB rejects them with a 400, which would drop the whole batch.
+    Python ints are written as InfluxDB integers; pass floats for series
+    that already store floats.
+    """
+    fields = [(k, v) for k, v in fields.items()
+              if v is not None and not (isinstance(v, float) and not math.isfinite(v))]
+    if not fields:
+        return None
+    parts = [_escape(measurement, ", ")]
+    parts += [f"{_escape(k, ',= ')}={_escape(v, ',= ')}" for k, v in sorted(tags.items())
+              if v not in (None, "")]
+    out = ",".join(parts) + " " + ",".join(f"{_escape(k, ',= ')}={_field(v)}" for k, v in fields)
+    if timestamp_ns is not None:
+        out += f" {timestamp_ns}"
+    return out
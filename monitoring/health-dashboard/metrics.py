@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Minimal Prometheus text-format metrics for the Health Dashboard.
+Counters and histograms are updated as checks run; the exposition text is
+built once per published result and served as-is, so a scrape never does
+more than copy a string.
+"""
+
+import math
+import threading
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name, doc, labels=()):
+        self.name, self.doc, self.labels = name, doc, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(n, "") for n in self.labels), 0)
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, key)} {_num(v)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    def __init__(self, name, doc, buckets, labels=()):
+        self.name, self.doc, self.labels = name, doc, tuple(labels)
+        self.buckets = sorted(buckets)
+        self._series = {}    # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, s in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, s):
+                    lbl = _labels(self.labels + ("le",), key + (_num(float(bound)),))
+                    lines.append(f"{self.name}_bucket{lbl} {count}")
+                lbl = _labels(self.labels + ("le",), key + ("+Inf",))
+                lines.append(f"{self.name}_bucket{lbl} {s[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_num(s[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.labels, key)} {s[-1]}")
+        return lines
+
+
+def gauge(name, doc, samples, labels=()):
+    """Exposition lines for a gauge from [(label_values, value), ...]."""
+    return _family(name, doc, "gauge", samples, labels)
+
+
+def counter(name, doc, samples, labels=()):
+    """Exposition lines for a counter kept elsewhere (e.g. a module's stats dict)."""
+    return _family(name, doc, "counter", samples, labels)
+
+
+def _family(name, doc, kind, samples, labels):
+    lines = [f"# HELP {name} {doc}", f"# TYPE {name} {kind}"]
+    for key, v in samples:
+        lines.append(f"{name}{_labels(labels, key)} {_num(v)}")
+    return lines
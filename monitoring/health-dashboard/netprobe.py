@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Native network probes for the Health Dashboard.
+Reads interface addresses, routes and policy rules over rtnetlink and
+listening sockets from /proc/net, so the VPN/proxy checks never fork
+`ip` or `ss`.
+"""
+
+import os
+import socket
+import struct
+
+# ---------------------------------------------------------------------------
+# rtnetlink constants (linux/netlink.h, linux/rtnetlink.h, linux/fib_rules.h)
+# ---------------------------------------------------------------------------
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x01
+NLM_F_DUMP = 0x300
+
+RTM_NEWADDR, RTM_GETADDR = 20, 22
+RTM_NEWROUTE, RTM_GETROUTE = 24, 26
+RTM_NEWRULE, RTM_GETRULE = 32, 34
+
+IFA_ADDRESS, IFA_LOCAL, IFA_LABEL = 1, 2, 3
+RTA_DST, RTA_OIF, RTA_GATEWAY, RTA_PRIORITY, RTA_PREFSRC, RTA_TABLE = 1, 4, 5, 6, 7, 15
+FRA_DST, FRA_SRC, FRA_PRIORITY, FRA_TABLE = 1, 2, 6, 15
+
+RTN_UNICAST = 1
+RT_TABLES = {"local": 255, "main": 254, "default": 253, "unspec": 0}
+RT_TABLES_FILES = ["/etc/iproute2/rt_tables", "/usr/share/iproute2/rt_tables"]
+
+NLMSGHDR = struct.Struct("=LHHLL")
+RTATTR = struct.Struct("=HH")
+IFADDRMSG = struct.Struct("=BBBBI")
+RTMSG = struct.Struct("=BBBBBBBBI")       # fib_rule_hdr shares this layout
+
+TCP_LISTEN = "0A"
+
+
+# ---------------------------------------------------------------------------
+# Netlink plumbing
+# ---------------------------------------------------------------------------
+
+def _align(n):
+    return (n + 3) & ~3
+
+
+def _parse_attrs(buf):
+    """Parse a run of rtattr TLVs into {type: raw_bytes}."""
+    attrs = {}
+    off = 0
+    while off + RTATTR.size <= len(buf):
+        length, kind = RTATTR.unpack_from(buf, off)
+        if length < RTATTR.size:
+            break
+        attrs[kind] = buf[off + RTATTR.size:off + length]
+        off += _align(length)
+    return attrs
+
+
+def _dump(msg_type, body, reply_type):
+    """Send one NLM_F_DUMP request and yield (header_body, attrs) per reply."""
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+    try:
+        sock.bind((0, 0))
+        seq = 1
+        sock.send(NLMSGHDR.pack(NLMSGHDR.size + len(body), msg_type,
+                                NLM_F_REQUEST | NLM_F_DUMP, seq, 0) + body)
+        hdr_len = len(body)
+        while True:
+            data = sock.recv(65536)
+            off = 0
+            while off + NLMSGHDR.size <= len(data):
+                length, kind, _, rseq, _ = NLMSGHDR.unpack_from(data, off)
+                payload = data[off + NLMSGHDR.size:off + length]
+                off += _align(length)
+                if rseq != seq:
+                    continue
+                if kind == NLMSG_DONE:
+                    return
+                if kind == NLMSG_ERROR:
+                    code = -struct.unpack_from("=i", payload)[0]
+                    if code:
+                        raise OSError(code, os.strerror(code))
+                    return
+                if kind == reply_type:
+                    yield payload[:hdr_len], _parse_attrs(payload[_align(hdr_len):])
+    finally:
+        sock.close()
+
+
+def _ip(raw):
+    return socket.inet_ntoa(raw) if raw else None
+
+
+def _ifname(index):
+    try:
+        return socket.if_indextoname(index)
+    except OSError:
+        return f"if{index}"
+
+
+# ---------------------------------------------------------------------------
+# Routing tables
+# ---------------------------------------------------------------------------
+
+def load_rt_tables(paths=None):
+    """Map routing table names to ids from the iproute2 rt_tables files."""
+    tables = dict(RT_TABLES)
+    files = []
+    for path in paths or RT_TABLES_FILES:
+        files.append(path)
+        d = path + ".d"
+        if os.path.isdir(d):
+            files.extend(os.path.join(d, f) for f in sorted(os.listdir(d))
+                         if f.endswith(".conf"))
+    for path in files:
+        try:
+            with open(path) as f:
+                for line in f:
+                    parts = line.split("#", 1)[0].split()
+                    if len(parts) >= 2 and parts[0].isdigit():
+                        tables.setdefault(parts[1], int(parts[0]))
+        except OSError:
+            continue
+    return tables
+
+
+def table_id(name):
+    """Resolve a routing table name (or number) to its id, None if unknown."""
+    if str(name).isdigit():
+        return int(name)
+    return load_rt_tables().get(name)
+
+
+def table_name(tid, tables=None):
+    for name, num in (tables or load_rt_tables()).items():
+        if num == tid:
+            return name
+    return str(tid)
+
+
+# ---------------------------------------------------------------------------
+# Probes
+# ---------------------------------------------------------------------------
+
+def ipv4_addrs(ifname):
+    """IPv4 addresses on an interface: [{"local", "peer", "prefixlen"}].
+
+    `peer` is set only for point-to-point addresses (what `ip addr` prints
+    as `inet A peer B/32`). Returns [] if the interface does not exist.
+    """
+    try:
+        index = socket.if_nametoindex(ifname)
+    except OSError:
+        return []
+    addrs = []
+    for hdr, attrs in _dump(RTM_GETADDR, IFADDRMSG.pack(socket.AF_INET, 0, 0, 0, 0),
+                            RTM_NEWADDR):
+        _, prefixlen, _, _, ifindex = IFADDRMSG.unpack(hdr)
+        if ifindex != index:
+            continue
+        address = _ip(attrs.get(IFA_ADDRESS))
+        local = _ip(attrs.get(IFA_LOCAL)) or address
+        peer = address if address and address != local else None
+        addrs.append({"local": local, "peer": peer, "prefixlen": prefixlen})
+    return addrs
+
+
+def ipv4_routes(table="main"):
+    """Unicast IPv4 routes in a table: [{"dst", "dst_len", "gateway", "dev", ...}]."""
+    tid = table_id(table)
+    if tid is None:
+        return []
+    routes = []
+    for hdr, attrs in _dump(RTM_GETROUTE, RTMSG.pack(socket.AF_INET, 0, 0, 0, 0, 0, 0, 0, 0),
+                            RTM_NEWROUTE):
+        _, dst_len, _, _, rtm_table, _, _, rtm_type, _ = RTMSG.unpack(hdr)
+        if RTA_TABLE in attrs:
+            rtm_table = struct.unpack("=I", attrs[RTA_TABLE])[0]
+        if rtm_table != tid or rtm_type != RTN_UNICAST:
+            continue
+        oif = attrs.get(RTA_OIF)
+        metric = attrs.get(RTA_PRIORITY)
+        routes.append({
+            "dst": _ip(attrs.get(RTA_DST)) or "0.0.0.0",
+            "dst_len": dst_len,
+            "gateway": _ip(attrs.get(RTA_GATEWAY)),
+            "dev": _ifname(struct.unpack("=I", oif)[0]) if oif else None,
+            "src": _ip(attrs.get(RTA_PREFSRC)),
+            "metric": struct.unpack("=I", metric)[0] if metric else None,
+        })
+    return routes
+
+
+def format_route(r):
+    """Render a route dict the way `ip route show` does."""
+    parts = ["default" if r["dst_len"] == 0 else f"{r['dst']}/{r['dst_len']}"]
+    if r.get("gateway"):
+        parts.append(f"via {r['gateway']}")
+    if r.get("dev"):
+        parts.append(f"dev {r['dev']}")
+    if r.get("src"):
+        parts.append(f"src {r['src']}")
+    if r.get("metric") is not None:
+        parts.append(f"metric {r['metric']}")
+    return " ".join(parts)
+
+
+def ipv4_rules():
+    """IPv4 policy routing rules: [{"priority", "src", "src_len", "table"}]."""
+    rules = []
+    for hdr, attrs in _dump(RTM_GETRULE, RTMSG.pack(socket.AF_INET, 0, 0, 0, 0, 0, 0, 0, 0),
+                            RTM_NEWRULE):
+        _, dst_len, src_len, _, tid, _, _, _, _ = RTMSG.unpack(hdr)
+        if FRA_TABLE in attrs:
+            tid = struct.unpack("=I", attrs[FRA_TABLE])[0]
+        prio = attrs.get(FRA_PRIORITY)
+        rules.append({
+            "priority": struct.unpack("=I", prio)[0] if prio else 0,
+            "src": _ip(attrs.get(FRA_SRC)),
+            "src_len": src_len,
+            "dst": _ip(attrs.get(FRA_DST)),
+            "dst_len": dst_len,
+            "table": tid,
+        })
+    return rules
+
+
+def format_rule(r, tables=None):
+    """Render a rule dict the way `ip rule show` does."""
+    src = "all" if not r["src"] else (
+        r["src"] if r["src_len"] == 32 else f"{r['src']}/{r['src_len']}")
+    line = f"{r['priority']}:\tfrom {src}"
+    if r["dst"]:
+        line += f" to {r['dst']}" if r["dst_len"] == 32 else f" to {r['dst']}/{r['dst_len']}"
+    return f"{line} lookup {table_name(r['table'], tables)}"
+
+
+def listening_tcp_ports(proc_root="/proc"):
+    """Set of local TCP ports in LISTEN state (IPv4 and IPv6)."""
+    ports = set()
+    for name in ("tcp", "tcp6"):
+        try:
+            with open(os.path.join(proc_root, "net", name)) as f:
+                next(f, None)
+                for line in f:
+                    fields = line.split()
+                    if len(fields) > 3 and fields[3] == TCP_LISTEN:
+                        ports.add(int(fields[1].rsplit(":", 1)[1], 16))
+        except OSError:
+            continue
+    return ports
+
+
+if __name__ == "__main__":
+    tables = load_rt_tables()
+    for iface in sorted(socket.if_nameindex(), key=lambda i: i[0]):
+        print(iface[1], ipv4_addrs(iface[1]))
+    print("\n".join(format_route(r) for r in ipv4_routes()))
+    print("\n".join(format_rule(r, tables) for r in ipv4_rules()))
+    print("listening:", sorted(listening_tcp_ports()))
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Hot-path timing and on-demand sampling profiler for the Health Dashboard.
+Timings keeps a rolling window of durations per key (check name, forked
+command) and summarises them as p50/p95/max; recording is one deque append,
+cheap enough to leave on. Sampler walks the stacks of the check threads at
+a fixed interval for a given number of check cycles and aggregates them
+into collapsed stacks and per-function counts.
+"""
+
+import collections
+import os
+import sys
+import threading
+import time
+
+
+class Timings:
+    """Rolling window of durations (seconds) per key."""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._samples = {}     # key -> deque of seconds
+        self._counts = {}      # key -> {"runs": n, ...extra counters}
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds, **flags):
+        """Add one duration; truthy keyword flags (e.g. timeout=True) are counted."""
+        with self._lock:
+            d = self._samples.get(key)
+            if d is None:
+                d = self._samples[key] = collections.deque(maxlen=self.window)
+                self._counts[key] = {"runs": 0}
+            d.append(seconds)
+            counts = self._counts[key]
+            counts["runs"] += 1
+            for flag, on in flags.items():
+                if on:
+                    counts[flag] = counts.get(flag, 0) + 1
+
+    def summary(self):
+        """{key: {"runs", <flags>, "window", "p50_ms", "p95_ms", "max_ms", "last_ms"}}."""
+        with self._lock:
+            items = [(k, list(d), dict(self._counts[k])) for k, d in self._samples.items()]
+        out = {}
+        for key, samples, counts in sorted(items):
+            ordered = sorted(samples)
+            out[key] = {**counts, "window": len(ordered),
+                        "p50_ms": _ms(_pct(ordered, 50)),
+                        "p95_ms": _ms(_pct(ordered, 95)),
+                        "max_ms": _ms(ordered[-1]),
+                        "last_ms": _ms(samples[-1])}
+        return out
+
+
+def _pct(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class Sampler:
+    """Statistical profiler over threads whose name starts with `prefix`.
+
+    start(cycles) samples until tick() has been called `cycles` times (one
+    tick per finished check) or max_seconds pass, whichever comes first.
+    Costs nothing while stopped.
+    """
+
+    def __init__(self, prefix="check-", interval=0.005, max_seconds=300, depth=40):
+        self.prefix = prefix
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.depth = depth
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._reset(0)
+
+    def _reset(self, cycles):
+        self.cycles = cycles
+        self.cycles_left = cycles
+        self.samples = 0
+        self.started = None
+        self.stopped = None
+        self._stacks = collections.Counter()
+        self._self = collections.Counter()
+        self._total = collections.Counter()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, cycles, interval=None):
+        """Begin a new profile (discarding the last one); False if already running."""
+        with self._lock:
+            if self.running:
+                return False
+            self._reset(max(1, cycles))
+            if interval:
+                self.interval = interval
+            self.started = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="profiler")
+            self._thread.start()
+            return True
+
+    def stop(self):
+        self._stop.set()
+
+    def tick(self):
+        """Count one finished check cycle; stops the profile when none are left."""
+        if not self.running:
+            return
+        with self._lock:
+            self.cycles_left -= 1
+            if self.cycles_left <= 0:
+                self._stop.set()
+
+    def _run(self):
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            self._sample()
+        with self._lock:
+            self.stopped = time.time()
+
+    def _sample(self):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        frames = sys._current_frames()
+        with self._lock:
+            self.samples += 1
+            for ident, frame in frames.items():
+                name = names.get(ident, "")
+                if not name.startswith(self.prefix):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                stack.reverse()
+                self._stacks[(name,) + tuple(stack)] += 1
+                self._self[stack[-1]] += 1
+                for func in set(stack):
+                    self._total[func] += 1
+
+    def report(self, top=25):
+        """State plus the hottest collapsed stacks and functions (counts and %)."""
+        with self._lock:
+            hits = sum(self._stacks.values()) or 1
+            return {
+                "running": self.running,
+                "cycles": self.cycles,
+                "cycles_left": max(self.cycles_left, 0),
+                "interval_ms": _ms(self.interval),
+                "started": self.started,
+                "stopped": self.stopped,
+                "samples": self.samples,
+                "stacks": [{"stack": ";".join(k), "count": n, "pct": round(100 * n / hits, 1)}
+                           for k, n in self._stacks.most_common(top)],
+                "functions": [{"function": f, "self": n, "total": self._total[f],
+                               "self_pct": round(100 * n / hits, 1)}
+                              for f, n in self._self.most_common(top)],
+            }
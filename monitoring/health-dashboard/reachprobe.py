@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Concurrent reachability prober for the Health Dashboard.
+Pings every host at once from a single ICMP socket (unprivileged datagram
+ICMP if the kernel allows it, raw ICMP as root) and falls back to timed TCP
+connects when neither is permitted. Both rounds also come as coroutines
+that run on the caller's event loop. A ReachTracker keeps per-host RTT, loss
+and jitter over a sliding window of recent probes.
+"""
+
+import asyncio
+import errno
+import ipaddress
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+ICMP_HEADER = struct.Struct("!BBHHH")
+TCP_FALLBACK_PORTS = (80, 443, 53)
+
+
+# ---------------------------------------------------------------------------
+# ICMP
+# ---------------------------------------------------------------------------
+
+def _checksum(data):
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _echo_packet(ident, seq):
+    payload = struct.pack("!d", time.perf_counter()).ljust(16, b"\0")
+    header = ICMP_HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    csum = _checksum(header + payload)
+    return ICMP_HEADER.pack(ICMP_ECHO_REQUEST, 0, csum, ident, seq) + payload
+
+
+def resolve(hosts):
+    """{host: IPv4 address or None}, one lookup per host name.
+
+    Replies come back from an address, so probes are sent to and matched by
+    that address; a name that does not resolve is simply never answered.
+    """
+    addrs = {}
+    for host in hosts:
+        try:
+            addrs[host] = socket.getaddrinfo(host, None, socket.AF_INET)[0][4][0]
+        except (socket.gaierror, UnicodeError, IndexError):
+            addrs[host] = None
+    return addrs
+
+
+async def resolve_async(hosts):
+    """resolve() without blocking the event loop; addresses skip the lookup."""
+    loop = asyncio.get_running_loop()
+
+    async def one(host):
+        try:
+            return str(ipaddress.IPv4Address(host))
+        except ValueError:
+            pass
+        try:
+            return (await loop.getaddrinfo(host, None, family=socket.AF_INET))[0][4][0]
+        except (socket.gaierror, UnicodeError, IndexError):
+            return None
+
+    return dict(zip(hosts, await asyncio.gather(*(one(h) for h in hosts))))
+
+
+def _by_addr(addrs):
+    """address -> hosts that resolve to it, from a resolve() result."""
+    by_addr = {}
+    for host, addr in addrs.items():
+        if addr is not None:
+            by_addr.setdefault(addr, []).append(host)
+    return by_addr
+
+
+def open_icmp_socket():
+    """Return (socket, raw) or (None, None) when ICMP sockets are not allowed."""
+    for kind, raw in ((socket.SOCK_DGRAM, False), (socket.SOCK_RAW, True)):
+        try:
+            sock = socket.socket(socket.AF_INET, kind, socket.IPPROTO_ICMP)
+            sock.setblocking(False)
+            return sock, raw
+        except (PermissionError, OSError):
+            continue
+    return None, None
+
+
+def _send_round(sock, ident, by_addr, n, sent):
+    """Send round `n`'s echo request to every address, noting each in `sent`."""
+    for i, addr in enumerate(by_addr):
+        seq = (n * len(by_addr) + i) & 0xFFFF
+        try:
+            sock.sendto(_echo_packet(ident, seq), (addr, 0))
+            sent[(addr, seq)] = (n, time.perf_counter())
+        except OSError:
+            pass
+
+
+def _read_replies(sock, raw, ident, sent, by_addr, rtts):
+    """Match every reply waiting on `sock` to its request, recording the RTTs."""
+    while True:
+        try:
+            data, addr = sock.recvfrom(1024)
+        except (BlockingIOError, InterruptedError):
+            return
+        now = time.perf_counter()
+        if raw:
+            data = data[(data[0] & 0x0F) * 4:]
+        if len(data) < ICMP_HEADER.size:
+            continue
+        kind, _, _, rid, seq = ICMP_HEADER.unpack_from(data)
+        # Datagram ICMP sockets rewrite the id; the kernel only
+        # hands us our own replies, so only check it for raw.
+        if kind != ICMP_ECHO_REPLY or (raw and rid != ident):
+            continue
+        hit = sent.pop((addr[0], seq), None)
+        if hit:
+            for host in by_addr[addr[0]]:
+                rtts[host][hit[0]] = (now - hit[1]) * 1000
+
+
+def icmp_round(hosts, count=2, interval=0.2, timeout=1.0):
+    """Ping all hosts concurrently; return {host: [rtt_ms or None, ...]}.
+
+    Sends `count` echo requests per host `interval` seconds apart and waits
+    up to `timeout` seconds after the last one. Raises PermissionError if no
+    ICMP socket can be opened.
+    """
+    sock, raw = open_icmp_socket()
+    if sock is None:
+        raise PermissionError("ICMP sockets not permitted")
+    ident = os.getpid() & 0xFFFF
+    sent = {}                                   # (address, seq) -> (round, send time)
+    rtts = {h: [None] * count for h in hosts}
+    by_addr = _by_addr(resolve(hosts))
+    sel = selectors.DefaultSelector()
+    sel.register(sock, selectors.EVENT_READ)
+    try:
+        for n in range(count):
+            _send_round(sock, ident, by_addr, n, sent)
+            deadline = time.perf_counter() + (interval if n < count - 1 else timeout)
+            while len(sent) and time.perf_counter() < deadline:
+                if not sel.select(max(deadline - time.perf_counter(), 0)):
+                    continue
+                _read_replies(sock, raw, ident, sent, by_addr, rtts)
+                if not sent:
+                    break
+    finally:
+        sel.close()
+        sock.close()
+    return rtts
+
+
+async def icmp_round_async(hosts, count=2, interval=0.2, timeout=1.0):
+    """icmp_round() as a coroutine: the event loop watches the socket, no thread blocks."""
+    sock, raw = open_icmp_socket()
+    if sock is None:
+        raise PermissionError("ICMP sockets not permitted")
+    loop = asyncio.get_running_loop()
+    ident = os.getpid() & 0xFFFF
+    sent = {}
+    rtts = {h: [None] * count for h in hosts}
+    answered = asyncio.Event()                  # set once nothing sent is outstanding
+
+    def readable():
+        _read_replies(sock, raw, ident, sent, by_addr, rtts)
+        if not sent:
+            answered.set()
+
+    try:
+        by_addr = _by_addr(await resolve_async(hosts))
+        loop.add_reader(sock.fileno(), readable)
+        try:
+            for n in range(count):
+                answered.clear()
+                _send_round(sock, ident, by_addr, n, sent)
+                if not sent:
+                    continue
+                try:
+                    await asyncio.wait_for(answered.wait(),
+                                           interval if n < count - 1 else timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            loop.remove_reader(sock.fileno())
+    finally:
+        sock.close()
+    return rtts
+
+
+# ---------------------------------------------------------------------------
+# TCP fallback
+# ---------------------------------------------------------------------------
+
+def tcp_round(hosts, ports=TCP_FALLBACK_PORTS, timeout=1.0):
+    """Connect to every (host, port) at once; return {host: [rtt_ms or None]}.
+
+    A host counts as reachable on the first port that completes or actively
+    refuses the handshake (either way the host itself answered). Its other
+    ports are dropped then, so the round ends as soon as every host has
+    answered rather than waiting out a filtered port.
+    """
+    sel = selectors.DefaultSelector()
+    rtts = {h: [None] for h in hosts}
+    socks = []
+    try:
+        addrs = resolve(hosts)
+        start = time.perf_counter()
+        for host in hosts:
+            if addrs[host] is None:
+                continue
+            for port in ports:
+                s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                s.setblocking(False)
+                socks.append(s)
+                rc = s.connect_ex((addrs[host], port))
+                if rc in (0, errno.EINPROGRESS, errno.ECONNREFUSED):
+                    sel.register(s, selectors.EVENT_WRITE, host)
+        deadline = start + timeout
+        while sel.get_map() and time.perf_counter() < deadline:
+            for key, _ in sel.select(max(deadline - time.perf_counter(), 0)):
+                host = key.data
+                if rtts[host][0] is not None:
+                    continue      # closed below when a sibling port answered first
+                rc = key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                sel.unregister(key.fileobj)
+                if rc in (0, errno.ECONNREFUSED):
+                    rtts[host][0] = (time.perf_counter() - start) * 1000
+                    for other in [k.fileobj for k in sel.get_map().values()
+                                  if k.data == host]:
+                        sel.unregister(other)
+                        other.close()
+    finally:
+        sel.close()
+        for s in socks:
+            s.close()
+    return rtts
+
+
+async def tcp_round_async(hosts, ports=TCP_FALLBACK_PORTS, timeout=1.0):
+    """tcp_round() as a coroutine, one connect task per (host, port)."""
+    loop = asyncio.get_running_loop()
+    rtts = {h: [None] for h in hosts}
+    addrs = await resolve_async(hosts)
+    start = time.perf_counter()
+
+    async def connect(addr, port):
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.setblocking(False)
+        try:
+            await loop.sock_connect(s, (addr, port))
+        except ConnectionRefusedError:
+            pass
+        except OSError:
+            return None
+        finally:
+            s.close()
+        return (time.perf_counter() - start) * 1000
+
+    tasks = {asyncio.ensure_future(connect(addr, port)): host
+             for host, addr in addrs.items() if addr is not None for port in ports}
+    pending = set(tasks)
+    deadline = start + timeout
+    try:
+        # Stop at the deadline or once every host has answered on some port
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=max(deadline - time.perf_counter(), 0),
+                return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for task in done:
+                host, ms = tasks[task], task.result()
+                if ms is not None and rtts[host][0] is None:
+                    rtts[host][0] = ms
+            pending = {t for t in pending if rtts[tasks[t]][0] is None}
+    finally:
+        for task in tasks:
+            task.cancel()
+    return rtts
+
+
+# ---------------------------------------------------------------------------
+# Sliding-window statistics
+# ---------------------------------------------------------------------------
+
+class ReachTracker:
+    """Probe a set of hosts and keep RTT/loss/jitter over the last `window` samples."""
+
+    def __init__(self, window=30, count=2, timeout=1.0):
+        self.window = window
+        self.count = count
+        self.timeout = timeout
+        self.method = None
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def probe(self, hosts):
+        """Run one concurrent round and return {host: stats} (see stats())."""
+        hosts = list(hosts)
+        try:
+            rtts = icmp_round(hosts, count=self.count, timeout=self.timeout)
+            self.method = "icmp"
+        except PermissionError:
+            rtts = tcp_round(hosts, timeout=self.timeout)
+            self.method = "tcp"
+        return self._record(hosts, rtts)
+
+    async def probe_async(self, hosts):
+        """probe() as a coroutine, for checks running on an event loop."""
+        hosts = list(hosts)
+        try:
+            rtts = await icmp_round_async(hosts, count=self.count, timeout=self.timeout)
+            self.method = "icmp"
+        except PermissionError:
+            rtts = await tcp_round_async(hosts, timeout=self.timeout)
+            self.method = "tcp"
+        return self._record(hosts, rtts)
+
+    def _record(self, hosts, rtts):
+        with self._lock:
+            for host, samples in rtts.items():
+                buf = self._samples.setdefault(host, deque(maxlen=self.window))
+                buf.extend(samples)
+            return {h: self._stats(h, rtts[h]) for h in hosts}
+
+    def stats(self, host):
+        with self._lock:
+            return self._stats(host, [])
+
+    def _stats(self, host, last_round):
+        buf = self._samples.get(host, ())
+        got = [r for r in buf if r is not None]
+        jitter = (sum(abs(a - b) for a, b in zip(got, got[1:])) / (len(got) - 1)
+                  if len(got) > 1 else 0.0)
+        answered = [r for r in last_round if r is not None]
+        return {
+            "up": bool(answered) if last_round else bool(got),
+            "rtt_ms": sum(answered) / len(answered) if answered else None,
+            "avg_ms": sum(got) / len(got) if got else None,
+            "min_ms": min(got) if got else None,
+            "max_ms": max(got) if got else None,
+            "loss_pct": 100.0 * (len(buf) - len(got)) / len(buf) if buf else 0.0,
+            "jitter_ms": jitter,
+            "samples": len(buf),
+        }
+
+
+if __name__ == "__main__":
+    import sys
+    tracker = ReachTracker()
+    for host, s in tracker.probe(sys.argv[1:] or ["127.0.0.1"]).items():
+        print(host, tracker.method, s)
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Button event pipeline for the reTerminal's F1/F2/F3/O keys.
+
+Key events (code, value, kernel timestamp) go through a Decoder, which
+debounces them. It turns presses, long presses and chords into named
+actions according to a bindings table. Actions go to a Dispatcher, which
+runs them one at a time on a worker thread. While one is running, newer
+actions replace the queued one, so only the last press wins. Input is
+never held up by a slow action, and the press-to-done latency of every
+action is logged.
+
+Nothing here needs evdev: pump() reads anything with fd/read() that yields
+events with type/code/value/timestamp(), and replay() takes a synthetic
+list of (seconds, key, value) tuples:
+
+    python3 button_pipeline.py --replay events.txt [--config button_actions.json]
+
+Each line of the replay file is `seconds key down|up`, for example
+`0.000 F1 down`. Keys can be given by name or by evdev code.
+"""
+
+import argparse
+import collections
+import json
+import os
+import select
+import sys
+import threading
+import time
+
+EV_KEY = 1
+KEY_UP, KEY_DOWN, KEY_REPEAT = 0, 1, 2
+# gpio_keys on the reTerminal reports the four buttons as KEY_A..KEY_F
+KEY_NAMES = {30: "F1", 31: "F2", 32: "F3", 33: "O"}
+KEY_CODES = {name: code for code, name in KEY_NAMES.items()}
+
+CONFIG_PATH = os.path.expanduser("~/button_actions.json")
+
+# A key that has a long-press or chord binding acts on release, or when
+# its long-press or chord window runs out. Other keys act as soon as they
+# are pressed. The defaults keep every button on press.
+DEFAULT_BINDINGS = {
+    "press": {"F1": "dashboard", "F2": "homeassistant", "F3": "pihole", "O": "homepage"},
+    "long_press": {},
+    "chords": {},
+    "long_press_ms": 800,
+    "chord_ms": 150,
+    "debounce_ms": 30,
+}
+
+TABLES = ("press", "long_press", "chords")
+# What multi_button_handler.py can do; --replay checks bindings against these
+ACTIONS = frozenset({"dashboard", "homeassistant", "pihole", "homepage", "relaunch"})
+
+Action = collections.namedtuple("Action", "name trigger at")
+
+
+def key_code(key):
+    """evdev code for a key name ("F1") or code (30 or "30")."""
+    if isinstance(key, int) or str(key).isdigit():
+        return int(key)
+    try:
+        return KEY_CODES[key]
+    except KeyError:
+        raise ValueError(f"unknown key {key!r} (expected one of {', '.join(KEY_CODES)})")
+
+
+def key_name(code):
+    return KEY_NAMES.get(code, str(code))
+
+
+def load_bindings(path=CONFIG_PATH, actions=None):
+    """DEFAULT_BINDINGS updated from the JSON file at `path`, if it exists.
+
+    The press, long_press and chords tables are merged key by key, so a
+    file only lists what it changes; binding a key to null unbinds it. If
+    `actions` is given, every bound action must be one of them. Raises
+    ValueError for a file that cannot be parsed, or that names unknown
+    settings, keys or actions.
+    """
+    bindings = json.loads(json.dumps(DEFAULT_BINDINGS))
+    if path and os.path.exists(path):
+        try:
+            with open(path) as f:
+                loaded = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"{path}: {e}")
+        if not isinstance(loaded, dict):
+            raise ValueError(f"{path}: expected a JSON object")
+        unknown = set(loaded) - set(DEFAULT_BINDINGS)
+        if unknown:
+            raise ValueError(f"{path}: unknown settings {', '.join(sorted(unknown))}")
+        for name, value in loaded.items():
+            if name in TABLES:
+                if not isinstance(value, dict):
+                    raise ValueError(f"{path}: {name} must be an object")
+                for key, action in value.items():
+                    bindings[name].pop(key, None)
+                    if action is not None:
+                        bindings[name][key] = action
+            else:
+                bindings[name] = value
+    if actions is not None:
+        for table in TABLES:
+            for key, action in bindings[table].items():
+                if action not in actions:
+                    raise ValueError(f"{path}: {table} {key}: unknown action {action!r} "
+                                     f"(expected one of {', '.join(sorted(actions))})")
+    Decoder(bindings)   # validate keys and chords
+    return bindings
+
+
+# ---------------------------------------------------------------------------
+# Decoding
+# ---------------------------------------------------------------------------
+
+class Decoder:
+    """Key events in, Actions out.
+
+    feed() takes one key event and returns the actions it completes.
+    expire() returns the actions whose long-press or chord window has run
+    out by `now`. deadline() is when expire() next has something to do.
+    All times are in seconds on the events' clock.
+    """
+
+    def __init__(self, bindings):
+        self.press = {key_code(k): v for k, v in bindings.get("press", {}).items()}
+        self.long_press = {key_code(k): v for k, v in bindings.get("long_press", {}).items()}
+        self.chords = {}
+        for combo, action in bindings.get("chords", {}).items():
+            keys = frozenset(key_code(k) for k in combo.split("+"))
+            if len(keys) < 2:
+                raise ValueError(f"chord {combo!r} needs at least two keys")
+            self.chords[keys] = action
+        self.chord_keys = set().union(*self.chords) if self.chords else set()
+        self.long_s = bindings.get("long_press_ms", 800) / 1000
+        self.chord_s = bindings.get("chord_ms", 150) / 1000
+        self.debounce_s = bindings.get("debounce_ms", 30) / 1000
+        self.down = {}          # code -> press time, for accepted presses still held
+        self.undecided = {}     # code -> press time, held keys whose action is not known yet
+        self.released = {}      # code -> last release time
+        self.stats = {"events": 0, "bounces": 0, "chords": 0, "long": 0}
+
+    def feed(self, t, code, value):
+        self.stats["events"] += 1
+        if value == KEY_DOWN:
+            return self._pressed(t, code)
+        if value == KEY_UP:
+            return self._released(t, code)
+        return []   # autorepeat: long presses are timed, not counted
+
+    def _pressed(self, t, code):
+        if code in self.down:
+            return []
+        if t - self.released.get(code, float("-inf")) < self.debounce_s:
+            self.stats["bounces"] += 1
+            return []
+        self.down[code] = t
+        if code in self.chord_keys:
+            held = {c for c, at in self.undecided.items()
+                    if c in self.chord_keys and t - at <= self.chord_s}
+            action = self.chords.get(frozenset(held | {code}))
+            if action is not None:
+                for c in held:
+                    del self.undecided[c]
+                self.stats["chords"] += 1
+                trigger = "+".join(key_name(c) for c in sorted(held | {code}))
+                return [Action(action, trigger, t)]
+        if code in self.chord_keys or code in self.long_press:
+            self.undecided[code] = t
+            return []
+        return self._single(code, t)
+
+    def _released(self, t, code):
+        if self.down.pop(code, None) is None:
+            return []   # release of a bounced or unknown press
+        self.released[code] = t
+        if self.undecided.pop(code, None) is None:
+            return []
+        return self._single(code, t)
+
+    def _single(self, code, t):
+        action = self.press.get(code)
+        return [Action(action, key_name(code), t)] if action else []
+
+    def deadline(self):
+        times = []
+        for code, at in self.undecided.items():
+            if code in self.chord_keys and code not in self.long_press:
+                times.append(at + self.chord_s)
+            elif code in self.long_press:
+                times.append(at + self.long_s)
+        return min(times) if times else None
+
+    def expire(self, now):
+        actions = []
+        for code, at in list(self.undecided.items()):
+            if code in self.long_press:
+                if now >= at + self.long_s:
+                    del self.undecided[code]
+                    self.stats["long"] += 1
+                    actions.append(Action(self.long_press[code], f"{key_name(code)} (long)",
+                                          at + self.long_s))
+            elif now >= at + self.chord_s:
+                # No partner in time: a plain press, acted on while still held
+                del self.undecided[code]
+                actions += self._single(code, at + self.chord_s)
+        return actions
+
+
+# ---------------------------------------------------------------------------
+# Dispatching
+# ---------------------------------------------------------------------------
+
+class Dispatcher:
+    """Runs actions on one worker thread, keeping only the newest waiting one.
+
+    `perform(name)` does the work. Latency is measured from the action's
+    `at` on `clock` (the event timestamps' clock) to the end of perform().
+    """
+
+    def __init__(self, perform, log=print, clock=time.time, history=200):
+        self.perform = perform
+        self.log = log
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._pending = None
+        self._busy = False
+        self._stopped = False
+        self.latencies = collections.deque(maxlen=history)   # ms, most recent actions
+        self.stats = {"submitted": 0, "done": 0, "collapsed": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, daemon=True, name="button-actions")
+        self._thread.start()
+
+    def submit(self, action):
+        with self._cond:
+            self.stats["submitted"] += 1
+            if self._pending is not None:
+                self.stats["collapsed"] += 1
+                self.log(f"{self._pending.trigger} -> {self._pending.name} superseded "
+                         f"by {action.trigger}")
+            self._pending = action
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                action, self._pending, self._busy = self._pending, None, True
+            started = self.clock()
+            try:
+                self.perform(action.name)
+                failed = False
+            except Exception as e:
+                self.log(f"{action.trigger} -> {action.name} failed: {e}")
+                failed = True
+            done = self.clock()
+            total = (done - action.at) * 1000
+            with self._cond:
+                self.stats["errors" if failed else "done"] += 1
+                self.latencies.append(total)
+                self._busy = False
+                self._cond.notify_all()
+            self.log(f"{action.trigger} -> {action.name}: {total:.0f} ms from input "
+                     f"(waited {(started - action.at) * 1000:.0f} ms, "
+                     f"ran {(done - started) * 1000:.0f} ms)")
+
+    def wait_idle(self, timeout=None):
+        """Block until nothing is queued or running. False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+
+
+# ---------------------------------------------------------------------------
+# Event sources
+# ---------------------------------------------------------------------------
+
+def pump(device, decoder, dispatcher, clock=time.time):
+    """Read key events from an evdev InputDevice until it goes away.
+
+    Waits on the device fd with select(), waking early for the decoder's
+    next long-press or chord deadline. Returns when read() fails (device
+    unplugged or closed).
+    """
+    while True:
+        deadline = decoder.deadline()
+        timeout = None if deadline is None else max(0.0, deadline - clock())
+        readable, _, _ = select.select([device.fd], [], [], timeout)
+        if readable:
+            try:
+                events = list(device.read())
+            except BlockingIOError:
+                events = []
+            for event in events:
+                if event.type == EV_KEY:
+                    for action in decoder.feed(event.timestamp(), event.code, event.value):
+                        dispatcher.submit(action)
+        for action in decoder.expire(clock()):
+            dispatcher.submit(action)
+
+
+def replay(events, decoder, dispatcher, speed=0.0):
+    """Feed synthetic (seconds, key, value) events, firing deadlines in between.
+
+    Times are offsets from now. With `speed` 1 they are fed in real time, so
+    the logged latencies are real. With 0 they are fed as fast as possible,
+    still timestamped as given, which checks decoding only. Returns the
+    Actions submitted.
+    """
+    base = dispatcher.clock()
+    submitted = []
+
+    def wait(t):
+        if speed:
+            time.sleep(max(0.0, base + (t - base) * speed - dispatcher.clock()))
+
+    def expire_until(t):
+        deadline = decoder.deadline()
+        while deadline is not None and deadline <= t:
+            wait(deadline)
+            for action in decoder.expire(deadline):
+                submitted.append(action)
+                dispatcher.submit(action)
+            deadline = decoder.deadline()
+
+    for offset, key, value in sorted(events, key=lambda e: e[0]):
+        t = base + offset
+        expire_until(t)
+        wait(t)
+        for action in decoder.feed(t, key_code(key), value):
+            submitted.append(action)
+            dispatcher.submit(action)
+    expire_until(float("inf"))
+    return submitted
+
+
+def read_replay(path):
+    """Parse `seconds key down|up|repeat` lines; blank lines and # comments are skipped."""
+    values = {"down": KEY_DOWN, "up": KEY_UP, "repeat": KEY_REPEAT}
+    events = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            try:
+                seconds, key, value = line.split()
+                events.append((float(seconds), key, values[value]))
+            except (ValueError, KeyError):
+                raise ValueError(f"{path}:{number}: expected `seconds key down|up`, got {line!r}")
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay synthetic button events through the pipeline")
+    parser.add_argument("--replay", required=True, help="event file (`seconds key down|up` per line)")
+    parser.add_argument("--config", default=CONFIG_PATH, help="bindings JSON")
+    parser.add_argument("--action-ms", type=float, default=0.0,
+                        help="simulated time each action takes")
+    args = parser.parse_args()
+    try:
+        bindings = load_bindings(args.config, actions=ACTIONS)
+        events = read_replay(args.replay)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 2
+    dispatcher = Dispatcher(lambda name: time.sleep(args.action_ms / 1000))
+    decoder = Decoder(bindings)
+    for action in replay(events, decoder, dispatcher, speed=1.0):
+        print(f"  {action.trigger:>10} -> {action.name}")
+    dispatcher.wait_idle()
+    dispatcher.stop()
+    print(f"decoder {decoder.stats}, dispatcher {dispatcher.stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Persistent kiosk browser for the reTerminal display.
+
+One Chromium runs for as long as the display is up, started with the
+DevTools remote debugging endpoint on 127.0.0.1 and every dashboard loaded
+in its own tab. show(name) brings a tab to the front with one local HTTP
+request (/json/activate/<id>), so switching dashboards takes milliseconds
+and starts no processes. A tab that was closed is reopened, and a browser
+that has gone away is launched again. If no Chromium with a working
+debugging endpoint can be started, show() raises KioskError and the caller
+falls back to a cold launch.
+
+    python3 kiosk_browser.py status
+"""
+
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from urllib.parse import quote, urlsplit
+
+DEVTOOLS_PORT = 9222
+PROFILE_DIR = os.path.expanduser("~/.config/chromium-kiosk")
+BROWSERS = ("chromium-browser", "chromium")
+STARTUP_TIMEOUT = 30.0   # Chromium on the CM4 takes 3-6 s to answer
+REQUEST_TIMEOUT = 2.0
+
+# Chromium only serves the debugging endpoint for a non-default profile.
+# Background tabs keep their renderers (no discarding) so a switch never
+# reloads a page; timer throttling stays on to keep their CPU use low.
+CHROMIUM_FLAGS = [
+    "--kiosk",
+    "--no-sandbox",
+    "--disable-infobars",
+    "--disable-session-crashed-bubble",
+    "--disable-restore-session-state",
+    "--disable-features=TranslateUI,AutomaticTabDiscarding",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+]
+
+
+class KioskError(Exception):
+    """No browser with a usable DevTools endpoint."""
+
+
+def origin(url):
+    """scheme://host:port of a URL; each dashboard lives on its own origin."""
+    parts = urlsplit(url)
+    port = parts.port or {"http": 80, "https": 443}.get(parts.scheme)
+    return f"{parts.scheme}://{parts.hostname}:{port}"
+
+
+class KioskBrowser:
+    """Chromium in kiosk mode with one preloaded tab per entry of `urls` (name -> URL)."""
+
+    def __init__(self, urls, port=DEVTOOLS_PORT, profile=PROFILE_DIR, log=print):
+        self.urls = dict(urls)
+        self.port = port
+        self.profile = profile
+        self.log = log
+        self.tabs = {}          # name -> DevTools target id
+        self.current = None
+        self.proc = None
+        self.stats = {"switches": 0, "reopened": 0, "launches": 0, "adopted": 0}
+
+    # -- DevTools HTTP endpoint ------------------------------------------------
+
+    def _request(self, path, method="GET", timeout=REQUEST_TIMEOUT):
+        """(status, body) from the endpoint; OSError if nothing is listening."""
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=timeout)
+        try:
+            conn.request(method, path)
+            resp = conn.getresponse()
+            return resp.status, resp.read()
+        except http.client.HTTPException as e:
+            raise OSError(f"DevTools endpoint: {e}")
+        finally:
+            conn.close()
+
+    def alive(self):
+        try:
+            return self._request("/json/version", timeout=0.5)[0] == 200
+        except OSError:
+            return False
+
+    def pages(self):
+        status, body = self._request("/json/list")
+        if status != 200:
+            raise OSError(f"/json/list returned {status}")
+        return [t for t in json.loads(body) if t.get("type") == "page"]
+
+    def _open(self, url):
+        path = "/json/new?" + quote(url, safe=":/?&=%#")
+        status, body = self._request(path, method="PUT")
+        if status == 405:   # Chromium before 111 only accepts GET
+            status, body = self._request(path)
+        if status != 200:
+            raise OSError(f"/json/new returned {status}")
+        return json.loads(body)["id"]
+
+    def _activate(self, target):
+        """True if the tab was brought to the front, False if it no longer exists."""
+        return self._request(f"/json/activate/{target}")[0] == 200
+
+    def _close(self, target):
+        self._request(f"/json/close/{target}")
+
+    # -- lifecycle ------------------------------------------------------------
+
+    def _launch(self):
+        """Start Chromium with the debugging endpoint and a blank page."""
+        # A kiosk started by the launch-*-kiosk.sh scripts would cover ours
+        subprocess.run(["pkill", "-f", "chromium.*--kiosk"], stderr=subprocess.DEVNULL)
+        os.makedirs(self.profile, exist_ok=True)
+        for name in BROWSERS:
+            cmd = [name, f"--remote-debugging-port={self.port}",
+                   f"--user-data-dir={self.profile}", *CHROMIUM_FLAGS, "about:blank"]
+            try:
+                # Own session: the browser outlives the button handler, and a
+                # restarted handler adopts it instead of starting another
+                self.proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL,
+                                             stderr=subprocess.DEVNULL, start_new_session=True)
+                self.log(f"Started {name} with DevTools on port {self.port}")
+                return
+            except FileNotFoundError:
+                continue
+        raise KioskError("no Chromium binary found")
+
+    def start(self):
+        """Attach to the kiosk browser, launching it if needed, and load every tab."""
+        if self.alive():
+            self.stats["adopted"] += 1
+        else:
+            self._launch()
+            self.stats["launches"] += 1
+            deadline = time.monotonic() + STARTUP_TIMEOUT
+            while not self.alive():
+                if self.proc is not None and self.proc.poll() is not None:
+                    raise KioskError(f"browser exited with status {self.proc.returncode}")
+                if time.monotonic() > deadline:
+                    raise KioskError(f"no DevTools endpoint after {STARTUP_TIMEOUT:.0f}s")
+                time.sleep(0.1)
+        try:
+            self._load_tabs()
+        except (OSError, ValueError, KeyError) as e:
+            raise KioskError(f"preloading tabs: {e}")
+
+    def _load_tabs(self):
+        """Keep one tab per dashboard: reuse tabs already on its origin, open the rest,
+        close everything else (blank pages, duplicates)."""
+        wanted = {origin(url): name for name, url in self.urls.items()}
+        self.tabs = {}
+        extra = []
+        for page in self.pages():
+            name = wanted.get(origin(page.get("url", "")))
+            if name is not None and name not in self.tabs:
+                self.tabs[name] = page["id"]
+            else:
+                extra.append(page["id"])
+        for name, url in self.urls.items():
+            if name not in self.tabs:
+                self.tabs[name] = self._open(url)
+        for target in extra:
+            self._close(target)
+        self.current = None
+        self.log(f"Kiosk tabs ready: {', '.join(self.tabs)}")
+
+    def _kill(self, sig="TERM"):
+        """Signal the browser serving our DevTools port, whether we launched it or adopted it."""
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.send_signal(getattr(signal, f"SIG{sig}"))
+        # `--` so pkill takes the pattern, which starts with dashes, as a pattern
+        subprocess.run(["pkill", f"-{sig}", "-f", "--",
+                        f"--remote-debugging-port={self.port}( |$)"], stderr=subprocess.DEVNULL)
+
+    def _wait_gone(self, seconds):
+        deadline = time.monotonic() + seconds
+        while self.alive():
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def restart(self):
+        """Kill the kiosk browser, launch it again and show the tab that was in front."""
+        current = self.current
+        self._kill()
+        if not self._wait_gone(5):
+            self.log("Kiosk browser ignored SIGTERM, killing it")
+            self._kill("KILL")
+            if not self._wait_gone(2):
+                raise KioskError(f"browser on DevTools port {self.port} would not stop")
+        self.start()
+        if current:
+            self.show(current)
+
+    # -- switching ------------------------------------------------------------
+
+    def show(self, name):
+        """Bring the `name` tab to the front. Returns the milliseconds it took."""
+        start = time.perf_counter()
+        try:
+            target = self.tabs.get(name)
+            if target is None or not self._activate(target):
+                # Tab closed or never opened: open it again in the running browser
+                self.tabs[name] = self._open(self.urls[name])
+                self.stats["reopened"] += 1
+                self._activate(self.tabs[name])
+        except OSError as e:
+            # Endpoint gone: the browser died or was stopped with control-kiosk.sh
+            self.log(f"Kiosk browser not responding ({e}), relaunching")
+            self.start()
+            if not self._try_activate(self.tabs[name]):
+                raise KioskError(f"could not bring up the {name} tab")
+        except (ValueError, KeyError) as e:
+            raise KioskError(f"unexpected DevTools reply: {e}")
+        self.current = name
+        self.stats["switches"] += 1
+        return (time.perf_counter() - start) * 1000
+
+    def _try_activate(self, target):
+        try:
+            return self._activate(target)
+        except OSError:
+            return False
+
+    def status(self):
+        """Open dashboard tabs by name, or None if the browser is not running."""
+        if not self.alive():
+            return None
+        by_id = {page["id"]: page.get("url", "") for page in self.pages()}
+        return {name: by_id.get(target) for name, target in self.tabs.items()} or by_id
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["status"]:
+        print(f"Usage: {sys.argv[0]} status")
+        sys.exit(2)
+    tabs = KioskBrowser({}).status()
+    if tabs is None:
+        print(f"Kiosk browser is not running (no DevTools endpoint on port {DEVTOOLS_PORT})")
+        sys.exit(1)
+    for target, url in tabs.items():
+        print(f"  {target}  {url}")
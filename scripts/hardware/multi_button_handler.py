@@ -7,6 +7,18 @@ reTerminal Multi-Button Handler
 - F3 Button: Opens Pi-hole Dashboard (auto-login)
 - O Button (Green Circle): Opens Homepage
 Uses the same method as the Seeed examples
+
+All four pages stay loaded in one long-lived Chromium (kiosk_browser.py);
+a button press switches tabs over the DevTools endpoint instead of
+restarting the browser. Without kiosk_browser.py, or if Chromium's
+debugging endpoint cannot be reached, each press cold-launches a browser
+on the page as before.
+
+Key events go through button_pipeline.py. It debounces them and decodes
+presses, long presses and chords using ~/button_actions.json (or --config).
+A worker thread runs the resulting actions, so reading input never waits
+on the browser. If presses arrive while an action is running, only the
+last one is acted on.
 """
 
 import subprocess
@@ -15,20 +27,54 @@ import os
 import signal
 import sys
 import logging
-from evdev import InputDevice, ecodes
+import argparse
+from evdev import InputDevice
+
+import button_pipeline
+
+try:
+    import docker_api   # shared Engine API client (monitoring/health-dashboard/docker_api.py)
+except ImportError:
+    docker_api = None
+
+try:
+    import kiosk_browser   # persistent tabbed kiosk (scripts/hardware/kiosk_browser.py)
+except ImportError:
+    kiosk_browser = None
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class MultiButtonHandler:
-    def __init__(self):
+    def __init__(self, config_path=button_pipeline.CONFIG_PATH):
         self.device_path = None
         # URLs for different services
         self.dashboard_url = "http://localhost:3002/d/a342df05-226d-4233-b5e7-f46688260197/reterminal-system-vitals?kiosk=true&refresh=5s"
         self.homeassistant_url = "http://localhost:8123/lovelace"
         self.pihole_url = "http://localhost:8080/admin"
         self.homepage_url = "http://192.168.1.76:3000"
+        self.kiosk = None
+        if kiosk_browser:
+            self.kiosk = kiosk_browser.KioskBrowser({
+                "dashboard": self.dashboard_url,
+                "homeassistant": self.homeassistant_url,
+                "pihole": self.pihole_url,
+                "homepage": self.homepage_url,
+            }, log=logger.info)
+        # Action name -> (kiosk tab, URL, description)
+        self.actions = {
+            "dashboard": ("dashboard", self.dashboard_url, "System Vitals Dashboard"),
+            "homeassistant": ("homeassistant", self.homeassistant_url, "Home Assistant Overview"),
+            "pihole": ("pihole", self.pihole_url, "Pi-hole Dashboard"),
+            "homepage": ("homepage", self.homepage_url, "Homepage"),
+        }
+        try:
+            self.bindings = button_pipeline.load_bindings(
+                config_path, actions=set(self.actions) | {"relaunch"})
+        except ValueError as e:
+            logger.error(f"Ignoring button config: {e}")
+            self.bindings = button_pipeline.load_bindings(None)
         self.find_gpio_keys_device()
         
     def find_gpio_keys_device(self):
@@ -63,6 +109,14 @@ class MultiButtonHandler:
     
     def get_cli_password(self):
         """Get the current CLI password from Pi-hole"""
+        if docker_api:
+            try:
+                out, rc = docker_api.DockerClient().exec("pihole", ["cat", "/etc/pihole/cli_pw"], timeout=5)
+                if rc == 0:
+                    return out.strip()
+                return None
+            except docker_api.DockerError as e:
+                logger.error(f"Error getting CLI password via Docker API: {e}")
         try:
             result = subprocess.run(
                 ["docker", "exec", "pihole", "cat", "/etc/pihole/cli_pw"],
@@ -74,8 +128,21 @@ class MultiButtonHandler:
             logger.error(f"Error getting CLI password: {e}")
         return None
     
+    def show(self, tab, url, service_name):
+        """Switch the kiosk to a preloaded tab, cold-launching a browser if that fails"""
+        if self.kiosk:
+            try:
+                ms = self.kiosk.show(tab)
+                logger.info(f"Switched to {service_name} in {ms:.0f} ms")
+                return
+            except kiosk_browser.KioskError as e:
+                # Stop retrying: a relaunch that failed once would stall every press
+                logger.error(f"Kiosk tab switch failed ({e}), cold-launching from now on")
+                self.kiosk = None
+        self.open_browser_kiosk(url, service_name)
+
     def open_browser_kiosk(self, url, service_name):
-        """Open a URL in kiosk mode"""
+        """Open a URL in kiosk mode (cold launch, used when tab switching is unavailable)"""
         try:
             logger.info(f"Opening {service_name} in kiosk mode: {url}")
             
@@ -105,53 +172,59 @@ class MultiButtonHandler:
         except Exception as e:
             logger.error(f"Error opening {service_name} in kiosk mode: {e}")
 
+    def perform(self, action):
+        """Run one named action (called on the dispatcher's worker thread)"""
+        if action == "startup":
+            # Start (or adopt) the kiosk browser with every page preloaded,
+            # then show the System Vitals dashboard
+            if self.kiosk:
+                try:
+                    self.kiosk.start()
+                except kiosk_browser.KioskError as e:
+                    logger.error(f"Could not preload kiosk tabs ({e}), cold-launching instead")
+                    self.kiosk = None
+            action = "dashboard"
+        elif action == "relaunch":
+            # Recover a frozen page or display: restart the browser, keep the current tab
+            if self.kiosk:
+                try:
+                    self.kiosk.restart()
+                    return
+                except kiosk_browser.KioskError as e:
+                    logger.error(f"Kiosk relaunch failed ({e}), cold-launching instead")
+                    self.kiosk = None
+            action = "dashboard"
+        if action not in self.actions:
+            raise ValueError(f"unknown action {action!r}")
+        self.show(*self.actions[action])
+
     def run(self):
         """Main loop to monitor button presses"""
         if not self.device_path:
             logger.error("No device path available")
             return
-            
+
         logger.info(f"Monitoring buttons on {self.device_path}")
         logger.info("Button mappings:")
-        logger.info("  F1 (leftmost): System Vitals Dashboard") 
-        logger.info("  F2 (second): Home Assistant Overview")
-        logger.info("  F3 (third): Pi-hole Dashboard")
-        logger.info("  O (green circle): Homepage")
+        for kind in ("press", "long_press", "chords"):
+            for keys, action in self.bindings[kind].items():
+                label = self.actions[action][2] if action in self.actions else action
+                logger.info(f"  {keys}{' (long)' if kind == 'long_press' else ''}: {label}")
         logger.info("Press Ctrl+C to stop")
-        
-        # Open System Vitals dashboard on startup
-        self.open_browser_kiosk(self.dashboard_url, "System Vitals Dashboard")
-        
+
+        decoder = button_pipeline.Decoder(self.bindings)
+        dispatcher = button_pipeline.Dispatcher(self.perform, log=logger.info)
+        dispatcher.submit(button_pipeline.Action("startup", "startup", time.time()))
+
         try:
             device = InputDevice(self.device_path)
-            
-            for event in device.read_loop():
-                if event.type == ecodes.EV_KEY:
-                    # Parse the event (same as Seeed example)
-                    keyevents = repr(event)
-                    val_list = keyevents.replace('(', '').replace(')', '').replace(' ', '').split(',')
-                    
-                    if len(val_list) >= 5:
-                        key_code = val_list[3]
-                        key_value = int(val_list[4])
-                        
-                        # Only respond to key press events (value 1), not release (value 0)
-                        if key_value == 1:
-                            if key_code == '30':  # F1 button (key1 in Seeed code)
-                                self.open_browser_kiosk(self.dashboard_url, "System Vitals Dashboard")
-                            elif key_code == '31':  # F2 button (key2 in Seeed code)
-                                self.open_browser_kiosk(self.homeassistant_url, "Home Assistant Overview")
-                            elif key_code == '32':  # F3 button (key3 in Seeed code)
-                                self.open_browser_kiosk(self.pihole_url, "Pi-hole Dashboard")
-                            elif key_code == '33':  # O button (key4 in Seeed code) 
-                                self.open_browser_kiosk(self.homepage_url, "Homepage")
-                            else:
-                                logger.debug(f"Unhandled key code: {key_code}")
-                            
+            button_pipeline.pump(device, decoder, dispatcher)
         except KeyboardInterrupt:
             logger.info("Shutting down multi-button handler...")
         except Exception as e:
             logger.error(f"Error monitoring buttons: {e}")
+        finally:
+            dispatcher.stop()
 
 def signal_handler(sig, frame):
     """Handle signals gracefully"""
@@ -164,6 +237,11 @@ if __name__ == "__main__":
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # Auto-reap child processes
 
+    parser = argparse.ArgumentParser(description="reTerminal multi-button handler")
+    parser.add_argument("--config", default=button_pipeline.CONFIG_PATH,
+                        help="button bindings JSON (press, long_press, chords)")
+    args = parser.parse_args()
+
     # Create and run the button handler
-    handler = MultiButtonHandler()
+    handler = MultiButtonHandler(args.config)
     handler.run()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Pi-hole Database Maintenance - online replacement for cleanup_database.sh
+Trims and compacts pihole-FTL.db while Pi-hole keeps running: no container
+stop, no full copy, no long exclusive lock.
+
+  * Old queries are deleted in small id-range batches, one short write
+    transaction each. The batch size adapts so that no transaction holds
+    the write lock longer than --max-lock-ms. Pauses between batches keep
+    writes to a --duty share of the time.
+  * If dnsprobe.py is deployed alongside, Pi-hole's own DNS latency is
+    probed between batches. When it rises past --dns-limit-ms, the tool
+    backs off.
+  * Freed pages are returned to the filesystem with PRAGMA
+    incremental_vacuum, a few hundred pages per step, when the database
+    uses auto_vacuum=INCREMENTAL. --convert switches it over once; that
+    needs one full VACUUM, which holds the write lock for the whole
+    rewrite (minutes on a 1.4 GB file) and needs that much free disk, so
+    it only runs with --yes. Otherwise the free pages stay in the file and
+    FTL reuses them for new rows.
+  * --backup PATH copies the database with SQLite's online backup API, a
+    few MB per step. The copy is a consistent snapshot even while FTL
+    writes.
+
+    sudo python3 pihole_db_maintenance.py [--days 7] [--backup PATH] [--convert --yes]
+                                          [--db PATH] [--dry-run]
+
+Progress goes to stdout; the summary reports rows deleted, pages freed and
+the file size before and after.
+"""
+
+import argparse
+import os
+import pwd
+import sqlite3
+import sys
+import time
+
+try:
+    import dnsprobe   # shared UDP DNS probe (monitoring/health-dashboard/dnsprobe.py)
+except ImportError:
+    dnsprobe = None
+
+KEEP_DAYS = 7              # matches FTLCONF_MAXDBDAYS in docker/pihole/docker-compose.yml
+BATCH_ROWS = 5000          # starting rows per delete transaction (200..100000)
+MAX_LOCK_MS = 50           # target longest write transaction
+DUTY = 0.25                # share of wall time spent holding the write lock
+VACUUM_PAGES = 256         # starting pages per incremental_vacuum step (16..16384)
+BACKUP_PAGES = 1024        # pages copied per backup step (4 MB at 4 KiB pages)
+BACKUP_RESTARTS = 3        # then finish the backup in one step
+DNS_SERVER = "127.0.0.1"
+DNS_DOMAIN = "google.com"
+DNS_LIMIT_MS = 50          # back off when Pi-hole answers slower than this
+PROGRESS_EVERY = 2.0       # seconds between progress lines
+
+
+def default_db():
+    """~/pihole-docker/... of the invoking user, also under sudo."""
+    user = os.environ.get("SUDO_USER")
+    home = pwd.getpwnam(user).pw_dir if user else os.path.expanduser("~")
+    return os.path.join(home, "pihole-docker", "etc-pihole", "pihole-FTL.db")
+
+
+def log(msg):
+    print(f"[{time.strftime('%H:%M:%S')}] {msg}", flush=True)
+
+
+def mb(n_bytes):
+    return f"{n_bytes / 2**20:.1f} MB"
+
+
+# ---------------------------------------------------------------------------
+# Throttling
+# ---------------------------------------------------------------------------
+
+class Throttle:
+    """Size batches to the lock budget and pace them to the duty cycle.
+
+    after() is called with each transaction's duration. It halves the batch
+    (within `limits`) when the transaction ran over budget and doubles it
+    when it ran under half. It then sleeps long enough to keep writes at
+    `duty` of the wall time, or longer while DNS is slow.
+    """
+
+    def __init__(self, batch=BATCH_ROWS, limits=(200, 100_000), max_lock_ms=MAX_LOCK_MS,
+                 duty=DUTY, dns_limit_ms=DNS_LIMIT_MS, probe=True):
+        self.batch = batch
+        self.limits = limits
+        self.max_lock = max_lock_ms / 1000
+        self.duty = duty
+        self.dns_limit_ms = dns_limit_ms
+        self.probe = probe and dnsprobe is not None
+        self.longest = 0.0
+        self.dns_ms = []
+        self.backoffs = 0
+        self._unanswered = 0
+
+    def dns_latency_ms(self):
+        """Pi-hole's answer time; inf if it didn't answer, None when not probing."""
+        if not self.probe:
+            return None
+        summary = dnsprobe.probe_servers([DNS_SERVER], [DNS_DOMAIN], timeout=1.0)
+        us = summary[DNS_SERVER]["latency_us"]
+        if us is not None:
+            self._unanswered = 0
+            return us / 1000
+        # A timeout counts as slow, but a server that never answers isn't our doing
+        self._unanswered += 1
+        if self._unanswered >= 3:
+            log(f"DNS at {DNS_SERVER} not answering; probing off")
+            self.probe = False
+        return float("inf")
+
+    def after(self, seconds):
+        self.longest = max(self.longest, seconds)
+        low, high = self.limits
+        if seconds > self.max_lock:
+            self.batch = max(low, self.batch // 2)
+        elif seconds < self.max_lock / 2:
+            self.batch = min(high, self.batch * 2)
+        pause = seconds * (1 - self.duty) / self.duty
+        latency = self.dns_latency_ms()
+        if latency is not None:
+            if latency != float("inf"):
+                self.dns_ms.append(latency)
+            if latency > self.dns_limit_ms:
+                self.backoffs += 1
+                self.batch = max(low, self.batch // 2)
+                pause = max(pause, 1.0)
+        time.sleep(pause)
+
+
+# ---------------------------------------------------------------------------
+# Steps
+# ---------------------------------------------------------------------------
+
+def connect(path):
+    # FTL writes about once a minute; wait for it rather than failing
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout = 30000")
+    return conn
+
+
+def query_table(conn):
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if "query_storage" in tables:
+        return "query_storage"
+    if "queries" in tables:
+        return "queries"   # FTL < 5.7
+    raise SystemExit("No query_storage/queries table: is this pihole-FTL.db?")
+
+
+def page_stats(conn, path):
+    return {"pages": conn.execute("PRAGMA page_count").fetchone()[0],
+            "free": conn.execute("PRAGMA freelist_count").fetchone()[0],
+            "page_size": conn.execute("PRAGMA page_size").fetchone()[0],
+            "bytes": os.path.getsize(path)}
+
+
+class _Restarted(Exception):
+    pass
+
+
+def backup(conn, dest, pages=BACKUP_PAGES, pause=0.05):
+    """Online backup to `dest` (replaced atomically once complete)."""
+    tmp = dest + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    state = {"remaining": None, "restarts": 0, "last": 0.0}
+
+    def progress(status, remaining, total):
+        # Another connection (FTL) wrote to the source: the copy starts over
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            state["restarts"] += 1
+        state["remaining"] = remaining
+        now = time.monotonic()
+        if now - state["last"] >= PROGRESS_EVERY:
+            state["last"] = now
+            log(f"backup: {total - remaining}/{total} pages ({100 * (total - remaining) // total}%)")
+        if state["restarts"] >= BACKUP_RESTARTS:
+            raise _Restarted()
+
+    start = time.monotonic()
+    target = sqlite3.connect(tmp)
+    try:
+        try:
+            conn.backup(target, pages=pages, progress=progress, sleep=pause)
+        except _Restarted:
+            log(f"backup: source changed {state['restarts']} times mid-copy; "
+                f"finishing in one step")
+            conn.backup(target, pages=-1)
+    finally:
+        target.close()
+    os.replace(tmp, dest)
+    log(f"backup: {dest} ({mb(os.path.getsize(dest))}) in {time.monotonic() - start:.1f}s")
+
+
+def delete_old(conn, table, cutoff, throttle, dry_run=False):
+    """Delete rows with timestamp < cutoff, lowest ids first. Returns rows deleted."""
+    lo = conn.execute(f"SELECT MIN(id) FROM {table}").fetchone()[0]
+    hi = conn.execute(f"SELECT MAX(id) FROM {table} WHERE timestamp < ?", (cutoff,)).fetchone()[0]
+    if lo is None or hi is None:
+        log("delete: nothing older than the cutoff")
+        return 0
+    total = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE id <= ? AND timestamp < ?",
+                         (hi, cutoff)).fetchone()[0]
+    log(f"delete: {total} rows older than {time.strftime('%Y-%m-%d %H:%M', time.localtime(cutoff))} "
+        f"(ids {lo}..{hi})")
+    if dry_run:
+        return 0
+    deleted, last_report = 0, time.monotonic()
+    while lo <= hi:
+        upper = min(lo + throttle.batch, hi + 1)
+        start = time.monotonic()
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.execute(f"DELETE FROM {table} WHERE id >= ? AND id < ? AND timestamp < ?",
+                           (lo, upper, cutoff))
+        conn.execute("COMMIT")
+        deleted += cur.rowcount
+        lo = upper
+        throttle.after(time.monotonic() - start)
+        if time.monotonic() - last_report >= PROGRESS_EVERY:
+            last_report = time.monotonic()
+            log(f"delete: {deleted}/{total} rows ({100 * deleted // max(total, 1)}%), "
+                f"batch {throttle.batch}")
+    log(f"delete: {deleted} rows removed")
+    return deleted
+
+
+def convert(conn):
+    """Switch to auto_vacuum=INCREMENTAL. This runs one full VACUUM, under an exclusive lock."""
+    log("convert: setting auto_vacuum=INCREMENTAL and running VACUUM (FTL's database "
+        "writes wait meanwhile; DNS keeps answering)")
+    start = time.monotonic()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    log(f"convert: done in {time.monotonic() - start:.1f}s")
+
+
+def incremental_vacuum(conn, path, throttle):
+    """Release free pages to the filesystem in small steps. Returns pages released."""
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    released, last_report = 0, time.monotonic()
+    while free:
+        start = time.monotonic()
+        # executescript steps the pragma to completion; execute() frees just one page
+        conn.executescript(f"PRAGMA incremental_vacuum({min(throttle.batch, free)});")
+        left = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if left >= free:
+            break   # nothing released (e.g. not in incremental mode)
+        released += free - left
+        free = left
+        throttle.after(time.monotonic() - start)
+        if time.monotonic() - last_report >= PROGRESS_EVERY:
+            last_report = time.monotonic()
+            log(f"vacuum: {released} pages released, {free} free pages left, "
+                f"step {throttle.batch} pages, file {mb(os.path.getsize(path))}")
+    return released
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--db", default=default_db())
+    parser.add_argument("--days", type=float, default=KEEP_DAYS, help="keep this many days of queries")
+    parser.add_argument("--backup", metavar="PATH", help="online backup to PATH before deleting")
+    parser.add_argument("--convert", action="store_true",
+                        help="switch to auto_vacuum=INCREMENTAL (one full VACUUM)")
+    parser.add_argument("--yes", action="store_true",
+                        help="confirm --convert: FTL cannot write until the VACUUM ends")
+    parser.add_argument("--no-vacuum", dest="vacuum", action="store_false",
+                        help="leave freed pages in the file for FTL to reuse")
+    parser.add_argument("--batch", type=int, default=BATCH_ROWS, help="starting rows per delete")
+    parser.add_argument("--max-lock-ms", type=float, default=MAX_LOCK_MS)
+    parser.add_argument("--duty", type=float, default=DUTY,
+                        help="share of time spent writing (0-1)")
+    parser.add_argument("--dns-limit-ms", type=float, default=DNS_LIMIT_MS)
+    parser.add_argument("--no-dns-probe", dest="probe", action="store_false")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be deleted")
+    args = parser.parse_args()
+    if not 0 < args.duty <= 1:
+        parser.error("--duty must be in (0, 1]")
+    if not os.path.exists(args.db):
+        raise SystemExit(f"{args.db}: not found")
+
+    conn = connect(args.db)
+    table = query_table(conn)
+    throttle = Throttle(args.batch, (200, 100_000), args.max_lock_ms, args.duty,
+                        args.dns_limit_ms, args.probe)
+    began = time.monotonic()
+    before = page_stats(conn, args.db)
+    mode = {0: "none", 1: "full", 2: "incremental"}[
+        conn.execute("PRAGMA auto_vacuum").fetchone()[0]]
+    log(f"=== Pi-hole database maintenance: {args.db} ===")
+    log(f"size {mb(before['bytes'])}, {before['pages']} pages ({before['free']} free), "
+        f"auto_vacuum={mode}, DNS probe {'on' if throttle.probe else 'off'}")
+
+    if args.convert and mode != "incremental" and not (args.yes or args.dry_run):
+        raise SystemExit(
+            f"--convert runs one full VACUUM: it rewrites all {mb(before['bytes'])} under an "
+            f"exclusive lock, so FTL cannot write to the database until it finishes (minutes "
+            f"for a large file), and it needs as much free disk again. Run it at a quiet "
+            f"time, or with Pi-hole stopped, and add --yes.")
+    if args.backup and not args.dry_run:
+        backup(conn, args.backup)
+    cutoff = time.time() - args.days * 86400
+    deleted = delete_old(conn, table, cutoff, throttle, dry_run=args.dry_run)
+    if args.dry_run:
+        return 0
+    if args.convert and mode != "incremental":
+        convert(conn)
+        mode = "incremental"
+    released = 0
+    if args.vacuum and mode == "incremental":
+        pages = Throttle(VACUUM_PAGES, (16, 16384), args.max_lock_ms, args.duty,
+                         args.dns_limit_ms, args.probe)
+        released = incremental_vacuum(conn, args.db, pages)
+        throttle.longest = max(throttle.longest, pages.longest)
+        throttle.dns_ms += pages.dns_ms
+        throttle.backoffs += pages.backoffs
+    elif args.vacuum and mode == "none":
+        log("vacuum: auto_vacuum is off; freed pages stay in the file and are reused by FTL "
+            "(run once with --convert --yes to return them to the filesystem)")
+
+    after = page_stats(conn, args.db)
+    conn.close()
+    dns = sorted(throttle.dns_ms)
+    log("=== Done ===")
+    log(f"rows deleted   {deleted}")
+    log(f"pages          {before['pages']} -> {after['pages']} "
+        f"({released} released to the filesystem, {after['free']} free in the file)")
+    log(f"file size      {mb(before['bytes'])} -> {mb(after['bytes'])}")
+    log(f"longest lock   {throttle.longest * 1000:.0f} ms; "
+        f"{time.monotonic() - began:.1f}s total")
+    if dns:
+        log(f"DNS latency    p50 {dns[len(dns) // 2]:.1f} ms, max {dns[-1]:.1f} ms "
+            f"over {len(dns)} probes, {throttle.backoffs} back-offs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -294,7 +294,7 @@ run_watchdog() {
     if [[ $db_size -ge $MAX_DB_SIZE_MB ]]; then
         log_error "Database too large: ${db_size}MB (limit: ${MAX_DB_SIZE_MB}MB)"
         issues+=("database_large")
-        send_alert "Pi-hole database is ${db_size}MB - consider cleanup"
+        send_alert "Pi-hole database is ${db_size}MB - run: sudo python3 ~/pihole_db_maintenance.py"
     else
         log_ok "Database size OK: ${db_size}MB"
     fi
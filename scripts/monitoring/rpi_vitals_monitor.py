@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Raspberry Pi Vitals Monitor - long-running collector for InfluxDB
+Replaces the rpi_vitals_monitor.sh cron job: samples every second straight
+from /proc, /sys and statvfs (CPU usage from /proc/stat deltas rather than
+`top`) and writes the same `system_vitals` points, so the Grafana System
+Vitals dashboard keeps working unchanged. No process is forked per sample.
+Points are batched through influxwriter.py (deployed alongside), which
+spools them to disk while InfluxDB is down and replays them afterwards.
+
+    python3 rpi_vitals_monitor.py [--interval 1] [--iface eth0] [--once]
+
+Runs as rpi-vitals.service; --once prints one sample's line protocol.
+"""
+
+import argparse
+import math
+import os
+import signal
+import sys
+import time
+
+import influxwriter
+
+INFLUX_URL = "http://localhost:8086/write?db=smarthome"
+HOST_TAG = "rpi4"
+NET_IFACE = "eth0"
+DISK_PATH = "/"
+SAMPLE_INTERVAL = 1.0   # seconds
+FLUSH_INTERVAL = 10.0   # seconds between batched writes
+SPOOL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rpi_vitals.spool")
+SPOOL_MAX_BYTES = 64 * 2**20   # ~1 day of samples
+
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+
+
+# ---------------------------------------------------------------------------
+# Readers (files stay open; each sample is a pread per file)
+# ---------------------------------------------------------------------------
+
+class Files:
+    """Keep /proc and /sys files open and re-read them from offset 0."""
+
+    def __init__(self):
+        self._fds = {}
+
+    def read(self, path):
+        """File contents as text, or None if it doesn't exist (e.g. no such interface)."""
+        fd = self._fds.get(path)
+        try:
+            if fd is None:
+                fd = self._fds[path] = os.open(path, os.O_RDONLY)
+            return os.pread(fd, 65536, 0).decode()
+        except OSError:
+            if fd is not None:
+                os.close(self._fds.pop(path))
+            return None
+
+    def close(self):
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+
+
+def cpu_times(files):
+    """(busy, total) jiffies across all CPUs from the first /proc/stat line."""
+    fields = [int(x) for x in files.read("/proc/stat").split("\n", 1)[0].split()[1:]]
+    # user nice system idle iowait irq softirq steal; guest time is already in user
+    idle = fields[3] + fields[4]
+    total = sum(fields[:8])
+    return total - idle, total
+
+
+def cpu_usage(prev, cur):
+    """Busy percentage between two cpu_times() readings."""
+    busy, total = cur[0] - prev[0], cur[1] - prev[1]
+    return round(100.0 * busy / total, 1) if total > 0 else 0.0
+
+
+def meminfo(files):
+    """/proc/meminfo in kB."""
+    out = {}
+    for line in files.read("/proc/meminfo").splitlines():
+        key, _, rest = line.partition(":")
+        out[key] = int(rest.split()[0])
+    return out
+
+
+def cpu_temp(files):
+    """SoC temperature in °C (what `vcgencmd measure_temp` reports), or None."""
+    raw = files.read(THERMAL_ZONE)
+    return round(int(raw) / 1000, 1) if raw else None
+
+
+def disk(path):
+    """(use %, available GiB) rounded up the way `df` does."""
+    st = os.statvfs(path)
+    used = st.f_blocks - st.f_bfree
+    avail = st.f_bavail
+    pct = math.ceil(100 * used / (used + avail)) if used + avail else 0
+    return pct, math.ceil(avail * st.f_frsize / 2**30)
+
+
+def net_bytes(files, iface):
+    base = f"/sys/class/net/{iface}/statistics/"
+    return tuple(int(files.read(base + name) or 0) for name in ("rx_bytes", "tx_bytes"))
+
+
+# ---------------------------------------------------------------------------
+# Sampling
+# ---------------------------------------------------------------------------
+
+def sample(files, prev_cpu, iface=NET_IFACE, disk_path=DISK_PATH):
+    """One set of vitals as {type tag: {field: value}}, plus the new CPU reading."""
+    cur_cpu = cpu_times(files)
+    mem = meminfo(files)
+    total, avail = mem["MemTotal"], mem.get("MemAvailable", mem["MemFree"])
+    used = total - avail
+    disk_pct, disk_gb = disk(disk_path)
+    uptime_s = float(files.read("/proc/uptime").split()[0])
+    rx, tx = net_bytes(files, iface)
+
+    vitals = {
+        "cpu": {"cpu_usage": cpu_usage(prev_cpu, cur_cpu)},
+        "memory": {"memory_used": used // 1024, "memory_total": total // 1024,
+                   "memory_percent": round(100 * used / total, 1)},
+        "disk": {"disk_usage_percent": disk_pct, "disk_available_gb": disk_gb},
+        "swap": {"swap_used": (mem["SwapTotal"] - mem["SwapFree"]) // 1024,
+                 "swap_total": mem["SwapTotal"] // 1024},
+        "system": {"load_avg": float(files.read("/proc/loadavg").split()[0]),
+                   "uptime_days": int(uptime_s // 86400)},
+        "network": {"rx_bytes": rx, "tx_bytes": tx},
+    }
+    temp = cpu_temp(files)
+    if temp is not None:
+        vitals = {"temperature": {"cpu_temp": temp}, **vitals}
+    return vitals, cur_cpu
+
+
+def to_lines(vitals, timestamp_ns, host=HOST_TAG):
+    """InfluxDB line protocol, one line per type.
+
+    Values are written without the integer suffix, as the shell script did,
+    so every field stays a float and existing series accept the points.
+    """
+    return "\n".join(
+        f"system_vitals,host={host},type={kind} "
+        + ",".join(f"{k}={v}" for k, v in fields.items())
+        + f" {timestamp_ns}"
+        for kind, fields in vitals.items())
+
+
+# ---------------------------------------------------------------------------
+# Main loop
+# ---------------------------------------------------------------------------
+
+def run(interval, iface, writer):
+    files = Files()
+    prev_cpu = cpu_times(files)
+    stop = []
+    signal.signal(signal.SIGTERM, lambda *_: stop.append(True))
+    pending = f", {writer.spool.pending} spooled bytes to replay" if writer.spool.pending else ""
+    print(f"[{time.ctime()}] vitals: sampling every {interval:g}s, writing to "
+          f"{writer.host}:{writer.port}{writer.path}{pending}", flush=True)
+    writer.start()
+
+    deadline = time.monotonic()
+    while not stop:
+        # Fixed cadence: sleep to the next tick rather than `interval` after the work
+        deadline += interval
+        time.sleep(max(deadline - time.monotonic(), 0))
+        if time.monotonic() - deadline > interval:
+            deadline = time.monotonic()   # fell behind (suspend, stall); don't burst
+        vitals, prev_cpu = sample(files, prev_cpu, iface=iface)
+        writer.add(to_lines(vitals, time.time_ns()).split("\n"))
+    writer.close()
+    files.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--interval", type=float, default=SAMPLE_INTERVAL)
+    parser.add_argument("--iface", default=NET_IFACE)
+    parser.add_argument("--url", default=INFLUX_URL, help="InfluxDB /write URL")
+    parser.add_argument("--flush", type=float, default=FLUSH_INTERVAL,
+                        help="seconds between batched writes")
+    parser.add_argument("--spool", default=SPOOL_PATH,
+                        help="file holding points while InfluxDB is unreachable")
+    parser.add_argument("--once", action="store_true",
+                        help="print one sample as line protocol and exit")
+    args = parser.parse_args()
+
+    if args.once:
+        files = Files()
+        prev = cpu_times(files)
+        time.sleep(args.interval)
+        vitals, _ = sample(files, prev, iface=args.iface)
+        print(to_lines(vitals, time.time_ns()))
+        return
+    writer = influxwriter.InfluxWriter(args.url, flush_interval=args.flush,
+                                       spool_path=args.spool, spool_max_bytes=SPOOL_MAX_BYTES,
+                                       name="vitals")
+    run(args.interval, args.iface, writer)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,12 +8,14 @@ case "$1" in
         ;;
     stop)
         echo "Stopping Chromium kiosk..."
-        pkill -f "chromium-browser.*kiosk"
+        pkill -f "chromium.*--kiosk"
         echo "Kiosk stopped"
         ;;
     status)
-        if pgrep -f "chromium-browser.*kiosk" > /dev/null; then
+        if pgrep -f "chromium.*--kiosk" > /dev/null; then
             echo "Kiosk is running"
+            # Tabs of the button handler's persistent browser, if that is the one running
+            [ -f ~/kiosk_browser.py ] && python3 ~/kiosk_browser.py status 2>/dev/null
         else
             echo "Kiosk is not running"
         fi
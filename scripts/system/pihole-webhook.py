@@ -5,6 +5,7 @@ Temporarily disables Pi-hole blocking via HTTP request.
 
 Usage:
     http://192.168.1.100:8888/?duration=10
+    http://192.168.1.100:8888/status
     (Change 192.168.1.100 to your device's IP address)
 
 Parameters:
@@ -14,16 +15,354 @@ Example Safari Bookmark:
     http://192.168.1.100:8888/?duration=10
 
 This is useful when Pi-hole is blocking a link you need to access temporarily.
+
+Requests are served concurrently. Disable requests that overlap (several
+devices tapping the bookmark at once) are merged into one backend call
+using the longest duration asked for. The backend is Pi-hole's HTTP API
+over a pooled keep-alive session:
+
+  * v6 (pihole.toml): POST /api/auth for a session id, then
+    POST /api/dns/blocking with it; the session is renewed when FTL
+    answers 401. The password is --password, else the CLI password FTL
+    writes to /etc/pihole/cli_pw on every start.
+  * v5 (setupVars.conf): GET /admin/api.php?disable=N, authenticated with
+    the WEBPASSWORD hash from setupVars.conf.
+
+The version comes from whichever of those files is in the Pi-hole config
+directory, else from asking the server. Without credentials (or without
+requests) it falls back to `pihole disable` inside the container; the
+choice and the reason are logged at startup. /status answers from the
+webhook's own record of what it last applied.
+
+    python3 webhook.py [--port 8888] [--backend api|docker] [--api-url URL]
+                       [--api-version v5|v6] [--password PW] [--token TOKEN] [--serial]
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import HTTPServer, ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
+from datetime import datetime
+import argparse
 import subprocess
+import threading
 import json
+import time
+import os
+import re
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    HAVE_REQUESTS = True
+except ImportError:
+    HAVE_REQUESTS = False
+
+try:
+    import docker_api   # shared Engine API client (monitoring/health-dashboard/docker_api.py)
+except ImportError:
+    docker_api = None
+
+PORT = 8888
+PIHOLE_URL = "http://127.0.0.1"   # container runs with network_mode: host
+ETC_PIHOLE = os.path.expanduser("~/pihole-docker/etc-pihole")
+PIHOLE_TOML = os.path.join(ETC_PIHOLE, "pihole.toml")     # v6 config
+CLI_PW = os.path.join(ETC_PIHOLE, "cli_pw")               # v6 CLI password, new on every FTL start
+SETUP_VARS = os.path.join(ETC_PIHOLE, "setupVars.conf")   # v5 config (v6 moves it aside)
+BACKEND_TIMEOUT = 5     # seconds per backend call
+MAX_DURATION = 86400    # 24 hours
+COVER_SLACK = 1.0       # Pi-hole timers are whole seconds; a call ending this much earlier still covers
+
+
+class BackendError(Exception):
+    """The backend call failed; the message is returned to the client."""
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class ApiBackend:
+    """Pi-hole's HTTP API over one pooled keep-alive session; see V5Backend and V6Backend."""
+
+    name = "api"
+
+    def __init__(self, url=PIHOLE_URL, timeout=BACKEND_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(self, method, path, **kwargs):
+        try:
+            return self.session.request(method, self.url + path, timeout=self.timeout, **kwargs)
+        except requests.Timeout:
+            raise BackendError("Pi-hole API timeout")
+        except requests.RequestException as e:
+            # The exception text carries the URL, token included; keep it off the wire
+            raise BackendError(f"Pi-hole API unreachable at {self.url} ({type(e).__name__})")
+
+    @staticmethod
+    def _refused(r):
+        return BackendError(f"Pi-hole API refused (HTTP {r.status_code}): {r.text[:200].strip()}")
+
+
+class V5Backend(ApiBackend):
+    """Pi-hole v5: GET /admin/api.php?disable=N&auth=<WEBPASSWORD hash>."""
+
+    name = "api (v5)"
+
+    def __init__(self, url=PIHOLE_URL, token="", timeout=BACKEND_TIMEOUT):
+        super().__init__(url, timeout)
+        self.token = token
+
+    def disable(self, seconds):
+        r = self._request("GET", "/admin/api.php", params={"disable": seconds, "auth": self.token})
+        body = _json(r)
+        # A wrong token gets 200 with an empty list, not an error status
+        if r.status_code != 200 or not isinstance(body, dict) or body.get("status") != "disabled":
+            raise self._refused(r)
+        return r.text.strip()
+
+
+class V6Backend(ApiBackend):
+    """Pi-hole v6: a session from POST /api/auth, then POST /api/dns/blocking.
+
+    The session id is kept for later calls and renewed when FTL answers 401
+    (expired, or FTL restarted). `password` is called for every login, so a
+    renewal picks up the CLI password FTL rewrites when it starts.
+    """
+
+    name = "api (v6)"
+
+    def __init__(self, url=PIHOLE_URL, password=lambda: "", timeout=BACKEND_TIMEOUT):
+        super().__init__(url, timeout)
+        self.password = password
+        self.sid = None
+        self.logins = 0
+        self._logged_in = False
+        self._auth_lock = threading.Lock()
+
+    def _session(self, rejected=False):
+        """The session id to send (None: Pi-hole has no password); logs in when needed."""
+        with self._auth_lock:
+            if self._logged_in and not rejected:
+                return self.sid
+            r = self._request("POST", "/api/auth", json={"password": self.password() or ""})
+            body = _json(r)
+            session = body.get("session") if isinstance(body, dict) else None
+            if r.status_code != 200 or not isinstance(session, dict) or not session.get("valid"):
+                raise BackendError(f"Pi-hole API login failed (HTTP {r.status_code})")
+            self.sid, self._logged_in = session.get("sid"), True
+            self.logins += 1
+            return self.sid
+
+    def _disable(self, sid, seconds):
+        return self._request("POST", "/api/dns/blocking",
+                             json={"blocking": False, "timer": seconds},
+                             headers={"X-FTL-SID": sid} if sid else {})
+
+    def disable(self, seconds):
+        r = self._disable(self._session(), seconds)
+        if r.status_code == 401:
+            r = self._disable(self._session(rejected=True), seconds)
+        body = _json(r)
+        if r.status_code != 200 or not isinstance(body, dict) or body.get("blocking") != "disabled":
+            raise self._refused(r)
+        return r.text.strip()
+
+
+def _json(r):
+    try:
+        return r.json()
+    except ValueError:
+        return None
+
+
+class DockerBackend:
+    """`pihole disable` inside the container (Engine API, or the docker CLI)."""
+
+    name = "docker"
+
+    def __init__(self, timeout=BACKEND_TIMEOUT):
+        self.timeout = timeout
+        self.docker = docker_api.DockerClient() if docker_api else None
+
+    def disable(self, seconds):
+        cmd = ['pihole', 'disable', f'{seconds}s']
+        try:
+            if self.docker:
+                output, _ = self.docker.exec('pihole', cmd, timeout=self.timeout)
+                return output
+            return subprocess.run(['docker', 'exec', 'pihole'] + cmd, capture_output=True,
+                                  text=True, timeout=self.timeout).stdout
+        except subprocess.TimeoutExpired:
+            raise BackendError("Command timeout")
+
+
+def read_secret(path):
+    """First line of a file, None if it can't be read."""
+    try:
+        with open(path) as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+
+def v6_needs_password(path=PIHOLE_TOML):
+    """False if pihole.toml shows no API password is set; True if it is set or unreadable."""
+    try:
+        with open(path) as f:
+            match = re.search(r'^\s*pwhash\s*=\s*"([^"]*)"', f.read(), re.MULTILINE)
+    except OSError:
+        return True
+    return match is None or match.group(1) != ""
+
+
+def detect_version(url):
+    """("v5" | "v6" | None, reason): from the config files on disk, else by asking the server."""
+    if os.path.exists(PIHOLE_TOML):
+        return "v6", f"found {PIHOLE_TOML}"
+    if os.path.exists(SETUP_VARS):
+        return "v5", f"found {SETUP_VARS}"
+    url = url.rstrip("/")
+    try:
+        # v6 answers /api/auth with JSON (401 when a password is set); v5 has no /api
+        r = requests.get(url + "/api/auth", timeout=BACKEND_TIMEOUT)
+        if r.status_code in (200, 401) and _json(r) is not None:
+            return "v6", f"{url}/api/auth answered"
+        r = requests.get(url + "/admin/api.php", timeout=BACKEND_TIMEOUT)
+        if r.status_code == 200:
+            return "v5", f"{url}/admin/api.php answered"
+    except requests.RequestException as e:
+        return None, f"no config in {ETC_PIHOLE} and {url} unreachable ({type(e).__name__})"
+    return None, f"no config in {ETC_PIHOLE} and {url} is not a Pi-hole API"
+
+
+def read_token(path=SETUP_VARS):
+    """The API token (WEBPASSWORD hash) from setupVars.conf, "" if no password, None if unreadable."""
+    try:
+        with open(path) as f:
+            for line in f:
+                key, _, value = line.strip().partition("=")
+                if key == "WEBPASSWORD":
+                    return value
+        return ""
+    except OSError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Coalescing
+# ---------------------------------------------------------------------------
+
+class _Batch:
+    def __init__(self, until):
+        self.until = until        # wall-clock time blocking should come back
+        self.done = threading.Event()
+        self.output = None
+        self.error = None
+
+
+class DisableCoalescer:
+    """Merge overlapping disable requests into as few backend calls as possible.
+
+    While a call is in flight, a request it already covers waits for it and
+    shares its result. A request for longer joins the next call, which the
+    first such request makes once the current one finishes, for the longest
+    duration gathered by then. With nothing in flight every request calls
+    the backend, so a re-enable from the admin page is never papered over,
+    but for no less than the time left on the last applied call: the
+    longest duration wins even across calls.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.until = 0.0          # last applied deadline (time.time())
+        self.stats = {"requests": 0, "calls": 0, "coalesced": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._running = None
+        self._next = None
+
+    def disable(self, seconds):
+        """Disable for at least `seconds`. Returns (until, output, coalesced)."""
+        until = time.time() + seconds
+        with self._lock:
+            self.stats["requests"] += 1
+            # `pihole disable N` replaces the timer, so never ask for less than is applied
+            until = max(until, self.until)
+            if self._running is None:
+                batch = self._running = _Batch(until)
+                lead, ahead = True, None
+            elif self._running.until + COVER_SLACK >= until:
+                batch, lead = self._running, False
+            elif self._next is None:
+                batch = self._next = _Batch(until)
+                lead, ahead = True, self._running
+            else:
+                batch, lead = self._next, False
+                batch.until = max(batch.until, until)
+            if not lead:
+                self.stats["coalesced"] += 1
+
+        if not lead:
+            batch.done.wait()
+        else:
+            if ahead is not None:
+                ahead.done.wait()   # it hands over by making this batch the running one
+            self._call(batch)
+        if batch.error:
+            raise BackendError(batch.error)
+        return batch.until, batch.output, not lead
+
+    def _call(self, batch):
+        # Nothing joins the batch once it is running; its deadline is final
+        seconds = max(1, round(batch.until - time.time()))
+        try:
+            batch.output = self.backend.disable(seconds)
+        except Exception as e:
+            batch.error = str(e)
+        with self._lock:
+            self.stats["calls"] += 1
+            if batch.error:
+                self.stats["errors"] += 1
+            else:
+                self.until = max(self.until, batch.until)
+            self._running, self._next = self._next, None
+        batch.done.set()
+
+    def status(self):
+        remaining = max(0, round(self.until - time.time()))
+        return {
+            "blocking": "disabled" if remaining else "enabled",
+            "remaining": remaining,
+            "until": datetime.fromtimestamp(self.until).isoformat(timespec="seconds")
+                     if remaining else None,
+            "backend": self.backend.name,
+            "stats": dict(self.stats),
+        }
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
 
 class PiHoleWebhook(BaseHTTPRequestHandler):
+    coalescer = None   # set in main()
+
+    def send_json(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def do_GET(self):
         parsed = urlparse(self.path)
+        if parsed.path.rstrip('/') == '/status':
+            self.send_json(200, self.coalescer.status())
+            return
         params = parse_qs(parsed.query)
 
         # Get duration (default 10 seconds)
@@ -32,54 +371,102 @@ class PiHoleWebhook(BaseHTTPRequestHandler):
         # Validate duration is a number
         try:
             duration_int = int(duration)
-            if duration_int < 1 or duration_int > 86400:  # Max 24 hours
-                raise ValueError("Duration must be between 1 and 86400 seconds")
+            if duration_int < 1 or duration_int > MAX_DURATION:
+                raise ValueError(f"Duration must be between 1 and {MAX_DURATION} seconds")
         except ValueError as e:
-            self.send_response(400)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": str(e)}).encode())
+            self.send_json(400, {"error": str(e)})
             return
 
-        # Execute docker command to disable pihole
         try:
-            result = subprocess.run(
-                ['docker', 'exec', 'pihole', 'pihole', 'disable', f'{duration_int}s'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-
-            response = {
-                "status": "success",
-                "message": f"Pi-hole disabled for {duration_int} seconds",
-                "output": result.stdout
-            }
-            self.wfile.write(json.dumps(response).encode())
-
-        except subprocess.TimeoutExpired:
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": "Command timeout"}).encode())
-        except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": str(e)}).encode())
+            until, output, coalesced = self.coalescer.disable(duration_int)
+        except BackendError as e:
+            self.send_json(500, {"error": str(e)})
+            return
+        remaining = max(duration_int, round(until - time.time()))
+        self.send_json(200, {
+            "status": "success",
+            "message": f"Pi-hole disabled for {remaining} seconds",
+            "output": output,
+            "coalesced": coalesced,
+        })
 
     def log_message(self, format, *args):
         # Log requests
-        print(f"{self.address_string()} - {format % args}")
+        print(f"{self.address_string()} - {format % args}", flush=True)
 
-if __name__ == '__main__':
-    PORT = 8888
-    server = HTTPServer(('0.0.0.0', PORT), PiHoleWebhook)
-    print(f'Pi-hole webhook server running on port {PORT}')
-    print(f'Usage: http://192.168.1.100:{PORT}/?duration=10')
-    print(f'(Change 192.168.1.100 to your device IP)')
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 64   # a burst of taps must not overflow the listen backlog
+
+
+class SerialServer(HTTPServer):
+    request_queue_size = 64
+
+
+def make_backend(kind, api_url, token=None, password=None, version=None):
+    """(backend, reason it was chosen); --backend api exits rather than fall back."""
+    def fallback(reason):
+        if kind == "api":
+            raise SystemExit(f"--backend api: {reason}")
+        return DockerBackend(), f"{reason}; using docker exec"
+
+    if kind == "docker":
+        return DockerBackend(), "--backend docker"
+    if not HAVE_REQUESTS:
+        return fallback("the requests package is not installed")
+    # Older configs gave the full v5 endpoint
+    api_url = api_url.removesuffix("/admin/api.php")
+    why = "--api-version"
+    if version is None:
+        version, why = detect_version(api_url)
+    if version == "v6":
+        if password is not None:
+            return V6Backend(api_url, lambda: password), f"Pi-hole v6 ({why}), --password"
+        if read_secret(CLI_PW) is not None:
+            return (V6Backend(api_url, lambda: read_secret(CLI_PW)),
+                    f"Pi-hole v6 ({why}), CLI password from {CLI_PW}")
+        if not v6_needs_password():
+            return V6Backend(api_url), f"Pi-hole v6 ({why}), no API password set"
+        return fallback(f"Pi-hole v6 ({why}) but no password: pass --password "
+                        f"or make {CLI_PW} readable")
+    if version == "v5":
+        token = token if token is not None else read_token()
+        if token is not None:
+            return V5Backend(api_url, token), f"Pi-hole v5 ({why}), WEBPASSWORD token"
+        return fallback(f"Pi-hole v5 ({why}) but no token: pass --token or make "
+                        f"{SETUP_VARS} readable")
+    return fallback(f"Pi-hole API version unknown: {why}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--bind", default="0.0.0.0")
+    parser.add_argument("--backend", choices=("api", "docker"),
+                        help="default: api when credentials are available, else docker")
+    parser.add_argument("--api-url", default=os.environ.get("PIHOLE_API_URL", PIHOLE_URL))
+    parser.add_argument("--api-version", choices=("v5", "v6"),
+                        help=f"default: v6 if {PIHOLE_TOML} exists, v5 if setupVars.conf does, "
+                             f"else ask the server")
+    parser.add_argument("--password", default=os.environ.get("PIHOLE_API_PASSWORD"),
+                        help=f"v6 web or app password (default: the CLI password in {CLI_PW})")
+    parser.add_argument("--token", default=os.environ.get("PIHOLE_API_TOKEN"),
+                        help=f"v5 API token (default: WEBPASSWORD from {SETUP_VARS})")
+    parser.add_argument("--serial", action="store_true",
+                        help="serve one request at a time (the old behaviour)")
+    args = parser.parse_args()
+
+    backend, why = make_backend(args.backend, args.api_url, args.token, args.password,
+                                args.api_version)
+    PiHoleWebhook.coalescer = DisableCoalescer(backend)
+    server = (SerialServer if args.serial else Server)((args.bind, args.port), PiHoleWebhook)
+    print(f'Pi-hole webhook server running on port {args.port} '
+          f'({backend.name} backend: {why})', flush=True)
+    print(f'Usage: http://192.168.1.100:{args.port}/?duration=10', flush=True)
+    print(f'(Change 192.168.1.100 to your device IP)', flush=True)
     server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()